@@ -0,0 +1,163 @@
+import asyncio
+import hmac
+import threading
+import tracemalloc
+import uuid
+import weakref
+from collections import OrderedDict
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.admin.schemas import AllocationSnapshotFields, AllocationDiffFields
+from app.admin.stack_sampler import StackSampler
+from app.config import Settings
+from app.utils.api_layer_exceptions import NotFoundException
+
+
+class ProfileStore:
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+
+    def put(self, profile_id: str, folded_stacks: str) -> None:
+        self._profiles[profile_id] = folded_stacks
+        while len(self._profiles) > self._max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> str:
+        folded_stacks = self._profiles.get(profile_id)
+        if folded_stacks is None:
+            raise NotFoundException(f"Profile {profile_id} not found")
+        return folded_stacks
+
+
+class ProfilingMiddleware:
+    profile_header = "x-profile"
+    profile_id_header = "X-Profile-Id"
+
+    def __init__(self, app: ASGIApp, settings: Settings, profile_store: ProfileStore):
+        self.app = app
+        self._admin_token = settings.admin_token
+        self._interval_seconds = settings.profiling_sample_interval_ms / 1000
+        self._profile_store = profile_store
+        self._profiling = asyncio.Lock()
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or not self._admin_token or self._profiling.locked():
+            return False
+        requested_token = Headers(scope=scope).get(self.profile_header)
+        return requested_token is not None and hmac.compare_digest(
+            requested_token.encode(),
+            self._admin_token.encode()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.profile_id_header] = profile_id
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        request_tasks: weakref.WeakSet[asyncio.Task] = weakref.WeakSet([asyncio.current_task()])
+        previous_task_factory = loop.get_task_factory()
+
+        def track_request_tasks(task_loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+            if previous_task_factory is not None:
+                task = previous_task_factory(task_loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=task_loop, **kwargs)
+            if asyncio.current_task(task_loop) in request_tasks:
+                request_tasks.add(task)
+            return task
+
+        async with self._profiling:
+            sampler = StackSampler(
+                thread_id=threading.get_ident(),
+                interval_seconds=self._interval_seconds,
+                sample_filter=lambda: asyncio.current_task(loop) in request_tasks
+            )
+            loop.set_task_factory(track_request_tasks)
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                sampler.stop()
+                loop.set_task_factory(previous_task_factory)
+                self._profile_store.put(profile_id, sampler.to_folded())
+
+
+class AllocationTracker:
+    def __init__(self, max_snapshots: int):
+        self._max_snapshots = max_snapshots
+        self._snapshots: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    def take_snapshot(self) -> AllocationSnapshotFields:
+        if not tracemalloc.is_tracing():
+            raise NotFoundException("Allocation tracing is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot_id = uuid.uuid4().hex
+        self._snapshots[snapshot_id] = snapshot
+        while len(self._snapshots) > self._max_snapshots:
+            self._snapshots.popitem(last=False)
+        traced_memory, peak_traced_memory = tracemalloc.get_traced_memory()
+        return AllocationSnapshotFields(
+            id=snapshot_id,
+            traced_memory=traced_memory,
+            peak_traced_memory=peak_traced_memory
+        )
+
+    def _get_snapshot(self, snapshot_id: str) -> tracemalloc.Snapshot:
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise NotFoundException(f"Snapshot {snapshot_id} not found")
+        return snapshot
+
+    def diff(
+            self,
+            snapshot_id: str,
+            baseline_id: str,
+            key_type: str = "lineno",
+            limit: int = 25
+    ) -> list[AllocationDiffFields]:
+        statistics = self._get_snapshot(snapshot_id).compare_to(self._get_snapshot(baseline_id), key_type)
+        return [
+            AllocationDiffFields(
+                location=str(statistic.traceback),
+                size_diff=statistic.size_diff,
+                count_diff=statistic.count_diff,
+                size=statistic.size,
+                count=statistic.count
+            )
+            for statistic in statistics[:limit]
+        ]
+
+
+def get_profile_store(request: Request) -> ProfileStore:
+    return request.app.state.profile_store
+
+
+def get_allocation_tracker(request: Request) -> AllocationTracker:
+    return request.app.state.allocation_tracker
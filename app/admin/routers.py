@@ -0,0 +1,111 @@
+import hmac
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.admin.profiler import AllocationTracker, ProfileStore, get_allocation_tracker, get_profile_store
+from app.audit.audit_log import AuditLog, get_audit_log
+from app.config import Settings, get_settings
+from app.utils.api_layer_exceptions import NotFoundException
+
+
+def verify_admin_token(request: Request, settings: Settings = Depends(get_settings)) -> None:
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=404,
+            detail="Admin endpoints are not configured"
+        )
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        authorization = authorization[len("Bearer "):]
+    if not hmac.compare_digest(authorization.encode(), settings.admin_token.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token"
+        )
+
+
+router = APIRouter(prefix="/api/v1/admin", dependencies=[Depends(verify_admin_token)])
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+        profile_id: str,
+        profile_store: ProfileStore = Depends(get_profile_store)
+):
+    try:
+        return PlainTextResponse(
+            content=profile_store.get(profile_id),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+        )
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@router.post("/tracemalloc/start")
+async def start_allocation_tracing(
+        frames: int = Query(default=25, ge=1, le=100),
+        allocation_tracker: AllocationTracker = Depends(get_allocation_tracker)
+):
+    allocation_tracker.start(frames=frames)
+    return Response(status_code=204)
+
+
+@router.post("/tracemalloc/stop")
+async def stop_allocation_tracing(
+        allocation_tracker: AllocationTracker = Depends(get_allocation_tracker)
+):
+    allocation_tracker.stop()
+    return Response(status_code=204)
+
+
+@router.post("/tracemalloc/snapshots")
+async def take_allocation_snapshot(
+        allocation_tracker: AllocationTracker = Depends(get_allocation_tracker)
+):
+    try:
+        snapshot_data = allocation_tracker.take_snapshot()
+        json_compatible_data = jsonable_encoder(snapshot_data)
+        return JSONResponse(content=json_compatible_data)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
+
+
+@router.get("/tracemalloc/snapshots/{snapshot_id}/diff")
+async def diff_allocation_snapshots(
+        snapshot_id: str,
+        baseline: str,
+        key_type: Literal['lineno', 'filename', 'traceback'] = 'lineno',
+        limit: int = Query(default=25, ge=1, le=500),
+        allocation_tracker: AllocationTracker = Depends(get_allocation_tracker)
+):
+    try:
+        diff_data = allocation_tracker.diff(
+            snapshot_id=snapshot_id,
+            baseline_id=baseline,
+            key_type=key_type,
+            limit=limit
+        )
+        json_compatible_data = jsonable_encoder(diff_data)
+        return JSONResponse(content=json_compatible_data)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@router.get("/audit")
+async def get_audit_stats(
+        audit_log: AuditLog = Depends(get_audit_log)
+):
+    json_compatible_data = jsonable_encoder(audit_log.stats())
+    return JSONResponse(content=json_compatible_data)
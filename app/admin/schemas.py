@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class AllocationSnapshotFields(BaseModel):
+    id: str = Field(..., description="Unique snapshot ID")
+    traced_memory: int = Field(..., description="Size in bytes of memory traced when the snapshot was taken")
+    peak_traced_memory: int = Field(..., description="Peak size in bytes of traced memory")
+
+
+class AllocationDiffFields(BaseModel):
+    location: str = Field(..., description="Source location of the allocations")
+    size_diff: int = Field(..., description="Change in allocated bytes since the baseline")
+    count_diff: int = Field(..., description="Change in number of allocated blocks since the baseline")
+    size: int = Field(..., description="Allocated bytes in the compared snapshot")
+    count: int = Field(..., description="Number of allocated blocks in the compared snapshot")
@@ -0,0 +1,55 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Callable, Optional
+
+
+class StackSampler:
+    def __init__(
+            self,
+            thread_id: int,
+            interval_seconds: float,
+            sample_filter: Optional[Callable[[], bool]] = None
+    ):
+        self._thread_id = thread_id
+        self._interval_seconds = interval_seconds
+        self._sample_filter = sample_filter
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.duration: float = 0.0
+
+    @staticmethod
+    def _collapse(frame: Optional[FrameType]) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            if self._sample_filter is not None and not self._sample_filter():
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stacks[self._collapse(frame)] += 1
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def to_folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
@@ -0,0 +1,187 @@
+import asyncio
+import contextvars
+import datetime
+import gzip
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Optional
+
+from fastapi import Request
+
+from app.audit.schemas import AuditEventFields, AuditStatsFields
+from app.config import Settings
+from app.events.change_feed import ChangeFeed
+from app.utils.request_context import get_caller_id
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    def __init__(self, settings: Settings):
+        self._settings = settings
+        self._path = settings.audit_log_path
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=settings.audit_queue_max_size)
+        self._writer: Optional[asyncio.Task] = None
+        self._file_size: Optional[int] = None
+        self._unwritten: list[str] = []
+        self._file_lock = threading.Lock()
+        self.written_events = 0
+        self.dropped_events = 0
+        self.write_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._path is not None
+
+    def start(self) -> None:
+        if self.enabled and self._writer is None:
+            self._writer = asyncio.create_task(self._write_periodically(), context=contextvars.Context())
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
+        await self._write_batch(self._take_batch(limit=self._queue.qsize()))
+
+    async def record(self, event: AuditEventFields) -> None:
+        if self._writer is None:
+            return
+        line = event.model_dump_json()
+        try:
+            self._queue.put_nowait(line)
+            return
+        except asyncio.QueueFull:
+            if self._settings.audit_overflow_policy != "block":
+                self.dropped_events += 1
+                return
+        try:
+            async with asyncio.timeout(self._settings.audit_block_seconds):
+                await self._queue.put(line)
+        except TimeoutError:
+            self.dropped_events += 1
+
+    def stats(self) -> AuditStatsFields:
+        return AuditStatsFields(
+            enabled=self._writer is not None,
+            queued=self._queue.qsize() + len(self._unwritten),
+            written=self.written_events,
+            dropped=self.dropped_events,
+            write_failures=self.write_failures
+        )
+
+    def _take_batch(self, limit: int) -> list[str]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write_periodically(self) -> None:
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                batch.extend(self._take_batch(limit=self._settings.audit_batch_max_events - len(batch)))
+                if len(batch) < self._settings.audit_batch_max_events:
+                    await asyncio.sleep(self._settings.audit_flush_interval_seconds)
+                    batch.extend(self._take_batch(limit=self._settings.audit_batch_max_events - len(batch)))
+                pending_batch, batch = batch, []
+                await self._write_batch(pending_batch)
+        except asyncio.CancelledError:
+            batch.extend(self._take_batch(limit=self._queue.qsize()))
+            await self._write_batch(batch)
+            raise
+
+    async def _write_batch(self, batch: list[str]) -> None:
+        batch, self._unwritten = [*self._unwritten, *batch], []
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._append, batch)
+        except OSError:
+            self.write_failures += 1
+            logger.exception("Writing %d audit events to %s failed, retrying on the next flush", len(batch), self._path)
+            overflow = len(batch) - self._settings.audit_queue_max_size
+            if overflow > 0:
+                self.dropped_events += overflow
+                batch = batch[overflow:]
+            self._unwritten = batch
+        else:
+            self.written_events += len(batch)
+
+    def _append(self, batch: list[str]) -> None:
+        with self._file_lock:
+            self._append_locked(batch)
+
+    def _append_locked(self, batch: list[str]) -> None:
+        if self._file_size is None:
+            self._file_size = os.path.getsize(self._path) if os.path.exists(self._path) else 0
+        if self._file_size >= self._settings.audit_max_file_bytes:
+            self._rotate()
+        content = "".join(f"{line}\n" for line in batch).encode()
+        with open(self._path, "ab") as audit_file:
+            audit_file.write(content)
+            audit_file.flush()
+            os.fsync(audit_file.fileno())
+        self._file_size += len(content)
+
+    def _rotate(self) -> None:
+        timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        base, extension = os.path.splitext(self._path)
+        rotated_path = f"{base}-{timestamp}{extension}"
+        os.replace(self._path, rotated_path)
+        self._file_size = 0
+        if self._settings.audit_compress_rotated:
+            with open(rotated_path, "rb") as source, gzip.open(f"{rotated_path}.gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(rotated_path)
+        self._remove_old_rotations(base, extension)
+
+    def _remove_old_rotations(self, base: str, extension: str) -> None:
+        directory, prefix = os.path.split(f"{base}-")
+        rotated_files = sorted(
+            name for name in os.listdir(directory or ".")
+            if name.startswith(prefix) and (name.endswith(extension) or name.endswith(f"{extension}.gz"))
+        )
+        for name in rotated_files[:max(0, len(rotated_files) - self._settings.audit_max_rotated_files)]:
+            os.remove(os.path.join(directory, name))
+
+
+class AuditRecorder:
+    def __init__(
+            self,
+            audit_log: Optional[AuditLog] = None,
+            tenant_id: Optional[str] = None,
+            change_feed: Optional[ChangeFeed] = None
+    ):
+        self._audit_log = audit_log
+        self._tenant_id = tenant_id
+        self._change_feed = change_feed
+
+    async def record(
+            self,
+            action: str,
+            resource_type: str,
+            resource_id: Optional[str] = None,
+            **details: Any
+    ) -> None:
+        if self._change_feed is not None:
+            self._change_feed.publish_mutation(action, resource_id, details)
+        if self._audit_log is None or not self._audit_log.enabled:
+            return
+        await self._audit_log.record(AuditEventFields(
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            tenant=self._tenant_id,
+            actor=get_caller_id(),
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            details=details
+        ))
+
+
+def get_audit_log(request: Request) -> AuditLog:
+    return request.app.state.audit_log
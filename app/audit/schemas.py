@@ -0,0 +1,21 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class AuditEventFields(BaseModel):
+    timestamp: str = Field(..., description="ISO 8601 UTC time the mutation completed")
+    tenant: Optional[str] = Field(None, description="Tenant the mutation was made in, None for the default tenant")
+    actor: Optional[str] = Field(None, description="Caller that made the mutation")
+    action: str = Field(..., description="Mutation performed, e.g. 'user.delete'")
+    resource_type: str = Field(..., description="Type of the mutated resource")
+    resource_id: Optional[str] = Field(None, description="ID of the mutated resource")
+    details: Dict[str, Any] = Field(default_factory=dict, description="Action specific details")
+
+
+class AuditStatsFields(BaseModel):
+    enabled: bool = Field(..., description="Whether audit events are being written")
+    queued: int = Field(..., description="Events waiting to be written")
+    written: int = Field(..., description="Events written since startup")
+    dropped: int = Field(..., description="Events dropped because the queue was full")
+    write_failures: int = Field(..., description="Batches that could not be written")
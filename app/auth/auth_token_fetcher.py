@@ -2,6 +2,7 @@ from typing import Dict
 
 from app.auth.auth_exceptions import TokenFetcherException
 from app.config import Settings
+from app.utils.timeouts import build_timeout
 
 import httpx
 
@@ -11,6 +12,7 @@ class AuthTokenFetcher:
         self._client_id = settings.auth0_client_id
         self._client_secret = settings.auth0_client_secret
         self._auth0_url = settings.auth0_url
+        self._timeouts = settings.token_timeouts
 
     def _prepare_request_data(self) -> Dict[str, any]:
         return {
@@ -33,6 +35,7 @@ class AuthTokenFetcher:
                     url=request_data["api_url"],
                     headers=request_data["headers"],
                     json=request_data["json"],
+                    timeout=build_timeout(self._timeouts),
                 )
                 response.raise_for_status()
                 return response.json().get("access_token")
@@ -4,6 +4,7 @@ from fastapi import Request, HTTPException
 from app.auth.auth_exceptions import TokenFetcherException, TokenVerifierException
 from app.auth.auth_token_fetcher import AuthTokenFetcher
 from app.auth.auth_token_verifier import AuthTokenVerifier
+from app.tenants.tenant_context import get_tenant_services
 
 
 class AuthTokenManager:
@@ -60,4 +61,4 @@ class AuthTokenManager:
 
 
 def get_auth_manager_service(request: Request) -> AuthTokenManager:
-    return request.app.state.token_handler
+    return getattr(request.state, "token_handler", None) or get_tenant_services(request).token_handler
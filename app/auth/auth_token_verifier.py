@@ -1,4 +1,8 @@
-from authlib.jose import jwt, JoseError
+from typing import Optional
+
+from authlib.jose import jwt, JoseError, JWTClaims
+from authlib.jose.errors import DecodeError
+from authlib.jose.util import extract_header
 
 from app.auth.auth_exceptions import TokenVerifierException
 from app.auth.jwks_fetcher import JWKSClient
@@ -8,16 +12,26 @@ class AuthTokenVerifier:
     def __init__(self, jwks_client: JWKSClient):
         self._jwks_client = jwks_client
 
-    async def verify_token(self, token_cookie: str) -> None:
+    async def verify_token(
+            self,
+            token_cookie: str,
+            audience: Optional[str] = None,
+            issuer: Optional[str] = None
+    ) -> JWTClaims:
+        claims_options = {'aud': {'essential': True}}
+        if audience:
+            claims_options['aud']['value'] = audience
+        if issuer:
+            claims_options['iss'] = {'essential': True, 'value': issuer}
         try:
-            jwks = await self._jwks_client.get_jwks()
+            header = extract_header(token_cookie.split('.', 1)[0].encode(), DecodeError)
+            jwks = await self._jwks_client.get_jwks(kid=header.get('kid'))
             claims = jwt.decode(
                 token_cookie,
                 jwks,
-                claims_options={
-                    'aud': {'essential': True}
-                }
+                claims_options=claims_options
             )
             claims.validate()
-        except JoseError as e:
+            return claims
+        except (JoseError, ValueError) as e:
             raise TokenVerifierException(f"Token verification failed: {e}")
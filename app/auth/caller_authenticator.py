@@ -0,0 +1,130 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.auth.auth_exceptions import JWKSClientException, TokenVerifierException
+from app.auth.auth_token_verifier import AuthTokenVerifier
+from app.config import Settings
+from app.tenants.tenant_context import get_tenant_services
+from app.utils.request_context import set_caller_id
+
+CallerClaims = Dict[str, Any]
+
+
+class CallerAuthenticator:
+    session_token_key = "access_token"
+
+    def __init__(self, verifier_service: AuthTokenVerifier, settings: Settings):
+        self._verifier_service = verifier_service
+        self._audience = settings.caller_auth_audience
+        self._issuer = f"{settings.auth0_url}/"
+        self._max_entries = settings.caller_claims_cache_size
+        self.enabled = settings.caller_auth_enabled
+        self.enforce_permissions = settings.caller_auth_enforce_permissions
+        self._claims_cache: OrderedDict[bytes, tuple[CallerClaims, float]] = OrderedDict()
+
+    @staticmethod
+    def _hash_token(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _get_cached_claims(self, token_hash: bytes) -> Optional[CallerClaims]:
+        cached = self._claims_cache.get(token_hash)
+        if cached is None:
+            return None
+        claims, expires_at = cached
+        if expires_at <= time.time():
+            del self._claims_cache[token_hash]
+            return None
+        self._claims_cache.move_to_end(token_hash)
+        return claims
+
+    def _cache_claims(self, token_hash: bytes, claims: CallerClaims) -> None:
+        expires_at = claims.get("exp")
+        if self._max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        self._claims_cache[token_hash] = (claims, float(expires_at))
+        while len(self._claims_cache) > self._max_entries:
+            self._claims_cache.popitem(last=False)
+
+    async def authenticate(self, token: str) -> CallerClaims:
+        token_hash = self._hash_token(token)
+        claims = self._get_cached_claims(token_hash)
+        if claims is not None:
+            return claims
+        claims = dict(await self._verifier_service.verify_token(
+            token_cookie=token,
+            audience=self._audience,
+            issuer=self._issuer
+        ))
+        self._cache_claims(token_hash, claims)
+        return claims
+
+    @staticmethod
+    def get_permissions(claims: CallerClaims) -> set[str]:
+        permissions = set(claims.get("permissions") or [])
+        permissions.update((claims.get("scope") or "").split())
+        return permissions
+
+
+def get_caller_authenticator(request: Request) -> CallerAuthenticator:
+    return get_tenant_services(request).caller_authenticator
+
+
+async def authenticate_caller(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+        authenticator: CallerAuthenticator = Depends(get_caller_authenticator)
+) -> Optional[CallerClaims]:
+    if not authenticator.enabled:
+        return None
+    claims = getattr(request.state, "caller", None)
+    if claims is not None:
+        set_caller_id(claims.get("azp") or claims.get("sub"))
+        return claims
+    token = credentials.credentials if credentials else request.session.get(CallerAuthenticator.session_token_key)
+    if not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    try:
+        claims = await authenticator.authenticate(token)
+    except TokenVerifierException as e:
+        raise HTTPException(
+            status_code=401,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    except JWKSClientException:
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+    request.state.caller = claims
+    set_caller_id(claims.get("azp") or claims.get("sub"))
+    return claims
+
+
+def get_caller_subject(claims: Optional[CallerClaims] = Depends(authenticate_caller)) -> Optional[str]:
+    return claims.get("sub") if claims else None
+
+
+def require_permissions(*required_permissions: str):
+    async def check_permissions(
+            claims: Optional[CallerClaims] = Depends(authenticate_caller),
+            authenticator: CallerAuthenticator = Depends(get_caller_authenticator)
+    ) -> None:
+        if claims is None or not authenticator.enforce_permissions:
+            return
+        missing_permissions = set(required_permissions) - authenticator.get_permissions(claims)
+        if missing_permissions:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Missing permissions: {', '.join(sorted(missing_permissions))}"
+            )
+    return check_permissions
@@ -1,21 +1,57 @@
-from typing import Dict
+import asyncio
+import time
+from typing import Dict, Optional
 
 import httpx
 
 from app.auth.auth_exceptions import JWKSClientException
+from app.config import UpstreamTimeouts
+from app.utils.api_layer_exceptions import DeadlineExceededException
+from app.utils.timeouts import build_timeout
 
 
 class JWKSClient:
-    def __init__(self, auth_url: str):
+    def __init__(
+            self,
+            auth_url: str,
+            timeouts: UpstreamTimeouts = UpstreamTimeouts(),
+            cache_seconds: float = 0.0,
+            min_refresh_seconds: float = 0.0
+    ):
         self._jwks_url = f"{auth_url}/.well-known/jwks.json"
+        self._timeouts = timeouts
+        self._cache_seconds = cache_seconds
+        self._min_refresh_seconds = min_refresh_seconds
+        self._jwks: Dict | None = None
+        self._fetched_at = 0.0
+        self._refresh_lock = asyncio.Lock()
 
-    async def get_jwks(self) -> Dict:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self._jwks_url)
-                response.raise_for_status()
-                return response.json()
-        except httpx.RequestError as e:
-            raise JWKSClientException(f"Error fetching JWKS: {e}")
-        except httpx.HTTPStatusError as e:
-            raise JWKSClientException(f"JWKS request failed with status {e.response.status_code}")
\ No newline at end of file
+    def _is_fresh(self, kid: Optional[str]) -> bool:
+        if self._jwks is None:
+            return False
+        age = time.monotonic() - self._fetched_at
+        if age >= self._cache_seconds:
+            return False
+        if kid is None or age < self._min_refresh_seconds:
+            return True
+        return any(key.get('kid') == kid for key in self._jwks.get('keys', []))
+
+    async def get_jwks(self, kid: Optional[str] = None) -> Dict:
+        if self._is_fresh(kid):
+            return self._jwks
+        async with self._refresh_lock:
+            if self._is_fresh(kid):
+                return self._jwks
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(self._jwks_url, timeout=build_timeout(self._timeouts))
+                    response.raise_for_status()
+                    self._jwks = response.json()
+                    self._fetched_at = time.monotonic()
+                    return self._jwks
+            except httpx.RequestError as e:
+                raise JWKSClientException(f"Error fetching JWKS: {e}")
+            except httpx.HTTPStatusError as e:
+                raise JWKSClientException(f"JWKS request failed with status {e.response.status_code}")
+            except DeadlineExceededException as e:
+                raise JWKSClientException(f"Error fetching JWKS: {e}")
@@ -0,0 +1,105 @@
+import asyncio
+
+from fastapi import Request
+
+from app.authz.schemas import AuthorizationCheckFields, AuthorizationDecisionFields
+from app.config import Settings
+from app.organizations.organization_manager import OrganizationManager
+from app.roles.role_manager import RoleManager
+from app.tenants.tenant_context import get_tenant_services
+from app.users.user_manager import UserManager
+from app.utils.api_layer_exceptions import BaseApiException
+
+Subject = tuple[str, str | None]
+
+
+class SubjectGrants:
+    def __init__(self, roles: set[str], permissions: set[str]):
+        self.roles = roles
+        self.permissions = permissions
+
+
+class AuthzManager:
+    def __init__(
+            self,
+            settings: Settings,
+            user_manager: UserManager,
+            organization_manager: OrganizationManager,
+            role_manager: RoleManager
+    ):
+        self._settings = settings
+        self._user_manager = user_manager
+        self._organization_manager = organization_manager
+        self._role_manager = role_manager
+
+    async def _get_subject_grants(
+            self,
+            auth_token: str,
+            subject: Subject,
+            include_permissions: bool
+    ) -> SubjectGrants:
+        user_id, organization_id = subject
+        roles = await self._user_manager.get_user_roles(
+            auth_token=auth_token,
+            user_id=user_id,
+            use_cache=True
+        )
+        if organization_id:
+            roles = [*roles, *await self._organization_manager.get_user_roles_in_organization(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                user_id=user_id,
+                use_cache=True
+            )]
+        permissions = set()
+        if include_permissions:
+            permissions = {
+                permission.permission_name
+                for permission in await self._role_manager.get_effective_permissions(
+                    auth_token=auth_token,
+                    role_ids=[role.id for role in roles]
+                )
+            }
+        return SubjectGrants(
+            roles={role.id for role in roles} | {role.name for role in roles},
+            permissions=permissions
+        )
+
+    async def check(
+            self,
+            auth_token: str,
+            checks: list[AuthorizationCheckFields]
+    ) -> list[AuthorizationDecisionFields]:
+        permission_subjects = {(check.user_id, check.organization_id) for check in checks if check.permission}
+        subjects = list(dict.fromkeys((check.user_id, check.organization_id) for check in checks))
+        semaphore = asyncio.Semaphore(self._settings.authz_fetch_concurrency)
+
+        async def resolve(subject: Subject) -> SubjectGrants:
+            async with semaphore:
+                return await self._get_subject_grants(
+                    auth_token=auth_token,
+                    subject=subject,
+                    include_permissions=subject in permission_subjects
+                )
+
+        outcomes = await asyncio.gather(*(resolve(subject) for subject in subjects), return_exceptions=True)
+        grants_by_subject = {}
+        for subject, outcome in zip(subjects, outcomes):
+            if isinstance(outcome, BaseException) and not isinstance(outcome, BaseApiException):
+                raise outcome
+            grants_by_subject[subject] = outcome
+
+        decisions = []
+        for check in checks:
+            grants = grants_by_subject[(check.user_id, check.organization_id)]
+            if isinstance(grants, BaseApiException):
+                decisions.append(AuthorizationDecisionFields(allowed=False, error=str(grants)))
+            elif check.role is not None:
+                decisions.append(AuthorizationDecisionFields(allowed=check.role in grants.roles))
+            else:
+                decisions.append(AuthorizationDecisionFields(allowed=check.permission in grants.permissions))
+        return decisions
+
+
+def get_authz_manager_service(request: Request) -> AuthzManager:
+    return get_tenant_services(request).authz_manager
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.auth.auth_token_manager import get_auth_manager_service, AuthTokenManager
+from app.auth.caller_authenticator import authenticate_caller, require_permissions
+from app.authz.authz_manager import AuthzManager, get_authz_manager_service
+from app.authz.schemas import AuthorizationChecksFields, AuthorizationDecisionsFields
+from app.utils.api_layer_exceptions import BaseApiException, ServiceUnavailableException
+
+router = APIRouter(prefix="/api/v1/authz", dependencies=[Depends(authenticate_caller)])
+
+
+@router.post("/check", dependencies=[Depends(require_permissions("read:authz"))])
+async def check_authorization(
+        checks_fields: AuthorizationChecksFields,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        authz_manager_service: AuthzManager = Depends(get_authz_manager_service)
+):
+    try:
+        decisions = await authz_manager_service.check(
+            auth_token=await token_handler.token,
+            checks=checks_fields.checks
+        )
+        json_compatible_data = jsonable_encoder(AuthorizationDecisionsFields(results=decisions))
+        return JSONResponse(content=json_compatible_data)
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class AuthorizationCheckFields(BaseModel):
+    user_id: str = Field(..., description="User ID")
+    organization_id: Optional[str] = Field(default=None, description="Organization ID the check applies to")
+    role: Optional[str] = Field(default=None, description="Role ID or name the user must hold")
+    permission: Optional[str] = Field(default=None, description="Permission name the user must be granted")
+
+    @model_validator(mode='after')
+    def validate_single_requirement(self):
+        if (self.role is None) == (self.permission is None):
+            raise ValueError("Exactly one of role or permission must be provided")
+        return self
+
+
+class AuthorizationChecksFields(BaseModel):
+    checks: list[AuthorizationCheckFields] = Field(..., min_length=1, max_length=1000, description="Checks to evaluate")
+
+
+class AuthorizationDecisionFields(BaseModel):
+    allowed: bool = Field(..., description="Whether the check is satisfied")
+    error: Optional[str] = Field(default=None, description="Why the check could not be evaluated")
+
+
+class AuthorizationDecisionsFields(BaseModel):
+    results: list[AuthorizationDecisionFields] = Field(..., description="Decisions in the order of the checks")
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import quote
+
+from fastapi import Request
+from starlette.types import Message
+
+from app.batch.schemas import BatchOperationFields, BatchOperationResultFields, BatchRequestFields
+from app.config import Settings
+from app.utils.api_layer_exceptions import BadRequestException
+from app.utils.request_context import RequestContextMiddleware, get_remaining_time
+
+logger = logging.getLogger(__name__)
+
+
+class ResolvedAuthToken:
+    def __init__(self, token: str):
+        self._token = token
+
+    @property
+    async def token(self) -> str:
+        return self._token
+
+
+class PlannedOperation:
+    def __init__(self, index: int, operation: BatchOperationFields, dependencies: set[int]):
+        self.index = index
+        self.operation = operation
+        self.dependencies = dependencies
+
+    @property
+    def id(self) -> str:
+        return self.operation.id
+
+
+class BatchExecutor:
+    allowed_path_prefixes = ('/api/v1/users', '/api/v1/roles', '/api/v1/organizations')
+    forwarded_headers = (b'authorization', b'cookie')
+    reference_pattern = re.compile(r"\{\{\s*([\w-]+)((?:\.[\w-]+)*)\s*\}\}")
+
+    def __init__(self, request: Request, settings: Settings, auth_token: str):
+        self._app = request.app
+        self._parent_scope = request.scope
+        self._state = {**request.scope.get("state", {}), "token_handler": ResolvedAuthToken(auth_token)}
+        self._headers = [(name, value) for name, value in request.scope["headers"] if name in self.forwarded_headers]
+        self._settings = settings
+
+    def plan(self, batch_fields: BatchRequestFields) -> list[PlannedOperation]:
+        if len(batch_fields.operations) > self._settings.batch_max_operations:
+            raise BadRequestException(f"A batch holds at most {self._settings.batch_max_operations} operations")
+        indexes: dict[str, int] = {}
+        planned_operations = []
+        for index, operation in enumerate(batch_fields.operations):
+            operation = operation.model_copy(update={'id': operation.id or str(index)})
+            if operation.id in indexes:
+                raise BadRequestException(f"Duplicate operation ID {operation.id}")
+            if not operation.path.split('?', 1)[0].startswith(self.allowed_path_prefixes):
+                raise BadRequestException(f"Operation {operation.id} targets an unsupported path")
+            referenced_ids = set(operation.depends_on).union(
+                match.group(1) for match in self._find_references([operation.path, operation.body])
+            )
+            unknown_ids = referenced_ids.difference(indexes)
+            if unknown_ids:
+                raise BadRequestException(
+                    f"Operation {operation.id} depends on unknown or later operations: {', '.join(sorted(unknown_ids))}"
+                )
+            indexes[operation.id] = index
+            planned_operations.append(
+                PlannedOperation(index, operation, {indexes[referenced_id] for referenced_id in referenced_ids})
+            )
+        return planned_operations
+
+    def _find_references(self, value: Any) -> Iterator[re.Match]:
+        if isinstance(value, str):
+            yield from self.reference_pattern.finditer(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from self._find_references(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from self._find_references(item)
+
+    async def execute(
+            self,
+            planned_operations: list[PlannedOperation],
+            sequential: bool = False
+    ) -> AsyncIterator[tuple[int, BatchOperationResultFields]]:
+        results: dict[str, BatchOperationResultFields] = {}
+        finished = [asyncio.Event() for _ in planned_operations]
+        completed: asyncio.Queue[tuple[int, BatchOperationResultFields]] = asyncio.Queue()
+        semaphore = asyncio.Semaphore(1 if sequential else self._settings.batch_concurrency)
+
+        async def run_operation(planned: PlannedOperation) -> None:
+            waits_for = planned.dependencies | ({planned.index - 1} if sequential and planned.index else set())
+            for dependency in sorted(waits_for):
+                await finished[dependency].wait()
+            failed_ids = [
+                planned_operations[dependency].id for dependency in sorted(planned.dependencies)
+                if results[planned_operations[dependency].id].status >= 400
+            ]
+            if failed_ids:
+                result = BatchOperationResultFields(
+                    id=planned.id,
+                    status=424,
+                    body={'detail': f"Dependencies failed: {', '.join(failed_ids)}"}
+                )
+            else:
+                async with semaphore:
+                    result = await self._run(planned.operation, results)
+            results[planned.id] = result
+            finished[planned.index].set()
+            completed.put_nowait((planned.index, result))
+
+        tasks = [asyncio.create_task(run_operation(planned)) for planned in planned_operations]
+        try:
+            for _ in planned_operations:
+                yield await completed.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(
+            self,
+            operation: BatchOperationFields,
+            results: dict[str, BatchOperationResultFields]
+    ) -> BatchOperationResultFields:
+        path, _, query_string = operation.path.partition('?')
+        try:
+            path = self._substitute(path, results)
+            query_string = self._substitute(query_string, results, quote_values=True)
+            body = self._substitute(operation.body, results)
+        except LookupError as e:
+            return BatchOperationResultFields(id=operation.id, status=400, body={'detail': str(e)})
+        status, response_body = await self._dispatch(operation.method, path, query_string, body)
+        return BatchOperationResultFields(id=operation.id, status=status, body=response_body)
+
+    def _resolve_reference(self, match: re.Match, results: dict[str, BatchOperationResultFields]) -> Any:
+        value = results[match.group(1)].body
+        for key in filter(None, match.group(2).split('.')):
+            try:
+                value = value[int(key)] if isinstance(value, list) else value[key]
+            except (LookupError, TypeError, ValueError):
+                raise LookupError(f"Reference {match.group(0)} does not resolve")
+        return value
+
+    def _substitute(
+            self,
+            value: Any,
+            results: dict[str, BatchOperationResultFields],
+            quote_values: bool = False
+    ) -> Any:
+        if isinstance(value, dict):
+            return {key: self._substitute(item, results) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._substitute(item, results) for item in value]
+        if not isinstance(value, str):
+            return value
+        whole_reference = self.reference_pattern.fullmatch(value)
+        if whole_reference and not quote_values:
+            return self._resolve_reference(whole_reference, results)
+
+        def replace(match: re.Match) -> str:
+            resolved = str(self._resolve_reference(match, results))
+            return quote(resolved, safe='') if quote_values else resolved
+
+        return self.reference_pattern.sub(replace, value)
+
+    def _build_scope(self, method: str, path: str, query_string: str, content: bytes) -> dict:
+        headers = [*self._headers, (b'content-length', str(len(content)).encode())]
+        if content:
+            headers.append((b'content-type', b'application/json'))
+        remaining_time = get_remaining_time()
+        if remaining_time is not None:
+            timeout_header = RequestContextMiddleware.timeout_header.encode()
+            headers.append((timeout_header, str(max(0.001, remaining_time)).encode()))
+        return {
+            "type": "http",
+            "asgi": self._parent_scope.get("asgi", {"version": "3.0"}),
+            "http_version": self._parent_scope.get("http_version", "1.1"),
+            "scheme": self._parent_scope.get("scheme", "http"),
+            "server": self._parent_scope.get("server"),
+            "client": self._parent_scope.get("client"),
+            "root_path": "",
+            "method": method,
+            "path": path,
+            "query_string": query_string.encode(),
+            "headers": headers,
+            "state": dict(self._state),
+        }
+
+    async def _dispatch(self, method: str, path: str, query_string: str, body: Any) -> tuple[int, Any]:
+        content = json.dumps(body).encode() if body is not None else b''
+        request_sent = False
+        status = None
+        chunks: list[bytes] = []
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": content, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b''))
+
+        try:
+            await self._app(self._build_scope(method, path, query_string, content), receive, send)
+        except Exception:
+            logger.exception("Batch operation %s %s failed", method, path)
+            if status is None:
+                return 500, {'detail': "Service unavailable"}
+        response_content = b''.join(chunks)
+        if not response_content:
+            return status, None
+        try:
+            return status, json.loads(response_content)
+        except ValueError:
+            return status, response_content.decode(errors='replace')
@@ -0,0 +1,51 @@
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.auth.auth_token_manager import AuthTokenManager, get_auth_manager_service
+from app.auth.caller_authenticator import authenticate_caller
+from app.batch.batch_executor import BatchExecutor, PlannedOperation
+from app.batch.schemas import BatchRequestFields, BatchResponseFields
+from app.config import Settings, get_settings
+from app.utils.api_layer_exceptions import BadRequestException
+
+router = APIRouter(prefix="/api/v1/batch", dependencies=[Depends(authenticate_caller)])
+
+
+async def stream_batch_results(
+        batch_executor: BatchExecutor,
+        planned_operations: list[PlannedOperation],
+        sequential: bool
+) -> AsyncIterator[str]:
+    async for _, result in batch_executor.execute(planned_operations, sequential=sequential):
+        yield f"{result.model_dump_json()}\n"
+
+
+@router.post("")
+async def execute_batch(
+        request: Request,
+        batch_fields: BatchRequestFields,
+        stream: bool = Query(default=False, description="Stream results as NDJSON in completion order"),
+        settings: Settings = Depends(get_settings),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service)
+):
+    batch_executor = BatchExecutor(request=request, settings=settings, auth_token=await token_handler.token)
+    try:
+        planned_operations = batch_executor.plan(batch_fields)
+    except BadRequestException as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    if stream:
+        return StreamingResponse(
+            stream_batch_results(batch_executor, planned_operations, batch_fields.sequential),
+            media_type="application/x-ndjson"
+        )
+    results = [None] * len(planned_operations)
+    async for index, result in batch_executor.execute(planned_operations, sequential=batch_fields.sequential):
+        results[index] = result
+    json_compatible_data = jsonable_encoder(BatchResponseFields(results=results))
+    return JSONResponse(content=json_compatible_data)
@@ -0,0 +1,28 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+BatchMethod = Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+
+class BatchOperationFields(BaseModel):
+    id: Optional[str] = Field(default=None, description="Name other operations reference the operation by")
+    method: BatchMethod = Field(default='GET', description="HTTP method of the sub-request")
+    path: str = Field(..., description="Path of the sub-request including its query string")
+    body: Optional[Any] = Field(default=None, description="JSON body of the sub-request")
+    depends_on: list[str] = Field(default_factory=list, description="Operations that must succeed before this one runs")
+
+
+class BatchRequestFields(BaseModel):
+    operations: list[BatchOperationFields] = Field(..., min_length=1, description="Ordered list of sub-requests")
+    sequential: bool = Field(default=False, description="Run every operation after the previous one finished")
+
+
+class BatchOperationResultFields(BaseModel):
+    id: str = Field(..., description="ID of the operation")
+    status: int = Field(..., description="HTTP status of the sub-request")
+    body: Optional[Any] = Field(default=None, description="Response body of the sub-request")
+
+
+class BatchResponseFields(BaseModel):
+    results: list[BatchOperationResultFields] = Field(..., description="Results in the order of the operations")
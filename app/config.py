@@ -1,16 +1,132 @@
 from functools import lru_cache
+from typing import Dict, Literal, Optional
 
+from pydantic import BaseModel, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class UpstreamTimeouts(BaseModel):
+    connect: float = 5.0
+    read: float = 5.0
+    write: float = 5.0
+    pool: float = 5.0
+
+
+class TenantSettings(BaseModel):
+    auth0_url: str
+    auth0_client_id: str
+    auth0_client_secret: str
+    caller_auth_audience: Optional[str] = None
+    log_stream_secret: Optional[str] = None
+
+
 class Settings(BaseSettings):
     secret_key: str
     auth0_url: str
     auth0_client_id: str
     auth0_client_secret: str
 
+    circuit_breaker_failure_ratio: float = 0.5
+    circuit_breaker_minimum_calls: int = 10
+    circuit_breaker_window_size: int = 20
+    circuit_breaker_slow_call_seconds: float = 5.0
+    circuit_breaker_open_seconds: float = 30.0
+    stale_cache_max_entries: int = 256
+
+    request_timeout_seconds: Optional[float] = 30.0
+    request_timeout_max_seconds: float = 120.0
+    route_request_timeouts: Dict[str, Optional[float]] = {}
+    upstream_timeouts: Dict[str, UpstreamTimeouts] = {
+        "crud": UpstreamTimeouts(connect=3.0, read=10.0, write=10.0, pool=5.0),
+        "search": UpstreamTimeouts(connect=3.0, read=20.0, write=5.0, pool=5.0),
+    }
+    token_timeouts: UpstreamTimeouts = UpstreamTimeouts()
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    passthrough_validation: bool = False
+    passthrough_cache_max_bytes: int = 256 * 1024
+
+    admission_rate_per_second: Optional[float] = 50.0
+    admission_burst: float = 50.0
+    admission_default_weight: float = 1.0
+    admission_caller_weights: Dict[str, float] = {}
+    admission_max_queue_per_caller: int = 20
+    admission_max_wait_seconds: float = 2.0
+    admission_active_caller_seconds: float = 10.0
+
+    jwks_cache_seconds: float = 600.0
+    jwks_min_refresh_seconds: float = 30.0
+    caller_auth_enabled: bool = True
+    caller_auth_audience: Optional[str] = None
+    caller_auth_enforce_permissions: bool = True
+    caller_claims_cache_size: int = 10_000
+
+    mutation_batch_window_ms: float = 0.0
+    mutation_batch_max_items: int = 10
+    mutation_concurrency: int = 4
+
+    negative_cache_ttl_seconds: float = 30.0
+    negative_cache_max_entries: int = 10_000
+
+    user_batch_get_chunk_size: int = 50
+    user_batch_get_concurrency: int = 4
+
+    role_catalogue_refresh_seconds: float = 300.0
+    organization_catalogue_refresh_seconds: float = 300.0
+    catalogue_min_refresh_seconds: float = 5.0
+    role_permissions_cache_ttl_seconds: float = 600.0
+    role_permissions_cache_max_entries: int = 10_000
+    role_permissions_concurrency: int = 4
+    user_roles_cache_ttl_seconds: float = 60.0
+    user_roles_cache_max_entries: int = 10_000
+    authz_fetch_concurrency: int = 8
+
+    log_stream_secret: Optional[str] = None
+
+    job_workers: int = 4
+    job_queue_max_size: int = 1_000
+    job_store_max_entries: int = 1_000
+
+    tenants: Dict[str, TenantSettings] = {}
+    tenant_header: str = "x-tenant"
+    tenant_path_prefix: str = "/tenants"
+    tenant_idle_seconds: float = 900.0
+
+    change_feed_max_events: int = 10_000
+    change_feed_heartbeat_seconds: float = 15.0
+    change_feed_log_poll_seconds: float = 30.0
+    change_feed_log_batch_size: int = 100
+    change_feed_seen_log_ids_max_entries: int = 10_000
+
+    batch_max_operations: int = 100
+    batch_concurrency: int = 8
+
+    audit_log_path: Optional[str] = None
+    audit_queue_max_size: int = 10_000
+    audit_batch_max_events: int = 500
+    audit_flush_interval_seconds: float = 1.0
+    audit_max_file_bytes: int = 50 * 1024 * 1024
+    audit_max_rotated_files: int = 20
+    audit_compress_rotated: bool = False
+    audit_overflow_policy: Literal["drop", "block"] = "drop"
+    audit_block_seconds: float = 0.05
+
+    admin_token: Optional[str] = None
+    profiling_sample_interval_ms: float = 5.0
+    profile_store_max_entries: int = 20
+    tracemalloc_max_snapshots: int = 10
+
     model_config = SettingsConfigDict(env_file="../../.env")
 
+    @model_validator(mode="after")
+    def require_caller_audience(self) -> "Settings":
+        if self.caller_auth_enabled and not self.caller_auth_audience:
+            raise ValueError("caller_auth_audience is required when caller_auth_enabled is true")
+        return self
+
+    def for_tenant(self, tenant_id: str) -> "Settings":
+        return self.model_copy(update=self.tenants[tenant_id].model_dump(exclude_none=True))
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.auth.auth_token_manager import AuthTokenManager
+from app.config import Settings
+from app.events.log_stream_processor import LogStreamProcessor
+from app.events.logs_api_layer import LogsApiLayer
+from app.utils.admission_control import AdmissionController
+from app.utils.request_context import BACKGROUND_CALLER_ID, new_background_context
+
+logger = logging.getLogger(__name__)
+
+
+class Auth0LogTailer:
+    def __init__(
+            self,
+            settings: Settings,
+            log_stream_processor: LogStreamProcessor,
+            admission_controller: Optional[AdmissionController] = None
+    ):
+        self._settings = settings
+        self._api_layer = LogsApiLayer(
+            auth_url=self._settings.auth0_url,
+            settings=self._settings,
+            admission_controller=admission_controller
+        )
+        self._log_stream_processor = log_stream_processor
+        self._last_log_id: Optional[str] = None
+        self._poll_task: Optional[asyncio.Task] = None
+
+    async def _find_latest_log_id(self, auth_token: str) -> Optional[str]:
+        latest_logs = await self._api_layer.make_request(
+            method="GET",
+            endpoint='/logs',
+            auth_token=auth_token,
+            params={'page': 0, 'per_page': 1, 'sort': 'date:-1'},
+        )
+        return latest_logs[0].get('log_id') if latest_logs else None
+
+    async def poll(self, auth_token: str) -> int:
+        if self._last_log_id is None:
+            self._last_log_id = await self._find_latest_log_id(auth_token)
+            return 0
+        take = self._settings.change_feed_log_batch_size
+        processed_logs = 0
+        while True:
+            logs = await self._api_layer.make_request(
+                method="GET",
+                endpoint='/logs',
+                auth_token=auth_token,
+                params={'from': self._last_log_id, 'take': take},
+            ) or []
+            if logs:
+                self._log_stream_processor.process(logs)
+                self._last_log_id = logs[-1].get('log_id', self._last_log_id)
+                processed_logs += len(logs)
+            if len(logs) < take:
+                return processed_logs
+
+    async def _poll_periodically(self, token_handler: AuthTokenManager) -> None:
+        while True:
+            try:
+                await self.poll(await token_handler.token)
+            except Exception:
+                logger.exception("Tailing Auth0 logs failed")
+            await asyncio.sleep(self._settings.change_feed_log_poll_seconds)
+
+    def start(self, token_handler: AuthTokenManager) -> None:
+        if self._poll_task is None and self._settings.change_feed_log_poll_seconds > 0:
+            self._poll_task = asyncio.create_task(
+                self._poll_periodically(token_handler),
+                context=new_background_context(caller_id=BACKGROUND_CALLER_ID)
+            )
+
+    async def close(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        await self._api_layer.close()
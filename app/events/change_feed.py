@@ -0,0 +1,113 @@
+import asyncio
+import datetime
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Optional, Union
+
+from fastapi import Request
+
+from app.events.schemas import ChangeEventFields, ChangeFeedResetFields, DirectoryChangeFields
+from app.tenants.tenant_context import get_tenant_services
+
+ChangeFeedItem = Union[ChangeEventFields, ChangeFeedResetFields, None]
+
+
+class ChangeFeed:
+    mutation_changes = {
+        'user.create': ('user', 'created'),
+        'user.update': ('user', 'updated'),
+        'user.delete': ('user', 'deleted'),
+        'user.roles.assign': ('user_roles', 'updated'),
+        'user.roles.delete': ('user_roles', 'updated'),
+        'role.create': ('role', 'created'),
+        'role.update': ('role', 'updated'),
+        'role.delete': ('role', 'deleted'),
+        'organization.create': ('organization', 'created'),
+        'organization.update': ('organization', 'updated'),
+        'organization.delete': ('organization', 'deleted'),
+        'organization.members.add': ('organization_members', 'updated'),
+        'organization.members.delete': ('organization_members', 'updated'),
+        'organization.member.roles.assign': ('organization_member_roles', 'updated'),
+        'organization.member.roles.delete': ('organization_member_roles', 'updated'),
+    }
+
+    def __init__(self, max_events: int):
+        self._epoch = uuid.uuid4().hex[:12]
+        self._events: deque[tuple[int, ChangeEventFields]] = deque(maxlen=max_events)
+        self._last_sequence = 0
+        self._published = asyncio.Event()
+
+    def _cursor(self, sequence: int) -> str:
+        return f"{self._epoch}-{sequence}"
+
+    def _parse_cursor(self, cursor: str) -> Optional[int]:
+        epoch, _, sequence = cursor.rpartition('-')
+        if epoch != self._epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    @property
+    def cursor(self) -> str:
+        return self._cursor(self._last_sequence)
+
+    def publish(self, change: DirectoryChangeFields, source: str = 'mutation') -> ChangeEventFields:
+        self._last_sequence += 1
+        event = ChangeEventFields(
+            **change.model_dump(),
+            cursor=self._cursor(self._last_sequence),
+            occurred_at=datetime.datetime.now(datetime.timezone.utc),
+            source=source
+        )
+        self._events.append((self._last_sequence, event))
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+        return event
+
+    def publish_mutation(self, action: str, resource_id: Optional[str], details: dict[str, Any]) -> None:
+        resource = self.mutation_changes.get(action)
+        if resource is None or not resource_id:
+            return
+        resource_type, change_action = resource
+        user_ids = details.get('members') or ([details['user_id']] if details.get('user_id') else [])
+        self.publish(DirectoryChangeFields(
+            resource_type=resource_type,
+            action=change_action,
+            resource_id=resource_id,
+            user_ids=user_ids
+        ))
+
+    def _is_retained(self, sequence: int) -> bool:
+        oldest_sequence = self._events[0][0] if self._events else self._last_sequence + 1
+        return oldest_sequence - 1 <= sequence <= self._last_sequence
+
+    async def subscribe(
+            self,
+            cursor: Optional[str] = None,
+            heartbeat_seconds: Optional[float] = None
+    ) -> AsyncIterator[ChangeFeedItem]:
+        sequence = self._last_sequence if cursor is None else self._parse_cursor(cursor)
+        if sequence is None or not self._is_retained(sequence):
+            yield ChangeFeedResetFields(cursor=self.cursor, detail="Cursor is unknown or has expired")
+            sequence = self._last_sequence
+        while True:
+            if not self._is_retained(sequence):
+                yield ChangeFeedResetFields(cursor=self.cursor, detail="Subscriber fell behind the change feed")
+                sequence = self._last_sequence
+            published = self._published
+            if sequence < self._last_sequence:
+                start = sequence + 1 - self._events[0][0]
+                pending_events = list(islice(self._events, start, None))
+                for event_sequence, event in pending_events:
+                    yield event
+                    sequence = event_sequence
+                continue
+            try:
+                async with asyncio.timeout(heartbeat_seconds):
+                    await published.wait()
+            except TimeoutError:
+                yield None
+
+
+def get_change_feed_service(request: Request) -> ChangeFeed:
+    return get_tenant_services(request).change_feed
@@ -0,0 +1,166 @@
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import unquote, urlsplit
+
+from fastapi import Request
+
+from app.events.change_feed import ChangeFeed
+from app.events.schemas import DirectoryChangeFields
+from app.organizations.organization_manager import OrganizationManager
+from app.roles.role_manager import RoleManager
+from app.tenants.tenant_context import get_tenant_services
+from app.users.user_manager import UserManager
+
+
+class LogStreamProcessor:
+    api_path_prefix = '/api/v2/'
+    method_actions = {'POST': 'created', 'PATCH': 'updated', 'PUT': 'updated', 'DELETE': 'deleted'}
+    user_event_actions = {
+        'ss': 'created',
+        'sdu': 'deleted',
+        'scp': 'updated',
+        'sce': 'updated',
+        'scu': 'updated',
+        'sv': 'updated',
+    }
+
+    def __init__(
+            self,
+            user_manager: UserManager,
+            organization_manager: OrganizationManager,
+            role_manager: RoleManager,
+            change_feed: Optional[ChangeFeed] = None,
+            own_client_id: Optional[str] = None,
+            seen_log_ids_max_entries: int = 10_000
+    ):
+        self._user_manager = user_manager
+        self._organization_manager = organization_manager
+        self._role_manager = role_manager
+        self._change_feed = change_feed
+        self._own_client_id = own_client_id
+        self._seen_log_ids: OrderedDict[str, None] = OrderedDict()
+        self._seen_log_ids_max_entries = seen_log_ids_max_entries
+
+    @staticmethod
+    def parse_payload(body: bytes) -> list[Dict[str, Any]]:
+        text = body.decode().strip()
+        if not text:
+            return []
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError:
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        return payload if isinstance(payload, list) else [payload]
+
+    def to_changes(self, event: Dict[str, Any]) -> list[DirectoryChangeFields]:
+        data = event.get('data', event)
+        event_type = data.get('type')
+        if event_type == 'sapi':
+            return self._api_operation_to_changes(data.get('details') or {})
+        action = self.user_event_actions.get(event_type)
+        if action and data.get('user_id'):
+            return [DirectoryChangeFields(resource_type='user', action=action, resource_id=data['user_id'])]
+        return []
+
+    def _api_operation_to_changes(self, details: Dict[str, Any]) -> list[DirectoryChangeFields]:
+        request = details.get('request') or {}
+        action = self.method_actions.get((request.get('method') or '').upper())
+        path = urlsplit(request.get('path') or '').path
+        if action is None or not path.startswith(self.api_path_prefix):
+            return []
+        segments = [unquote(segment) for segment in path[len(self.api_path_prefix):].strip('/').split('/')]
+        request_body = request.get('body') if isinstance(request.get('body'), dict) else {}
+        response_body = (details.get('response') or {}).get('body')
+        response_body = response_body if isinstance(response_body, dict) else {}
+
+        match segments:
+            case ['users']:
+                changes = [('user', response_body.get('user_id'), [])]
+            case ['users', user_id]:
+                changes = [('user', user_id, [])]
+            case ['users', user_id, 'roles']:
+                changes = [('user_roles', user_id, [])]
+            case ['roles']:
+                changes = [('role', response_body.get('id'), [])]
+            case ['roles', role_id]:
+                changes = [('role', role_id, [])]
+            case ['roles', role_id, 'permissions']:
+                changes = [('role_permissions', role_id, [])]
+            case ['roles', role_id, 'users']:
+                changes = [('role_users', role_id, request_body.get('users') or [])]
+            case ['organizations']:
+                changes = [('organization', response_body.get('id'), [])]
+            case ['organizations', organization_id]:
+                changes = [('organization', organization_id, [])]
+            case ['organizations', organization_id, 'members']:
+                changes = [('organization_members', organization_id, request_body.get('members') or [])]
+            case ['organizations', organization_id, 'members', user_id, 'roles']:
+                changes = [('organization_member_roles', organization_id, [user_id])]
+            case _:
+                changes = []
+        return [
+            DirectoryChangeFields(
+                resource_type=resource_type,
+                action=action,
+                resource_id=resource_id,
+                user_ids=user_ids
+            )
+            for resource_type, resource_id, user_ids in changes
+            if resource_id
+        ]
+
+    def apply(self, change: DirectoryChangeFields) -> None:
+        deleted = change.action == 'deleted'
+        match change.resource_type:
+            case 'user':
+                self._user_manager.invalidate_user(change.resource_id, deleted=deleted)
+                if deleted:
+                    self._organization_manager.invalidate_user_memberships(change.resource_id)
+            case 'user_roles':
+                self._user_manager.invalidate_user_roles(change.resource_id)
+            case 'role':
+                self._role_manager.invalidate_role(change.resource_id, deleted=deleted)
+            case 'role_permissions':
+                self._role_manager.invalidate_role_permissions(change.resource_id)
+            case 'role_users':
+                for user_id in change.user_ids:
+                    self._user_manager.invalidate_user_roles(user_id)
+            case 'organization':
+                self._organization_manager.invalidate_organization(change.resource_id, deleted=deleted)
+            case 'organization_members' | 'organization_member_roles':
+                for user_id in change.user_ids:
+                    self._organization_manager.invalidate_member(change.resource_id, user_id)
+
+    def _is_own_event(self, event: Dict[str, Any]) -> bool:
+        return self._own_client_id is not None and event.get('data', event).get('client_id') == self._own_client_id
+
+    def _is_duplicate(self, event: Dict[str, Any]) -> bool:
+        log_id = event.get('log_id') or event.get('data', event).get('log_id')
+        if not log_id:
+            return False
+        if log_id in self._seen_log_ids:
+            self._seen_log_ids.move_to_end(log_id)
+            return True
+        self._seen_log_ids[log_id] = None
+        while len(self._seen_log_ids) > self._seen_log_ids_max_entries:
+            self._seen_log_ids.popitem(last=False)
+        return False
+
+    def process(self, events: list[Dict[str, Any]]) -> list[DirectoryChangeFields]:
+        changes = []
+        for event in events:
+            if not isinstance(event, dict) or self._is_duplicate(event):
+                continue
+            event_changes = self.to_changes(event)
+            for change in event_changes:
+                self.apply(change)
+            if self._change_feed is not None and not self._is_own_event(event):
+                for change in event_changes:
+                    self._change_feed.publish(change, source='auth0_log')
+            changes.extend(event_changes)
+        return changes
+
+
+def get_log_stream_processor_service(request: Request) -> LogStreamProcessor:
+    return get_tenant_services(request).log_stream_processor
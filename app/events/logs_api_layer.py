@@ -0,0 +1,14 @@
+from typing import Any, Dict, Hashable, Optional
+
+from app.config import Settings
+from app.utils.admission_control import AdmissionController
+from app.utils.api_handler import BaseApiLayer
+
+
+class LogsApiLayer(BaseApiLayer):
+    def __init__(self, auth_url: str, settings: Settings, admission_controller: Optional[AdmissionController] = None):
+        super().__init__(auth_url=auth_url, settings=settings, admission_controller=admission_controller)
+
+    @staticmethod
+    def _get_cache_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Hashable | None:
+        return None
@@ -0,0 +1,104 @@
+import hmac
+import json
+from typing import AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.auth.caller_authenticator import authenticate_caller, require_permissions
+from app.config import Settings, get_settings
+from app.events.change_feed import ChangeFeed, ChangeFeedItem, get_change_feed_service
+from app.events.log_stream_processor import LogStreamProcessor, get_log_stream_processor_service
+from app.events.schemas import ChangeEventFields, LogStreamIngestionFields
+from app.tenants.tenant_context import get_tenant_settings
+
+router = APIRouter(prefix="/api/v1/events")
+changes_router = APIRouter(prefix="/api/v1/changes", dependencies=[Depends(authenticate_caller)])
+
+
+def verify_log_stream_secret(request: Request, settings: Settings = Depends(get_tenant_settings)) -> None:
+    if not settings.log_stream_secret:
+        raise HTTPException(
+            status_code=404,
+            detail="Log stream ingestion is not configured"
+        )
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        authorization = authorization[len("Bearer "):]
+    if not hmac.compare_digest(authorization.encode(), settings.log_stream_secret.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid log stream secret"
+        )
+
+
+@router.post("/auth0-log-stream", dependencies=[Depends(verify_log_stream_secret)])
+async def ingest_auth0_log_stream(
+        request: Request,
+        log_stream_processor_service: LogStreamProcessor = Depends(get_log_stream_processor_service)
+):
+    try:
+        events = log_stream_processor_service.parse_payload(await request.body())
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid log stream payload: {e}"
+        )
+    changes = log_stream_processor_service.process(events)
+    json_compatible_data = jsonable_encoder(LogStreamIngestionFields(events=len(events), changes=len(changes)))
+    return JSONResponse(content=json_compatible_data)
+
+
+def format_sse(item: ChangeFeedItem) -> str:
+    if item is None:
+        return ": keep-alive\n\n"
+    if isinstance(item, ChangeEventFields):
+        return f"id: {item.cursor}\nevent: change\ndata: {item.model_dump_json()}\n\n"
+    return f"id: {item.cursor}\nevent: reset\ndata: {item.model_dump_json()}\n\n"
+
+
+def format_ndjson(item: ChangeFeedItem) -> str:
+    if item is None:
+        return "\n"
+    event_type = "change" if isinstance(item, ChangeEventFields) else "reset"
+    return f'{{"event": "{event_type}", "data": {item.model_dump_json()}}}\n'
+
+
+async def stream_changes(
+        change_feed: ChangeFeed,
+        cursor: Optional[str],
+        resource_types: Optional[list[str]],
+        heartbeat_seconds: float,
+        stream_format: Literal['sse', 'ndjson']
+) -> AsyncIterator[str]:
+    format_item = format_sse if stream_format == 'sse' else format_ndjson
+    async for item in change_feed.subscribe(cursor=cursor, heartbeat_seconds=heartbeat_seconds):
+        if resource_types and isinstance(item, ChangeEventFields) and item.resource_type not in resource_types:
+            continue
+        yield format_item(item)
+
+
+@changes_router.get("", dependencies=[Depends(require_permissions("read:changes"))])
+async def get_changes(
+        accept: str = Header(default=""),
+        last_event_id: Optional[str] = Header(default=None),
+        cursor: Optional[str] = Query(default=None, description="Resume after this cursor, defaults to Last-Event-ID"),
+        resource_type: Optional[list[str]] = Query(default=None, description="Only stream these resource types"),
+        stream_format: Optional[Literal['sse', 'ndjson']] = Query(default=None, alias="format"),
+        settings: Settings = Depends(get_settings),
+        change_feed_service: ChangeFeed = Depends(get_change_feed_service)
+):
+    if stream_format is None:
+        stream_format = 'ndjson' if 'application/x-ndjson' in accept else 'sse'
+    return StreamingResponse(
+        stream_changes(
+            change_feed=change_feed_service,
+            cursor=cursor or last_event_id,
+            resource_types=resource_type,
+            heartbeat_seconds=settings.change_feed_heartbeat_seconds,
+            stream_format=stream_format
+        ),
+        media_type="text/event-stream" if stream_format == 'sse' else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class DirectoryChangeFields(BaseModel):
+    resource_type: Literal[
+        'user',
+        'user_roles',
+        'role',
+        'role_permissions',
+        'role_users',
+        'organization',
+        'organization_members',
+        'organization_member_roles',
+    ] = Field(..., description="Kind of resource or relation that changed")
+    action: Literal['created', 'updated', 'deleted'] = Field(..., description="What happened to the resource")
+    resource_id: str = Field(..., description="ID of the user, role or organization that changed")
+    user_ids: list[str] = Field(default_factory=list, description="Users affected by a relation change")
+
+
+class LogStreamIngestionFields(BaseModel):
+    events: int = Field(..., description="Number of log events received")
+    changes: int = Field(..., description="Number of directory changes applied")
+
+
+class ChangeEventFields(DirectoryChangeFields):
+    cursor: str = Field(..., description="Cursor to resume the change feed after this event")
+    occurred_at: datetime = Field(..., description="Time the change was published")
+    source: Literal['mutation', 'auth0_log'] = Field(..., description="Whether the change was made through this "
+                                                                      "service or observed in the Auth0 logs")
+
+
+class ChangeFeedResetFields(BaseModel):
+    cursor: str = Field(..., description="Cursor to resume the change feed from")
+    detail: str = Field(..., description="Why changes may have been missed")
@@ -0,0 +1,194 @@
+import asyncio
+import contextvars
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+from app.config import Settings
+from app.jobs.schemas import JobFields, JobProgressFields, JobStatus
+from app.tenants.tenant_context import hold_current_tenant
+from app.utils.admission_control import RateLimitedException
+from app.utils.api_layer_exceptions import BaseApiException, NotFoundException, ServiceUnavailableException
+from app.utils.request_context import get_caller_id, new_background_context
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, int, int], None]
+JobOperation = Callable[[ProgressCallback], Awaitable[Any]]
+
+
+class Job:
+    finished_statuses = ('succeeded', 'failed', 'cancelled')
+
+    def __init__(
+            self,
+            operation_name: str,
+            operation: JobOperation,
+            owner: Optional[str] = None,
+            caller_id: Optional[str] = None,
+            release_tenant: Callable[[], None] = lambda: None
+    ):
+        self.id = uuid.uuid4().hex
+        self.operation_name = operation_name
+        self.owner = owner
+        self.caller_id = caller_id
+        self.status: JobStatus = 'queued'
+        self.progress: dict[str, JobProgressFields] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._operation = operation
+        self._release_tenant = release_tenant
+        self._task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in self.finished_statuses
+
+    def report_progress(self, stage: str, completed: int, total: int) -> None:
+        self.progress[stage] = JobProgressFields(completed=completed, total=total)
+        self._notify()
+
+    def to_fields(self) -> JobFields:
+        return JobFields(
+            id=self.id,
+            operation=self.operation_name,
+            status=self.status,
+            progress=dict(self.progress),
+            result=self.result,
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+    async def watch(self) -> AsyncIterator[JobFields]:
+        while True:
+            changed = self._changed
+            yield self.to_fields()
+            if self.finished:
+                return
+            await changed.wait()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _finish(self, status: JobStatus, result: Any = None, error: Optional[str] = None) -> None:
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = datetime.now(timezone.utc)
+        self._release_tenant()
+        self._notify()
+
+    def cancel(self) -> None:
+        if self.finished:
+            return
+        if self._task is not None:
+            self._task.cancel()
+        else:
+            self._finish('cancelled')
+
+    async def run(self) -> None:
+        if self.finished:
+            return
+        self.status = 'running'
+        self.started_at = datetime.now(timezone.utc)
+        self._notify()
+        self._task = asyncio.create_task(
+            self._operation(self.report_progress),
+            context=new_background_context(caller_id=self.caller_id)
+        )
+        try:
+            result = await self._task
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise
+            self._finish('cancelled')
+        except (BaseApiException, RateLimitedException) as e:
+            self._finish('failed', error=str(e) or type(e).__name__)
+        except Exception:
+            logger.exception("Job %s (%s) failed", self.id, self.operation_name)
+            self._finish('failed', error="Internal error")
+        else:
+            self._finish('succeeded', result=jsonable_encoder(result))
+
+
+class JobManager:
+    def __init__(self, settings: Settings):
+        self._settings = settings
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=settings.job_queue_max_size)
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._work(), context=contextvars.Context())
+            for _ in range(self._settings.job_workers)
+        ]
+
+    async def close(self) -> None:
+        for job in self._jobs.values():
+            job.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await job.run()
+            finally:
+                self._queue.task_done()
+
+    def submit(self, operation_name: str, operation: JobOperation, owner: Optional[str] = None) -> Job:
+        job = Job(
+            operation_name=operation_name,
+            operation=operation,
+            owner=owner,
+            caller_id=get_caller_id(),
+            release_tenant=hold_current_tenant()
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            job.cancel()
+            raise ServiceUnavailableException("Job queue is full")
+        self._jobs[job.id] = job
+        self._evict_finished_jobs()
+        return job
+
+    def _evict_finished_jobs(self) -> None:
+        overflow = len(self._jobs) - self._settings.job_store_max_entries
+        if overflow <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:overflow]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None or (job.owner is not None and job.owner != owner):
+            raise NotFoundException(f"Job {job_id} not found")
+        return job
+
+    def cancel(self, job_id: str, owner: Optional[str] = None) -> Job:
+        job = self.get(job_id, owner=owner)
+        job.cancel()
+        return job
+
+
+def get_job_manager_service(request: Request) -> JobManager:
+    return request.app.state.job_manager
@@ -0,0 +1,78 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.auth.caller_authenticator import authenticate_caller, get_caller_subject
+from app.jobs.job_manager import Job, JobManager, get_job_manager_service
+from app.utils.api_layer_exceptions import NotFoundException
+
+router = APIRouter(prefix="/api/v1/jobs", dependencies=[Depends(authenticate_caller)])
+
+
+def job_accepted_response(job: Job) -> JSONResponse:
+    return JSONResponse(
+        content=jsonable_encoder(job.to_fields()),
+        status_code=202,
+        headers={"Location": f"{router.prefix}/{job.id}"}
+    )
+
+
+async def stream_job_events(job: Job) -> AsyncIterator[str]:
+    async for job_fields in job.watch():
+        yield f"event: {job_fields.status}\ndata: {job_fields.model_dump_json()}\n\n"
+
+
+@router.get("/{job_id}")
+async def get_job(
+        job_id: str,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        job = job_manager_service.get(job_id, owner=caller_subject)
+        json_compatible_data = jsonable_encoder(job.to_fields())
+        return JSONResponse(content=json_compatible_data)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@router.get("/{job_id}/events")
+async def stream_job(
+        job_id: str,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        job = job_manager_service.get(job_id, owner=caller_subject)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    return StreamingResponse(
+        stream_job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(
+        job_id: str,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        job = job_manager_service.cancel(job_id, owner=caller_subject)
+        json_compatible_data = jsonable_encoder(job.to_fields())
+        return JSONResponse(content=json_compatible_data, status_code=202)
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
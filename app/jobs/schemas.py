@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+JobStatus = Literal['queued', 'running', 'succeeded', 'failed', 'cancelled']
+
+
+class JobProgressFields(BaseModel):
+    completed: int = Field(..., description="Number of completed units of the stage")
+    total: int = Field(..., description="Total number of units of the stage")
+
+
+class JobFields(BaseModel):
+    id: str = Field(..., description="Unique job ID")
+    operation: str = Field(..., description="Name of the operation the job runs")
+    status: JobStatus = Field(..., description="Current status of the job")
+    progress: dict[str, JobProgressFields] = Field(default_factory=dict, description="Progress per stage")
+    result: Optional[Any] = Field(default=None, description="Result of a succeeded job")
+    error: Optional[str] = Field(default=None, description="Error of a failed job")
+    created_at: datetime = Field(..., description="Time the job was submitted")
+    started_at: Optional[datetime] = Field(default=None, description="Time a worker started the job")
+    finished_at: Optional[datetime] = Field(default=None, description="Time the job finished")
@@ -1,16 +1,25 @@
-from fastapi import FastAPI
+import math
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.auth.auth_token_fetcher import AuthTokenFetcher
-from app.auth.auth_token_manager import AuthTokenManager
-from app.auth.auth_token_verifier import AuthTokenVerifier
-from app.auth.jwks_fetcher import JWKSClient
+from app.admin.profiler import AllocationTracker, ProfileStore, ProfilingMiddleware
+from app.admin.routers import router as admin_router
+from app.audit.audit_log import AuditLog
+from app.authz.routers import router as authz_router
+from app.batch.routers import router as batch_router
 from app.config import get_settings
-from app.roles.role_manager import RoleManager
-from app.users.user_manager import UserManager
+from app.events.routers import router as events_router, changes_router
+from app.jobs.job_manager import JobManager
+from app.jobs.routers import router as jobs_router
+from app.tenants.tenant_middleware import TenantMiddleware
+from app.tenants.tenant_registry import TenantRegistry
+from app.tenants.tenant_services import TenantServices
+from app.utils.admission_control import RateLimitedException
+from app.utils.request_context import RequestContextMiddleware
 from app.users.routers import router as user_router
 from app.organizations.routers import router as organization_router
-from app.organizations.organization_manager import OrganizationManager
 from app.roles.routers import router as role_router
 
 
@@ -24,30 +33,54 @@ app.add_middleware(
     session_cookie="fastapi_session",
     max_age=3600,
 )
+app.add_middleware(RequestContextMiddleware, settings=settings)
+
+profile_store = ProfileStore(max_entries=settings.profile_store_max_entries)
+app.state.profile_store = profile_store
+app.state.allocation_tracker = AllocationTracker(max_snapshots=settings.tracemalloc_max_snapshots)
+app.add_middleware(ProfilingMiddleware, settings=settings, profile_store=profile_store)
+
+audit_log = AuditLog(settings=settings)
+app.state.audit_log = audit_log
+tenant_registry = TenantRegistry(settings=settings, audit_log=audit_log)
+app.add_middleware(TenantMiddleware, settings=settings, registry=tenant_registry)
+
+
+@app.exception_handler(RateLimitedException)
+async def rate_limited_handler(request: Request, exc: RateLimitedException):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 
 @app.on_event("startup")
 async def startup():
-    user_manager = UserManager(
-        settings=settings,
-    )
-    organization_manager = OrganizationManager(
-        settings=settings,
-    )
-    role_manager = RoleManager(
-        settings=settings,
+    audit_log.start()
+    app.state.tenant_services = await TenantServices.create(settings, audit_log=audit_log)
+    job_manager = JobManager(
+        settings=settings
     )
-    token_handler = await AuthTokenManager.create(
-        fetcher_service=AuthTokenFetcher(settings=settings),
-        verifier_service=AuthTokenVerifier(
-            JWKSClient(auth_url=settings.auth0_url)
-        )
-    )
-    app.state.user_manager = user_manager
-    app.state.organization_manager = organization_manager
-    app.state.role_manager = role_manager
-    app.state.token_handler = token_handler
+    job_manager.start()
+    app.state.job_manager = job_manager
+    tenant_registry.start_idle_eviction()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.job_manager.close()
+    await tenant_registry.close()
+    await app.state.tenant_services.close()
+    await audit_log.close()
 
 app.include_router(user_router)
 app.include_router(organization_router)
 app.include_router(role_router)
+app.include_router(authz_router)
+app.include_router(events_router)
+app.include_router(changes_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
+app.include_router(admin_router)
 
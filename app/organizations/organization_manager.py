@@ -1,18 +1,92 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
 from fastapi import Request
 
+from app.audit.audit_log import AuditRecorder
+from app.auth.auth_token_manager import AuthTokenManager
 from app.organizations.organization_manager_api_layer import OrganizationManagerApiLayer
 from app.organizations.schemas import SortParameters, OrganizationFields, UpdateOrganizationFields, \
-    CreateOrganizationFields, AddDeleteMembersFields
+    CreateOrganizationFields, AddDeleteMembersFields, DesiredMembersFields, MembersReconciliationFields, \
+    ProvisionOrganizationFields, ProvisionMemberFields, ProvisioningReportFields
 from app.config import Settings
-from app.roles.schemas import RoleFields, UserRolesFields
+from app.tenants.tenant_context import get_tenant_services
+from app.utils.admission_control import AdmissionController
+from app.roles.schemas import RoleFields, UserRolesFields, DesiredRolesFields, RolesReconciliationFields
+from app.utils.api_layer_exceptions import BaseApiException, NotFoundException
+from app.utils.iterables import chunked
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.negative_cache import NegativeCache
+from app.utils.request_context import get_caller_id, new_background_context
+from app.utils.resource_catalogue import ResourceCatalogue
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 
 class OrganizationManager:
-    def __init__(self, settings: Settings):
+    name_reference_prefix = "name:"
+
+    def __init__(
+            self,
+            settings: Settings,
+            admission_controller: Optional[AdmissionController] = None,
+            audit_recorder: Optional[AuditRecorder] = None
+    ):
         self._settings = settings
+        self._audit = audit_recorder or AuditRecorder()
         self._api_layer = OrganizationManagerApiLayer(
-            auth_url=self._settings.auth0_url
+            auth_url=self._settings.auth0_url,
+            settings=self._settings,
+            admission_controller=admission_controller
+        )
+        self._member_addition_batcher = MicroBatcher(
+            flush=self._add_users_to_organization_upstream,
+            window_seconds=self._settings.mutation_batch_window_ms / 1000,
+            max_items=self._settings.mutation_batch_max_items
+        )
+        self._missing_organizations = NegativeCache(
+            resource_name="organization",
+            ttl_seconds=self._settings.negative_cache_ttl_seconds,
+            max_entries=self._settings.negative_cache_max_entries
+        )
+        self._member_roles_cache: TTLCache[list[RoleFields]] = TTLCache(
+            ttl_seconds=self._settings.user_roles_cache_ttl_seconds,
+            max_entries=self._settings.user_roles_cache_max_entries
         )
+        self._organization_catalogue: ResourceCatalogue[OrganizationFields] = ResourceCatalogue(
+            refresh_seconds=self._settings.organization_catalogue_refresh_seconds
+        )
+        self._rollback_tasks: set[asyncio.Task] = set()
+
+    async def close(self) -> None:
+        await self._organization_catalogue.stop_background_refresh()
+        await self._api_layer.close()
+
+    def start_organization_catalogue_refresh(self, token_handler: AuthTokenManager) -> None:
+        async def load_organizations() -> list[OrganizationFields]:
+            return await self.get_all_organizations(auth_token=await token_handler.token)
+
+        self._organization_catalogue.start_background_refresh(load_organizations)
+
+    def invalidate_organization(self, organization_id: str, deleted: bool = False) -> None:
+        if deleted:
+            self._missing_organizations.mark_missing(organization_id)
+            self._member_roles_cache.invalidate_where(lambda key: key[0] == organization_id)
+        else:
+            self._missing_organizations.discard(organization_id)
+        self._organization_catalogue.remove(organization_id)
+        self._api_layer.invalidate_cached_reads(f'/organizations/{organization_id}', include_subpaths=deleted)
+        self._api_layer.invalidate_cached_reads('/organizations', include_subpaths=False)
+
+    def invalidate_member(self, organization_id: str, user_id: str) -> None:
+        self._member_roles_cache.invalidate((organization_id, user_id))
+        self._api_layer.invalidate_cached_reads(f'/organizations/{organization_id}/members/{user_id}')
+        self._api_layer.invalidate_cached_reads(f'/organizations/{organization_id}/members', include_subpaths=False)
+
+    def invalidate_user_memberships(self, user_id: str) -> None:
+        self._member_roles_cache.invalidate_where(lambda key: key[1] == user_id)
 
     async def get_organizations(
             self,
@@ -27,6 +101,58 @@ class OrganizationManager:
         )
         return [OrganizationFields(**organization_data) for organization_data in organizations_data]
 
+    async def get_all_organizations(self, auth_token: str) -> list[OrganizationFields]:
+        organizations_data = await self._api_layer.make_checkpoint_paginated_request(
+            endpoint='/organizations',
+            auth_token=auth_token,
+            items_key='organizations'
+        )
+        return [OrganizationFields(**organization_data) for organization_data in organizations_data]
+
+    async def get_organization_by_name(
+            self,
+            auth_token: str,
+            name: str
+    ) -> OrganizationFields:
+        organization = self._organization_catalogue.get_by_name(name)
+        if organization is None:
+            await self._organization_catalogue.refresh_if_older_than(
+                self._settings.catalogue_min_refresh_seconds,
+                lambda: self.get_all_organizations(auth_token=auth_token)
+            )
+            organization = self._organization_catalogue.get_by_name(name)
+        if organization is None:
+            raise NotFoundException(f"Organization named {name} not found")
+        return organization
+
+    async def resolve_organization_id(
+            self,
+            auth_token: str,
+            organization_reference: str
+    ) -> str:
+        if not organization_reference.startswith(self.name_reference_prefix):
+            return organization_reference
+        organization = await self.get_organization_by_name(
+            auth_token=auth_token,
+            name=organization_reference[len(self.name_reference_prefix):]
+        )
+        return organization.id
+
+    async def get_organization(
+            self,
+            auth_token: str,
+            organization_id: str
+    ) -> OrganizationFields:
+        organization_data = await self._missing_organizations.guard(
+            organization_id,
+            lambda: self._api_layer.make_request(
+                method="GET",
+                endpoint=f'/organizations/{organization_id}',
+                auth_token=auth_token,
+            )
+        )
+        return OrganizationFields(**organization_data)
+
     async def delete_organization(
             self,
             auth_token: str,
@@ -37,6 +163,8 @@ class OrganizationManager:
             endpoint=f'/organizations/{organization_id}',
             auth_token=auth_token,
         )
+        self.invalidate_organization(organization_id, deleted=True)
+        await self._audit.record("organization.delete", "organization", organization_id)
 
     async def update_organization(
             self,
@@ -44,26 +172,143 @@ class OrganizationManager:
             organization_id: str,
             organization_updating_fields: UpdateOrganizationFields
     ) -> OrganizationFields:
-        updated_organizations_data = await self._api_layer.make_request(
-            method="PATCH",
-            endpoint=f'/organizations/{organization_id}',
-            auth_token=auth_token,
-            content=organization_updating_fields.model_dump_json(exclude_none=True)
+        updated_organizations_data = await self._missing_organizations.guard(
+            organization_id,
+            lambda: self._api_layer.make_request(
+                method="PATCH",
+                endpoint=f'/organizations/{organization_id}',
+                auth_token=auth_token,
+                content=organization_updating_fields.model_dump_json(exclude_none=True)
+            )
         )
-        return OrganizationFields(**updated_organizations_data)
+        updated_organization = OrganizationFields(**updated_organizations_data)
+        self._organization_catalogue.upsert(updated_organization)
+        await self._audit.record(
+            "organization.update", "organization", organization_id,
+            fields=sorted(organization_updating_fields.model_dump(exclude_none=True))
+        )
+        return updated_organization
 
     async def create_organization(
             self,
             auth_token: str,
             create_organization_fields: CreateOrganizationFields
     ) -> CreateOrganizationFields:
+        created_organization_data = await self._create_organization_upstream(
+            auth_token=auth_token,
+            create_organization_fields=create_organization_fields
+        )
+        return CreateOrganizationFields(**created_organization_data)
+
+    async def _create_organization_upstream(
+            self,
+            auth_token: str,
+            create_organization_fields: CreateOrganizationFields
+    ) -> dict:
         created_organization_data = await self._api_layer.make_request(
             method="POST",
             endpoint='/organizations',
             auth_token=auth_token,
             content=create_organization_fields.model_dump_json(exclude_none=True)
         )
-        return CreateOrganizationFields(**created_organization_data)
+        self._missing_organizations.discard(created_organization_data.get('id'))
+        self._organization_catalogue.upsert(OrganizationFields(**created_organization_data))
+        await self._audit.record(
+            "organization.create", "organization", created_organization_data.get('id'),
+            name=created_organization_data.get('name')
+        )
+        return created_organization_data
+
+    async def provision_organization(
+            self,
+            auth_token: str,
+            provisioning_fields: ProvisionOrganizationFields,
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> ProvisioningReportFields:
+        def report_progress(stage: str, completed: int, total: int) -> None:
+            if progress is not None:
+                progress(stage, completed, total)
+
+        members = list({member.user_id: member for member in provisioning_fields.members}.values())
+        members_with_roles = [member for member in members if member.roles]
+        report_progress("organization", 0, 1)
+        organization = OrganizationFields(**await self._create_organization_upstream(
+            auth_token=auth_token,
+            create_organization_fields=provisioning_fields.organization
+        ))
+        report_progress("organization", 1, 1)
+        report_progress("members", 0, len(members))
+        report_progress("roles", 0, len(members_with_roles))
+
+        semaphore = asyncio.Semaphore(self._settings.mutation_concurrency)
+        members_added = 0
+        roles_assigned = 0
+
+        async def assign_member_roles(member: ProvisionMemberFields) -> None:
+            nonlocal roles_assigned
+            async with semaphore:
+                await self.assign_user_roles_in_organization(
+                    auth_token=auth_token,
+                    organization_id=organization.id,
+                    user_id=member.user_id,
+                    members_roles_fields=UserRolesFields(roles=member.roles)
+                )
+            roles_assigned += 1
+            report_progress("roles", roles_assigned, len(members_with_roles))
+
+        async def provision_members(members_chunk: list[ProvisionMemberFields]) -> None:
+            nonlocal members_added
+            async with semaphore:
+                await self._add_users_to_organization_upstream(
+                    organization.id,
+                    [member.user_id for member in members_chunk],
+                    auth_token
+                )
+            await self._audit.record(
+                "organization.members.add", "organization", organization.id,
+                members=[member.user_id for member in members_chunk]
+            )
+            members_added += len(members_chunk)
+            report_progress("members", members_added, len(members))
+            async with asyncio.TaskGroup() as task_group:
+                for member in members_chunk:
+                    if member.roles:
+                        task_group.create_task(assign_member_roles(member))
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                for members_chunk in chunked(members, self._settings.mutation_batch_max_items):
+                    task_group.create_task(provision_members(list(members_chunk)))
+        except BaseExceptionGroup as e:
+            await self._roll_back_provisioning(auth_token, organization.id)
+            raise self._first_leaf_exception(e)
+        except BaseException:
+            await self._roll_back_provisioning(auth_token, organization.id)
+            raise
+        return ProvisioningReportFields(
+            organization=organization,
+            members_added=members_added,
+            roles_assigned=roles_assigned
+        )
+
+    async def _roll_back_provisioning(self, auth_token: str, organization_id: str) -> None:
+        rollback = asyncio.create_task(
+            self.delete_organization(auth_token=auth_token, organization_id=organization_id),
+            context=new_background_context(caller_id=get_caller_id())
+        )
+        self._rollback_tasks.add(rollback)
+        rollback.add_done_callback(self._rollback_tasks.discard)
+        try:
+            await asyncio.shield(rollback)
+        except Exception:
+            logger.exception("Rolling back provisioning of organization %s failed", organization_id)
+
+    @staticmethod
+    def _first_leaf_exception(exception_group: BaseExceptionGroup) -> BaseException:
+        first_exception = exception_group.exceptions[0]
+        while isinstance(first_exception, BaseExceptionGroup):
+            first_exception = first_exception.exceptions[0]
+        return first_exception
 
     async def add_users_to_organization(
             self,
@@ -71,12 +316,33 @@ class OrganizationManager:
             organization_id: str,
             members_list: AddDeleteMembersFields
     ) -> None:
-        await self._api_layer.make_request(
-            method="POST",
-            endpoint=f'/organizations/{organization_id}/members',
-            auth_token=auth_token,
-            content=members_list.model_dump_json(exclude_none=True)
+        self._missing_organizations.raise_if_missing(organization_id)
+        await self._member_addition_batcher.submit(
+            key=organization_id,
+            items=members_list.members,
+            auth_token=auth_token
         )
+        await self._audit.record(
+            "organization.members.add", "organization", organization_id,
+            members=members_list.members
+        )
+
+    async def _add_users_to_organization_upstream(
+            self,
+            organization_id: str,
+            members: list[str],
+            auth_token: str
+    ) -> None:
+        try:
+            await self._api_layer.make_request(
+                method="POST",
+                endpoint=f'/organizations/{organization_id}/members',
+                auth_token=auth_token,
+                content=AddDeleteMembersFields(members=members).model_dump_json(exclude_none=True)
+            )
+        finally:
+            for user_id in members:
+                self._member_roles_cache.invalidate((organization_id, user_id))
 
     async def delete_users_from_organization(
             self,
@@ -84,13 +350,118 @@ class OrganizationManager:
             organization_id: str,
             members_list: AddDeleteMembersFields
     ) -> None:
-        await self._api_layer.make_request(
-            method="DELETE",
-            endpoint=f'/organizations/{organization_id}/members',
+        self._missing_organizations.raise_if_missing(organization_id)
+        try:
+            await self._api_layer.make_request(
+                method="DELETE",
+                endpoint=f'/organizations/{organization_id}/members',
+                auth_token=auth_token,
+                content=members_list.model_dump_json(exclude_none=True)
+            )
+        finally:
+            for user_id in members_list.members:
+                self._member_roles_cache.invalidate((organization_id, user_id))
+        await self._audit.record(
+            "organization.members.delete", "organization", organization_id,
+            members=members_list.members
+        )
+
+    async def get_organization_member_ids(
+            self,
+            auth_token: str,
+            organization_id: str
+    ) -> list[str]:
+        members_data = await self._missing_organizations.guard(
+            organization_id,
+            lambda: self._api_layer.make_checkpoint_paginated_request(
+                endpoint=f'/organizations/{organization_id}/members',
+                auth_token=auth_token,
+                items_key='members',
+                params={'fields': 'user_id', 'include_fields': 'true'}
+            )
+        )
+        return [member_data['user_id'] for member_data in members_data]
+
+    async def reconcile_organization_members(
+            self,
+            auth_token: str,
+            organization_id: str,
+            desired_members: DesiredMembersFields,
+            dry_run: bool = False,
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> MembersReconciliationFields:
+        current_members = set(await self.get_organization_member_ids(
             auth_token=auth_token,
-            content=members_list.model_dump_json(exclude_none=True)
+            organization_id=organization_id
+        ))
+        desired_member_ids = list(dict.fromkeys(desired_members.members))
+        members_to_add = [user_id for user_id in desired_member_ids if user_id not in current_members]
+        members_to_remove = sorted(current_members.difference(desired_member_ids))
+        failed_members = []
+        if not dry_run:
+            failed_members = await self._apply_member_changes(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                members_to_add=members_to_add,
+                members_to_remove=members_to_remove,
+                progress=progress
+            )
+        return MembersReconciliationFields(
+            added=[user_id for user_id in members_to_add if user_id not in failed_members],
+            removed=[user_id for user_id in members_to_remove if user_id not in failed_members],
+            unchanged=len(current_members.intersection(desired_member_ids)),
+            failed=failed_members,
+            dry_run=dry_run
         )
 
+    async def _apply_member_changes(
+            self,
+            auth_token: str,
+            organization_id: str,
+            members_to_add: list[str],
+            members_to_remove: list[str],
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> list[str]:
+        semaphore = asyncio.Semaphore(self._settings.mutation_concurrency)
+        completed_changes = {'added': 0, 'removed': 0}
+
+        def report_progress(stage: str, members_count: int, total: int) -> None:
+            completed_changes[stage] += members_count
+            if progress is not None:
+                progress(stage, completed_changes[stage], total)
+
+        async def add_members(members: list[str]) -> None:
+            async with semaphore:
+                await self._add_users_to_organization_upstream(organization_id, members, auth_token)
+            await self._audit.record("organization.members.add", "organization", organization_id, members=members)
+            report_progress('added', len(members), len(members_to_add))
+
+        async def remove_members(members: list[str]) -> None:
+            async with semaphore:
+                await self.delete_users_from_organization(
+                    auth_token=auth_token,
+                    organization_id=organization_id,
+                    members_list=AddDeleteMembersFields(members=members)
+                )
+            report_progress('removed', len(members), len(members_to_remove))
+
+        chunk_size = self._settings.mutation_batch_max_items
+        operations = [
+            *((add_members, list(members)) for members in chunked(members_to_add, chunk_size)),
+            *((remove_members, list(members)) for members in chunked(members_to_remove, chunk_size)),
+        ]
+        outcomes = await asyncio.gather(
+            *(operation(members) for operation, members in operations),
+            return_exceptions=True
+        )
+        failed_members = []
+        for (_, members), outcome in zip(operations, outcomes):
+            if isinstance(outcome, BaseApiException):
+                failed_members.extend(members)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+        return failed_members
+
     async def assign_user_roles_in_organization(
             self,
             auth_token: str,
@@ -98,11 +469,19 @@ class OrganizationManager:
             user_id: str,
             members_roles_fields: UserRolesFields
     ) -> None:
-        await self._api_layer.make_request(
-            method="POST",
-            endpoint=f'/organizations/{organization_id}/members/{user_id}/roles',
-            auth_token=auth_token,
-            content=members_roles_fields.model_dump_json(exclude_none=True)
+        self._missing_organizations.raise_if_missing(organization_id)
+        try:
+            await self._api_layer.make_request(
+                method="POST",
+                endpoint=f'/organizations/{organization_id}/members/{user_id}/roles',
+                auth_token=auth_token,
+                content=members_roles_fields.model_dump_json(exclude_none=True)
+            )
+        finally:
+            self._member_roles_cache.invalidate((organization_id, user_id))
+        await self._audit.record(
+            "organization.member.roles.assign", "organization", organization_id,
+            user_id=user_id, roles=members_roles_fields.roles
         )
 
     async def delete_user_roles_in_organization(
@@ -112,26 +491,81 @@ class OrganizationManager:
             user_id: str,
             members_roles_fields: UserRolesFields
     ) -> None:
-        await self._api_layer.make_request(
-            method="DELETE",
-            endpoint=f'/organizations/{organization_id}/members/{user_id}/roles',
-            auth_token=auth_token,
-            content=members_roles_fields.model_dump_json(exclude_none=True)
+        self._missing_organizations.raise_if_missing(organization_id)
+        try:
+            await self._api_layer.make_request(
+                method="DELETE",
+                endpoint=f'/organizations/{organization_id}/members/{user_id}/roles',
+                auth_token=auth_token,
+                content=members_roles_fields.model_dump_json(exclude_none=True)
+            )
+        finally:
+            self._member_roles_cache.invalidate((organization_id, user_id))
+        await self._audit.record(
+            "organization.member.roles.delete", "organization", organization_id,
+            user_id=user_id, roles=members_roles_fields.roles
         )
 
     async def get_user_roles_in_organization(
             self,
             auth_token: str,
             organization_id: str,
-            user_id: str
+            user_id: str,
+            use_cache: bool = False
     ) -> list[RoleFields] | list:
-        organization_user_roles = await self._api_layer.make_request(
-            method="GET",
+        if use_cache:
+            cached_member_roles = self._member_roles_cache.get((organization_id, user_id))
+            if cached_member_roles is not None:
+                return cached_member_roles
+        self._missing_organizations.raise_if_missing(organization_id)
+        organization_user_roles = await self._api_layer.make_paginated_request(
             endpoint=f'/organizations/{organization_id}/members/{user_id}/roles',
             auth_token=auth_token,
+            items_key='roles'
+        )
+        member_roles = [RoleFields(**organization_user_role) for organization_user_role in organization_user_roles]
+        self._member_roles_cache.put((organization_id, user_id), member_roles)
+        return member_roles
+
+    async def reconcile_user_roles_in_organization(
+            self,
+            auth_token: str,
+            organization_id: str,
+            user_id: str,
+            desired_roles: DesiredRolesFields
+    ) -> RolesReconciliationFields:
+        current_role_ids = {
+            role.id for role in await self.get_user_roles_in_organization(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                user_id=user_id
+            )
+        }
+        desired_role_ids = list(dict.fromkeys(desired_roles.roles))
+        roles_to_assign = [role_id for role_id in desired_role_ids if role_id not in current_role_ids]
+        roles_to_remove = sorted(current_role_ids.difference(desired_role_ids))
+        role_changes = []
+        if roles_to_assign:
+            role_changes.append(self.assign_user_roles_in_organization(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                user_id=user_id,
+                members_roles_fields=UserRolesFields(roles=roles_to_assign)
+            ))
+        if roles_to_remove:
+            role_changes.append(self.delete_user_roles_in_organization(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                user_id=user_id,
+                members_roles_fields=UserRolesFields(roles=roles_to_remove)
+            ))
+        await asyncio.gather(*role_changes)
+        return RolesReconciliationFields(
+            assigned=roles_to_assign,
+            removed=roles_to_remove,
+            unchanged=len(current_role_ids.intersection(desired_role_ids))
         )
-        return [RoleFields(**organization_user_role) for organization_user_role in organization_user_roles]
 
 
 def get_organization_manager_service(request: Request) -> OrganizationManager:
-    return request.app.state.organization_manager
+    return get_tenant_services(request).organization_manager
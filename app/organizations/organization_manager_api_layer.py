@@ -1,6 +1,10 @@
+from typing import Optional
+
+from app.config import Settings
+from app.utils.admission_control import AdmissionController
 from app.utils.api_handler import BaseApiLayer
 
 
 class OrganizationManagerApiLayer(BaseApiLayer):
-    def __init__(self, auth_url: str):
-        super().__init__(auth_url=auth_url)
+    def __init__(self, auth_url: str, settings: Settings, admission_controller: Optional[AdmissionController] = None):
+        super().__init__(auth_url=auth_url, settings=settings, admission_controller=admission_controller)
@@ -1,18 +1,52 @@
+import asyncio
+
+from typing import Annotated, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
 
 from app.auth.auth_token_manager import get_auth_manager_service, AuthTokenManager
+from app.auth.caller_authenticator import authenticate_caller, require_permissions, get_caller_subject
+from app.jobs.job_manager import JobManager, get_job_manager_service
+from app.jobs.routers import job_accepted_response
 from app.organizations.organization_manager import SortParameters, OrganizationManager, get_organization_manager_service
-from app.organizations.schemas import CreateOrganizationFields, UpdateOrganizationFields, AddDeleteMembersFields
-from app.roles.schemas import UserRolesFields
+from app.organizations.schemas import CreateOrganizationFields, UpdateOrganizationFields, AddDeleteMembersFields, \
+    DesiredMembersFields, ProvisionOrganizationFields
+from app.roles.role_manager import RoleManager, get_role_manager_service
+from app.roles.schemas import UserRolesFields, DesiredRolesFields
 from app.utils.api_layer_exceptions import NotFoundException, BaseApiException, ServiceUnavailableException, \
     BadRequestException, ConflictException
 
-router = APIRouter(prefix="/api/v1/organizations")
+router = APIRouter(prefix="/api/v1/organizations", dependencies=[Depends(authenticate_caller)])
+
+
+async def resolve_organization_id(
+        organization_id: str,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
+) -> str:
+    try:
+        return await organization_manager_service.resolve_organization_id(
+            auth_token=await token_handler.token,
+            organization_reference=organization_id
+        )
+    except NotFoundException as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
 
+OrganizationId = Annotated[str, Depends(resolve_organization_id)]
 
-@router.get("/")
+
+@router.get("/", dependencies=[Depends(require_permissions("read:organizations"))])
 async def get_organizations(
         sort_parameter: SortParameters = Depends(),
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -37,7 +71,7 @@ async def get_organizations(
         )
 
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(require_permissions("create:organizations"))])
 async def create_organizations(
         create_organization_parameter: CreateOrganizationFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -62,9 +96,105 @@ async def create_organizations(
         )
 
 
-@router.patch("/{organization_id}")
+@router.post("/provision", dependencies=[Depends(require_permissions("create:organizations"))])
+async def provision_organization(
+        provisioning_fields: ProvisionOrganizationFields,
+        background: bool = False,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        auth_token = await token_handler.token
+        resolved_members = await asyncio.gather(*(
+            role_manager_service.resolve_role_ids(auth_token=auth_token, members_roles_fields=member)
+            for member in provisioning_fields.members
+        ))
+        resolved_provisioning_fields = provisioning_fields.model_copy(update={'members': resolved_members})
+        if background:
+            job = job_manager_service.submit(
+                operation_name="provision_organization",
+                operation=lambda progress: organization_manager_service.provision_organization(
+                    auth_token=auth_token,
+                    provisioning_fields=resolved_provisioning_fields,
+                    progress=progress
+                ),
+                owner=caller_subject
+            )
+            return job_accepted_response(job)
+        provisioning_report = await organization_manager_service.provision_organization(
+            auth_token=auth_token,
+            provisioning_fields=resolved_provisioning_fields
+        )
+        json_compatible_data = jsonable_encoder(provisioning_report)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException, ConflictException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/by-name/{name}", dependencies=[Depends(require_permissions("read:organizations"))])
+async def get_organization_by_name(
+        name: str,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
+):
+    try:
+        organization_data = await organization_manager_service.get_organization_by_name(
+            auth_token=await token_handler.token,
+            name=name
+        )
+        json_compatible_data = jsonable_encoder(organization_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/{organization_id}", dependencies=[Depends(require_permissions("read:organizations"))])
+async def get_organization(
+        organization_id: OrganizationId,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
+):
+    try:
+        organization_data = await organization_manager_service.get_organization(
+            auth_token=await token_handler.token,
+            organization_id=organization_id
+        )
+        json_compatible_data = jsonable_encoder(organization_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.patch("/{organization_id}", dependencies=[Depends(require_permissions("update:organizations"))])
 async def update_organizations(
-        organization_id: str,
+        organization_id: OrganizationId,
         update_organization_parameter: UpdateOrganizationFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
@@ -89,9 +219,9 @@ async def update_organizations(
         )
 
 
-@router.delete("/{organization_id}")
+@router.delete("/{organization_id}", dependencies=[Depends(require_permissions("delete:organizations"))])
 async def delete_organization(
-        organization_id: str,
+        organization_id: OrganizationId,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
 ):
@@ -113,9 +243,9 @@ async def delete_organization(
         )
 
 
-@router.post("/{organization_id}/members")
+@router.post("/{organization_id}/members", dependencies=[Depends(require_permissions("update:organizations"))])
 async def add_users_to_organization(
-        organization_id: str,
+        organization_id: OrganizationId,
         members_list: AddDeleteMembersFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
@@ -139,9 +269,9 @@ async def add_users_to_organization(
         )
 
 
-@router.delete("/{organization_id}/members")
+@router.delete("/{organization_id}/members", dependencies=[Depends(require_permissions("update:organizations"))])
 async def delete_users_from_organization(
-        organization_id: str,
+        organization_id: OrganizationId,
         members_list: AddDeleteMembersFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
@@ -164,9 +294,55 @@ async def delete_users_from_organization(
             detail="Service unavailable"
         )
 
-@router.get("/{organization_id}/members/{user_id}/roles")
+@router.put("/{organization_id}/members", dependencies=[Depends(require_permissions("update:organizations"))])
+async def reconcile_organization_members(
+        organization_id: OrganizationId,
+        desired_members: DesiredMembersFields,
+        dry_run: bool = False,
+        background: bool = False,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        auth_token = await token_handler.token
+        if background:
+            job = job_manager_service.submit(
+                operation_name="reconcile_organization_members",
+                operation=lambda progress: organization_manager_service.reconcile_organization_members(
+                    auth_token=auth_token,
+                    organization_id=organization_id,
+                    desired_members=desired_members,
+                    dry_run=dry_run,
+                    progress=progress
+                ),
+                owner=caller_subject
+            )
+            return job_accepted_response(job)
+        reconciliation_data = await organization_manager_service.reconcile_organization_members(
+            auth_token=auth_token,
+            organization_id=organization_id,
+            desired_members=desired_members,
+            dry_run=dry_run
+        )
+        json_compatible_data = jsonable_encoder(reconciliation_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/{organization_id}/members/{user_id}/roles", dependencies=[Depends(require_permissions("read:organizations"))])
 async def get_organization_roles(
-        organization_id: str,
+        organization_id: OrganizationId,
         user_id: str,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
@@ -190,20 +366,25 @@ async def get_organization_roles(
             detail="Service unavailable"
         )
 
-@router.delete("/{organization_id}/members/{user_id}/roles")
+@router.delete("/{organization_id}/members/{user_id}/roles", dependencies=[Depends(require_permissions("update:organizations"))])
 async def delete_users_roles_from_organization_member(
-        organization_id: str,
+        organization_id: OrganizationId,
         user_id: str,
         organization_user_fields: UserRolesFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
-        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
 ):
     try:
+        auth_token = await token_handler.token
         await organization_manager_service.delete_user_roles_in_organization(
-            auth_token=await token_handler.token,
+            auth_token=auth_token,
             organization_id=organization_id,
             user_id=user_id,
-            members_roles_fields=organization_user_fields
+            members_roles_fields=await role_manager_service.resolve_role_ids(
+                auth_token=auth_token,
+                members_roles_fields=organization_user_fields
+            )
         )
         return Response(status_code=204)
     except (NotFoundException, BadRequestException) as e:
@@ -218,20 +399,25 @@ async def delete_users_roles_from_organization_member(
         )
 
 
-@router.post("/{organization_id}/members/{user_id}/roles")
+@router.post("/{organization_id}/members/{user_id}/roles", dependencies=[Depends(require_permissions("update:organizations"))])
 async def assign_user_roles_in_organization(
-        organization_id: str,
+        organization_id: OrganizationId,
         user_id: str,
         organization_user_fields: UserRolesFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
-        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service)
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
 ):
     try:
+        auth_token = await token_handler.token
         await organization_manager_service.assign_user_roles_in_organization(
-            auth_token=await token_handler.token,
+            auth_token=auth_token,
             organization_id=organization_id,
             user_id=user_id,
-            members_roles_fields=organization_user_fields
+            members_roles_fields=await role_manager_service.resolve_role_ids(
+                auth_token=auth_token,
+                members_roles_fields=organization_user_fields
+            )
         )
         return Response(status_code=204)
     except (NotFoundException, BadRequestException) as e:
@@ -243,4 +429,37 @@ async def assign_user_roles_in_organization(
         raise HTTPException(
             status_code=500,
             detail="Service unavailable"
-        )
\ No newline at end of file
+        )
+
+@router.put("/{organization_id}/members/{user_id}/roles", dependencies=[Depends(require_permissions("update:organizations"))])
+async def reconcile_user_roles_in_organization(
+        organization_id: OrganizationId,
+        user_id: str,
+        desired_roles: DesiredRolesFields,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
+):
+    try:
+        auth_token = await token_handler.token
+        reconciliation_data = await organization_manager_service.reconcile_user_roles_in_organization(
+            auth_token=auth_token,
+            organization_id=organization_id,
+            user_id=user_id,
+            desired_roles=await role_manager_service.resolve_role_ids(
+                auth_token=auth_token,
+                members_roles_fields=desired_roles
+            )
+        )
+        json_compatible_data = jsonable_encoder(reconciliation_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
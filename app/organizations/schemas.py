@@ -2,6 +2,8 @@ from pydantic import BaseModel, field_validator, Field
 from typing import Optional, Literal
 from fastapi import HTTPException, Query
 
+from app.roles.schemas import DesiredRolesFields
+
 
 class SortParameters(BaseModel):
     sort_parameter: Optional[Literal['created_at', 'name', 'display_name']] = Query(None)
@@ -50,3 +52,30 @@ class CreateOrganizationFields(BaseModel):
 
 class AddDeleteMembersFields(BaseModel):
     members: list[str] = Field(..., description="List of user IDs")
+
+
+class DesiredMembersFields(BaseModel):
+    members: list[str] = Field(..., description="Complete list of user IDs that should be members")
+
+
+class MembersReconciliationFields(BaseModel):
+    added: list[str] = Field(..., description="User IDs added to the organization")
+    removed: list[str] = Field(..., description="User IDs removed from the organization")
+    unchanged: int = Field(..., description="Number of members that were already in place")
+    failed: list[str] = Field(default_factory=list, description="User IDs whose change failed")
+    dry_run: bool = Field(..., description="Whether the changes were only computed")
+
+
+class ProvisionMemberFields(DesiredRolesFields):
+    user_id: str = Field(..., description="User ID of the initial member")
+
+
+class ProvisionOrganizationFields(BaseModel):
+    organization: CreateOrganizationFields = Field(..., description="Organization to create")
+    members: list[ProvisionMemberFields] = Field(default_factory=list, description="Initial members and their roles")
+
+
+class ProvisioningReportFields(BaseModel):
+    organization: OrganizationFields = Field(..., description="Created organization")
+    members_added: int = Field(..., description="Number of members added")
+    roles_assigned: int = Field(..., description="Number of members whose roles were assigned")
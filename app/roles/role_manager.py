@@ -1,31 +1,204 @@
-from typing import Optional
+import asyncio
+from typing import Callable, Optional
 
 from fastapi import Request
 
+from app.audit.audit_log import AuditRecorder
+from app.auth.auth_token_manager import AuthTokenManager
 from app.roles.roles_manager_api_layer import RoleManagerApiLayer
-from app.roles.schemas import RoleFields, CreateRoleFields, UpdateRoleFields
+from app.roles.schemas import RoleFields, CreateRoleFields, UpdateRoleFields, UserRolesFields, PermissionFields, \
+    DesiredRolesFields
 from app.config import Settings
+from app.tenants.tenant_context import get_tenant_services
+from app.utils.admission_control import AdmissionController
+from app.utils.api_layer_exceptions import BadRequestException
+from app.utils.negative_cache import NegativeCache
+from app.utils.passthrough import PassthroughResponse
+from app.utils.resource_catalogue import ResourceCatalogue
+from app.utils.ttl_cache import TTLCache
 
 
 class RoleManager:
-    def __init__(self, settings: Settings):
+    def __init__(
+            self,
+            settings: Settings,
+            admission_controller: Optional[AdmissionController] = None,
+            audit_recorder: Optional[AuditRecorder] = None
+    ):
         self._settings = settings
+        self._audit = audit_recorder or AuditRecorder()
         self._api_layer = RoleManagerApiLayer(
-            auth_url=self._settings.auth0_url
+            auth_url=self._settings.auth0_url,
+            settings=self._settings,
+            admission_controller=admission_controller
+        )
+        self._missing_roles = NegativeCache(
+            resource_name="role",
+            ttl_seconds=self._settings.negative_cache_ttl_seconds,
+            max_entries=self._settings.negative_cache_max_entries
+        )
+        self._role_catalogue: ResourceCatalogue[RoleFields] = ResourceCatalogue(
+            refresh_seconds=self._settings.role_catalogue_refresh_seconds
+        )
+        self._role_permissions: TTLCache[list[PermissionFields]] = TTLCache(
+            ttl_seconds=self._settings.role_permissions_cache_ttl_seconds,
+            max_entries=self._settings.role_permissions_cache_max_entries
+        )
+
+    async def close(self) -> None:
+        await self._role_catalogue.stop_background_refresh()
+        await self._api_layer.close()
+
+    def start_role_catalogue_refresh(self, token_handler: AuthTokenManager) -> None:
+        async def load_roles() -> list[RoleFields]:
+            auth_token = await token_handler.token
+            roles = await self.get_all_roles(auth_token=auth_token)
+            await self._get_roles_permissions(
+                auth_token=auth_token,
+                role_ids=[role.id for role in roles],
+                force=True
+            )
+            return roles
+
+        self._role_catalogue.start_background_refresh(load_roles)
+
+    def invalidate_role(self, role_id: str, deleted: bool = False) -> None:
+        if deleted:
+            self._missing_roles.mark_missing(role_id)
+        else:
+            self._missing_roles.discard(role_id)
+        self._role_catalogue.remove(role_id)
+        self._role_permissions.invalidate(role_id)
+        self._api_layer.invalidate_cached_reads(f'/roles/{role_id}')
+        self._api_layer.invalidate_cached_reads('/roles', include_subpaths=False)
+
+    def invalidate_role_permissions(self, role_id: str) -> None:
+        self._role_permissions.invalidate(role_id)
+        self._api_layer.invalidate_cached_reads(f'/roles/{role_id}/permissions')
+
+    async def get_all_roles(self, auth_token: str) -> list[RoleFields]:
+        roles_data = await self._api_layer.make_paginated_request(
+            endpoint='/roles',
+            auth_token=auth_token,
+            items_key='roles'
+        )
+        return [RoleFields(**role_data) for role_data in roles_data]
+
+    async def resolve_role_ids(
+            self,
+            auth_token: str,
+            members_roles_fields: UserRolesFields | DesiredRolesFields
+    ) -> UserRolesFields | DesiredRolesFields:
+        if not members_roles_fields.role_names:
+            return members_roles_fields.model_copy(update={'role_names': None})
+        unresolved_names = [
+            name for name in members_roles_fields.role_names if self._role_catalogue.get_by_name(name) is None
+        ]
+        if unresolved_names:
+            await self._role_catalogue.refresh_if_older_than(
+                self._settings.catalogue_min_refresh_seconds,
+                lambda: self.get_all_roles(auth_token=auth_token)
+            )
+            unresolved_names = [
+                name for name in unresolved_names if self._role_catalogue.get_by_name(name) is None
+            ]
+        if unresolved_names:
+            raise BadRequestException(f"Unknown role names: {', '.join(unresolved_names)}")
+        resolved_ids = [self._role_catalogue.get_by_name(name).id for name in members_roles_fields.role_names]
+        return members_roles_fields.model_copy(update={
+            'roles': list(dict.fromkeys([*members_roles_fields.roles, *resolved_ids])),
+            'role_names': None
+        })
+
+    async def get_role_permissions(
+            self,
+            auth_token: str,
+            role_id: str
+    ) -> list[PermissionFields]:
+        role_permissions = self._role_permissions.get(role_id)
+        if role_permissions is not None:
+            return role_permissions
+        permissions_data = await self._missing_roles.guard(
+            role_id,
+            lambda: self._api_layer.make_paginated_request(
+                endpoint=f'/roles/{role_id}/permissions',
+                auth_token=auth_token,
+                items_key='permissions'
+            )
+        )
+        role_permissions = [PermissionFields(**permission_data) for permission_data in permissions_data]
+        self._role_permissions.put(role_id, role_permissions)
+        return role_permissions
+
+    async def _get_roles_permissions(
+            self,
+            auth_token: str,
+            role_ids: list[str],
+            force: bool = False,
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> list[list[PermissionFields]]:
+        semaphore = asyncio.Semaphore(self._settings.role_permissions_concurrency)
+        loaded_roles = 0
+
+        async def load(role_id: str) -> list[PermissionFields]:
+            nonlocal loaded_roles
+            async with semaphore:
+                if force:
+                    self._role_permissions.invalidate(role_id)
+                role_permissions = await self.get_role_permissions(auth_token=auth_token, role_id=role_id)
+            loaded_roles += 1
+            if progress is not None:
+                progress("roles", loaded_roles, len(role_ids))
+            return role_permissions
+
+        return await asyncio.gather(*(load(role_id) for role_id in role_ids))
+
+    async def get_effective_permissions(
+            self,
+            auth_token: str,
+            role_ids: list[str],
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> list[PermissionFields]:
+        roles_permissions = await self._get_roles_permissions(
+            auth_token=auth_token,
+            role_ids=list(dict.fromkeys(role_ids)),
+            progress=progress
         )
+        effective_permissions = {}
+        for role_permissions in roles_permissions:
+            for permission in role_permissions:
+                permission_key = (permission.resource_server_identifier, permission.permission_name)
+                effective_permissions.setdefault(permission_key, permission)
+        return [effective_permissions[permission_key] for permission_key in sorted(effective_permissions)]
 
-    async def get_roles(
+    async def stream_roles(
             self,
             auth_token: str,
-            name_filter: Optional[str] = None
-    ) -> list[RoleFields] | list:
-        roles_data = await self._api_layer.make_request(
-            method="GET",
+            name_filter: Optional[str] = None,
+            accept_encoding: Optional[str] = None
+    ) -> PassthroughResponse:
+        return await self._api_layer.make_passthrough_request(
             endpoint='/roles',
             auth_token=auth_token,
-            params={'name_filter': name_filter} if name_filter else {}
+            params={'name_filter': name_filter} if name_filter else {},
+            accept_encoding=accept_encoding,
+            validate=lambda roles_data: [RoleFields(**role_data) for role_data in roles_data]
         )
-        return [RoleFields(**role_data) for role_data in roles_data]
+
+    async def get_role(
+            self,
+            auth_token: str,
+            role_id: str
+    ) -> RoleFields:
+        role_data = await self._missing_roles.guard(
+            role_id,
+            lambda: self._api_layer.make_request(
+                method="GET",
+                endpoint=f'/roles/{role_id}',
+                auth_token=auth_token,
+            )
+        )
+        return RoleFields(**role_data)
 
     async def delete_role(
             self,
@@ -37,6 +210,8 @@ class RoleManager:
             endpoint=f'/roles/{role_id}',
             auth_token=auth_token,
         )
+        self.invalidate_role(role_id, deleted=True)
+        await self._audit.record("role.delete", "role", role_id)
 
     async def update_role(
             self,
@@ -44,13 +219,22 @@ class RoleManager:
             role_id: str,
             updating_fields: UpdateRoleFields
     ) -> RoleFields:
-        updated_role_data = await self._api_layer.make_request(
-            method="PATCH",
-            endpoint=f'/roles/{role_id}',
-            auth_token=auth_token,
-            content=updating_fields.model_dump_json(exclude_none=True)
+        updated_role_data = await self._missing_roles.guard(
+            role_id,
+            lambda: self._api_layer.make_request(
+                method="PATCH",
+                endpoint=f'/roles/{role_id}',
+                auth_token=auth_token,
+                content=updating_fields.model_dump_json(exclude_none=True)
+            )
+        )
+        updated_role = RoleFields(**updated_role_data)
+        self._role_catalogue.upsert(updated_role)
+        await self._audit.record(
+            "role.update", "role", role_id,
+            fields=sorted(updating_fields.model_dump(exclude_none=True))
         )
-        return RoleFields(**updated_role_data)
+        return updated_role
 
     async def create_role(
             self,
@@ -63,8 +247,12 @@ class RoleManager:
             auth_token=auth_token,
             content=role_fields.model_dump_json(exclude_none=True)
         )
-        return RoleFields(**created_role_data)
+        created_role = RoleFields(**created_role_data)
+        self._missing_roles.discard(created_role.id)
+        self._role_catalogue.upsert(created_role)
+        await self._audit.record("role.create", "role", created_role.id, name=created_role.name)
+        return created_role
 
 
 def get_role_manager_service(request: Request) -> RoleManager:
-    return request.app.state.role_manager
+    return get_tenant_services(request).role_manager
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
 
@@ -12,11 +12,12 @@ from app.utils.api_layer_exceptions import (
     BadRequestException
 )
 from app.auth.auth_token_manager import get_auth_manager_service, AuthTokenManager
+from app.auth.caller_authenticator import authenticate_caller, require_permissions
 
-router = APIRouter(prefix="/api/v1/roles")
+router = APIRouter(prefix="/api/v1/roles", dependencies=[Depends(authenticate_caller)])
 
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(require_permissions("create:roles"))])
 async def create_role(
         role_fields: CreateRoleFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -41,7 +42,7 @@ async def create_role(
         )
 
 
-@router.delete("/{role_id}")
+@router.delete("/{role_id}", dependencies=[Depends(require_permissions("delete:roles"))])
 async def delete_role(
         role_id: str,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -65,7 +66,7 @@ async def delete_role(
         )
 
 
-@router.patch("/{role_id}")
+@router.patch("/{role_id}", dependencies=[Depends(require_permissions("update:roles"))])
 async def update_role(
         role_id: str,
         updating_fields: UpdateRoleFields,
@@ -92,18 +93,44 @@ async def update_role(
         )
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(require_permissions("read:roles"))])
 async def get_roles(
         q: str | None = None,
+        accept_encoding: str | None = Header(default=None),
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         role_manager_service: RoleManager = Depends(get_role_manager_service)
 ):
     try:
-        users_data = await role_manager_service.get_roles(
+        roles_response = await role_manager_service.stream_roles(
             auth_token=await token_handler.token,
-            name_filter=q
+            name_filter=q,
+            accept_encoding=accept_encoding
         )
-        json_compatible_data = jsonable_encoder(users_data)
+        return roles_response.to_response()
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/{role_id}", dependencies=[Depends(require_permissions("read:roles"))])
+async def get_role(
+        role_id: str,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
+):
+    try:
+        role_data = await role_manager_service.get_role(
+            auth_token=await token_handler.token,
+            role_id=role_id
+        )
+        json_compatible_data = jsonable_encoder(role_data)
         return JSONResponse(content=json_compatible_data)
     except (NotFoundException, BadRequestException) as e:
         raise HTTPException(
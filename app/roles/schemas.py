@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class BaseRoleFields(BaseModel):
@@ -21,5 +21,30 @@ class UpdateRoleFields(BaseModel):
     name: Optional[str] = Field(default=None, description="Name of the role")
 
 
+class PermissionFields(BaseModel):
+    permission_name: str = Field(..., description="Name of the permission")
+    resource_server_identifier: str = Field(..., description="Identifier of the API the permission belongs to")
+    resource_server_name: Optional[str] = Field(default=None, description="Name of the API the permission belongs to")
+    description: Optional[str] = Field(default=None, description="Description of the permission")
+
+
 class UserRolesFields(BaseModel):
-    roles: list[str] = Field(..., description="List of roles")
\ No newline at end of file
+    roles: list[str] = Field(default_factory=list, description="List of role IDs")
+    role_names: Optional[list[str]] = Field(default=None, description="List of role names, resolved to role IDs")
+
+    @model_validator(mode='after')
+    def validate_roles_provided(self):
+        if not self.roles and not self.role_names:
+            raise ValueError("Either roles or role_names must be provided")
+        return self
+
+
+class DesiredRolesFields(BaseModel):
+    roles: list[str] = Field(default_factory=list, description="Complete list of role IDs that should be assigned")
+    role_names: Optional[list[str]] = Field(default=None, description="List of role names, resolved to role IDs")
+
+
+class RolesReconciliationFields(BaseModel):
+    assigned: list[str] = Field(..., description="Role IDs assigned")
+    removed: list[str] = Field(..., description="Role IDs removed")
+    unchanged: int = Field(..., description="Number of roles that were already assigned")
@@ -0,0 +1,36 @@
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, Optional
+
+from fastapi import Request
+
+from app.config import Settings
+
+if TYPE_CHECKING:
+    from app.tenants.tenant_services import TenantServices
+
+
+current_tenant_services: ContextVar[Optional["TenantServices"]] = ContextVar("current_tenant_services", default=None)
+
+
+def hold_current_tenant() -> Callable[[], None]:
+    services = current_tenant_services.get()
+    if services is None:
+        return lambda: None
+    services.acquire()
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            services.release()
+    return release
+
+
+def get_tenant_services(request: Request) -> "TenantServices":
+    tenant_services = getattr(request.state, "tenant_services", None)
+    return tenant_services if tenant_services is not None else request.app.state.tenant_services
+
+
+def get_tenant_settings(request: Request) -> Settings:
+    return get_tenant_services(request).settings
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import Settings
+from app.tenants.tenant_context import current_tenant_services
+from app.tenants.tenant_registry import TenantRegistry
+
+
+class TenantMiddleware:
+    def __init__(self, app: ASGIApp, settings: Settings, registry: TenantRegistry):
+        self.app = app
+        self._enabled = bool(settings.tenants)
+        self._header = settings.tenant_header
+        self._path_prefix = settings.tenant_path_prefix.rstrip("/") + "/"
+        self._registry = registry
+
+    def _resolve_tenant(self, scope: Scope) -> tuple[Optional[str], Scope]:
+        path = scope["path"]
+        if path.startswith(self._path_prefix):
+            tenant_id, _, remaining_path = path[len(self._path_prefix):].partition("/")
+            remaining_path = f"/{remaining_path}"
+            return tenant_id, {**scope, "path": remaining_path, "raw_path": remaining_path.encode()}
+        return Headers(scope=scope).get(self._header), scope
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._enabled:
+            await self.app(scope, receive, send)
+            return
+
+        tenant_id, scope = self._resolve_tenant(scope)
+        if tenant_id is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._registry.is_known(tenant_id):
+            response = JSONResponse({"detail": f"Unknown tenant {tenant_id}"}, status_code=404)
+            await response(scope, receive, send)
+            return
+
+        try:
+            services = await self._registry.acquire(tenant_id)
+        except HTTPException:
+            response = JSONResponse({"detail": "Service unavailable"}, status_code=500)
+            await response(scope, receive, send)
+            return
+        scope.setdefault("state", {})["tenant_services"] = services
+        context_token = current_tenant_services.set(services)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant_services.reset(context_token)
+            services.release()
@@ -0,0 +1,74 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from app.audit.audit_log import AuditLog
+from app.config import Settings
+from app.tenants.tenant_services import TenantServices
+
+logger = logging.getLogger(__name__)
+
+
+class TenantRegistry:
+    def __init__(self, settings: Settings, audit_log: AuditLog):
+        self._settings = settings
+        self._audit_log = audit_log
+        self._idle_seconds = settings.tenant_idle_seconds
+        self._services: Dict[str, TenantServices] = {}
+        self._creation_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._eviction_task: Optional[asyncio.Task] = None
+
+    def is_known(self, tenant_id: str) -> bool:
+        return tenant_id in self._settings.tenants
+
+    async def acquire(self, tenant_id: str) -> TenantServices:
+        services = self._services.get(tenant_id)
+        if services is None:
+            async with self._creation_locks[tenant_id]:
+                services = self._services.get(tenant_id)
+                if services is None:
+                    services = await TenantServices.create(
+                        self._settings.for_tenant(tenant_id),
+                        audit_log=self._audit_log,
+                        tenant_id=tenant_id
+                    )
+                    self._services[tenant_id] = services
+        services.acquire()
+        return services
+
+    async def evict_idle(self) -> None:
+        now = time.monotonic()
+        idle_tenants = [
+            tenant_id for tenant_id, services in self._services.items()
+            if services.in_flight == 0 and now - services.last_used > self._idle_seconds
+        ]
+        for tenant_id in idle_tenants:
+            services = self._services.pop(tenant_id)
+            try:
+                await services.close()
+            except Exception:
+                logger.exception("Closing services of idle tenant %s failed", tenant_id)
+
+    async def _evict_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(self._idle_seconds / 2, 60.0)))
+            await self.evict_idle()
+
+    def start_idle_eviction(self) -> None:
+        if self._eviction_task is None and self._settings.tenants and self._idle_seconds > 0:
+            self._eviction_task = asyncio.create_task(self._evict_periodically(), context=contextvars.Context())
+
+    async def close(self) -> None:
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+        services, self._services = list(self._services.values()), {}
+        for tenant_services in services:
+            await tenant_services.close()
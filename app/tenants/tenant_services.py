@@ -0,0 +1,137 @@
+import time
+from typing import Optional
+
+from app.audit.audit_log import AuditLog, AuditRecorder
+from app.auth.auth_token_fetcher import AuthTokenFetcher
+from app.auth.auth_token_manager import AuthTokenManager
+from app.auth.auth_token_verifier import AuthTokenVerifier
+from app.auth.caller_authenticator import CallerAuthenticator
+from app.auth.jwks_fetcher import JWKSClient
+from app.authz.authz_manager import AuthzManager
+from app.config import Settings
+from app.events.auth0_log_tailer import Auth0LogTailer
+from app.events.change_feed import ChangeFeed
+from app.events.log_stream_processor import LogStreamProcessor
+from app.organizations.organization_manager import OrganizationManager
+from app.roles.role_manager import RoleManager
+from app.users.user_manager import UserManager
+from app.utils.admission_control import AdmissionController
+
+
+class TenantServices:
+    def __init__(
+            self,
+            settings: Settings,
+            user_manager: UserManager,
+            organization_manager: OrganizationManager,
+            role_manager: RoleManager,
+            token_handler: AuthTokenManager,
+            caller_authenticator: CallerAuthenticator,
+            authz_manager: AuthzManager,
+            log_stream_processor: LogStreamProcessor,
+            change_feed: ChangeFeed,
+            log_tailer: Auth0LogTailer
+    ):
+        self.settings = settings
+        self.user_manager = user_manager
+        self.organization_manager = organization_manager
+        self.role_manager = role_manager
+        self.token_handler = token_handler
+        self.caller_authenticator = caller_authenticator
+        self.authz_manager = authz_manager
+        self.log_stream_processor = log_stream_processor
+        self.change_feed = change_feed
+        self.log_tailer = log_tailer
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    @classmethod
+    async def create(
+            cls,
+            settings: Settings,
+            audit_log: Optional[AuditLog] = None,
+            tenant_id: Optional[str] = None
+    ) -> "TenantServices":
+        admission_controller = AdmissionController.from_settings(settings)
+        change_feed = ChangeFeed(max_events=settings.change_feed_max_events)
+        audit_recorder = AuditRecorder(audit_log=audit_log, tenant_id=tenant_id, change_feed=change_feed)
+        organization_manager = OrganizationManager(
+            settings=settings,
+            admission_controller=admission_controller,
+            audit_recorder=audit_recorder
+        )
+        user_manager = UserManager(
+            settings=settings,
+            organization_manager=organization_manager,
+            admission_controller=admission_controller,
+            audit_recorder=audit_recorder
+        )
+        role_manager = RoleManager(
+            settings=settings,
+            admission_controller=admission_controller,
+            audit_recorder=audit_recorder
+        )
+        verifier_service = AuthTokenVerifier(
+            JWKSClient(
+                auth_url=settings.auth0_url,
+                timeouts=settings.token_timeouts,
+                cache_seconds=settings.jwks_cache_seconds,
+                min_refresh_seconds=settings.jwks_min_refresh_seconds
+            )
+        )
+        token_handler = await AuthTokenManager.create(
+            fetcher_service=AuthTokenFetcher(settings=settings),
+            verifier_service=verifier_service
+        )
+        caller_authenticator = CallerAuthenticator(
+            verifier_service=verifier_service,
+            settings=settings
+        )
+        authz_manager = AuthzManager(
+            settings=settings,
+            user_manager=user_manager,
+            organization_manager=organization_manager,
+            role_manager=role_manager
+        )
+        log_stream_processor = LogStreamProcessor(
+            user_manager=user_manager,
+            organization_manager=organization_manager,
+            role_manager=role_manager,
+            change_feed=change_feed,
+            own_client_id=settings.auth0_client_id,
+            seen_log_ids_max_entries=settings.change_feed_seen_log_ids_max_entries
+        )
+        log_tailer = Auth0LogTailer(
+            settings=settings,
+            log_stream_processor=log_stream_processor,
+            admission_controller=admission_controller
+        )
+        role_manager.start_role_catalogue_refresh(token_handler=token_handler)
+        organization_manager.start_organization_catalogue_refresh(token_handler=token_handler)
+        log_tailer.start(token_handler=token_handler)
+        return cls(
+            settings=settings,
+            user_manager=user_manager,
+            organization_manager=organization_manager,
+            role_manager=role_manager,
+            token_handler=token_handler,
+            caller_authenticator=caller_authenticator,
+            authz_manager=authz_manager,
+            log_stream_processor=log_stream_processor,
+            change_feed=change_feed,
+            log_tailer=log_tailer
+        )
+
+    def acquire(self) -> None:
+        self.in_flight += 1
+        self.last_used = time.monotonic()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        await self.log_tailer.close()
+        await self.user_manager.close()
+        await self.organization_manager.close()
+        await self.role_manager.close()
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Optional, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Header
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
 
-from app.roles.schemas import UserRolesFields
-from app.users.schemas import CreateUserFields, UpdateUserFields, SearchableUserFields
+from app.organizations.organization_manager import OrganizationManager, get_organization_manager_service
+from app.roles.role_manager import RoleManager, get_role_manager_service
+from app.roles.schemas import UserRolesFields, DesiredRolesFields
+from app.users.schemas import CreateUserFields, UpdateUserFields, SearchableUserFields, UserIdsFields
 from app.users.user_manager import UserManager, get_user_manager_service
 from app.utils.api_layer_exceptions import (
     BaseApiException,
@@ -13,11 +18,14 @@ from app.utils.api_layer_exceptions import (
     BadRequestException
 )
 from app.auth.auth_token_manager import get_auth_manager_service, AuthTokenManager
+from app.auth.caller_authenticator import authenticate_caller, require_permissions, get_caller_subject
+from app.jobs.job_manager import JobManager, get_job_manager_service
+from app.jobs.routers import job_accepted_response
 
-router = APIRouter(prefix="/api/v1/users")
+router = APIRouter(prefix="/api/v1/users", dependencies=[Depends(authenticate_caller)])
 
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(require_permissions("create:users"))])
 async def create_user(
         user_fields: CreateUserFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -42,7 +50,7 @@ async def create_user(
         )
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[Depends(require_permissions("delete:users"))])
 async def delete_user(
         user_id: str,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
@@ -66,7 +74,7 @@ async def delete_user(
         )
 
 
-@router.patch("/{user_id}")
+@router.patch("/{user_id}", dependencies=[Depends(require_permissions("update:users"))])
 async def update_user(
         user_id: str,
         updating_fields: UpdateUserFields,
@@ -93,16 +101,64 @@ async def update_user(
         )
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(require_permissions("read:users"))])
 async def get_users(
         query_parameters: SearchableUserFields = Depends(),
+        ids: Optional[List[str]] = Query(default=None, description="User IDs, repeated or comma separated"),
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         user_manager_service: UserManager = Depends(get_user_manager_service),
 ):
     try:
-        users_data = await user_manager_service.get_users(
-            auth_token=await token_handler.token,
-            query_parameters=query_parameters
+        if ids:
+            users_data = await user_manager_service.get_users_by_ids(
+                auth_token=await token_handler.token,
+                user_ids=[user_id for value in ids for user_id in value.split(',') if user_id],
+                query_parameters=query_parameters
+            )
+        else:
+            users_data = await user_manager_service.get_users(
+                auth_token=await token_handler.token,
+                query_parameters=query_parameters
+            )
+        json_compatible_data = jsonable_encoder(users_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.post("/batch-get", dependencies=[Depends(require_permissions("read:users"))])
+async def get_users_by_ids(
+        user_ids_fields: UserIdsFields,
+        background: bool = False,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        user_manager_service: UserManager = Depends(get_user_manager_service),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        auth_token = await token_handler.token
+        if background:
+            job = job_manager_service.submit(
+                operation_name="get_users_by_ids",
+                operation=lambda progress: user_manager_service.get_users_by_ids(
+                    auth_token=auth_token,
+                    user_ids=user_ids_fields.ids,
+                    progress=progress
+                ),
+                owner=caller_subject
+            )
+            return job_accepted_response(job)
+        users_data = await user_manager_service.get_users_by_ids(
+            auth_token=auth_token,
+            user_ids=user_ids_fields.ids
         )
         json_compatible_data = jsonable_encoder(users_data)
         return JSONResponse(content=json_compatible_data)
@@ -118,18 +174,98 @@ async def get_users(
         )
 
 
-@router.get("/{user_id}/roles")
+@router.get("/{user_id}", dependencies=[Depends(require_permissions("read:users"))])
+async def get_user(
+        user_id: str,
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        user_manager_service: UserManager = Depends(get_user_manager_service)
+):
+    try:
+        user_data = await user_manager_service.get_user(
+            auth_token=await token_handler.token,
+            user_id=user_id
+        )
+        json_compatible_data = jsonable_encoder(user_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/{user_id}/roles", dependencies=[Depends(require_permissions("read:users"))])
 async def get_user_roles(
         user_id: str,
+        accept_encoding: Optional[str] = Header(default=None),
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
         organization_manager_service: UserManager = Depends(get_user_manager_service)
 ):
     try:
-        organizations_roles_data = await organization_manager_service.get_user_roles(
+        user_roles_response = await organization_manager_service.stream_user_roles(
             auth_token=await token_handler.token,
-            user_id=user_id
+            user_id=user_id,
+            accept_encoding=accept_encoding
         )
-        json_compatible_data = jsonable_encoder(organizations_roles_data)
+        return user_roles_response.to_response()
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
+
+
+@router.get("/{user_id}/permissions", dependencies=[Depends(require_permissions("read:users"))])
+async def get_user_permissions(
+        user_id: str,
+        organization_id: Optional[str] = None,
+        background: bool = False,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        user_manager_service: UserManager = Depends(get_user_manager_service),
+        organization_manager_service: OrganizationManager = Depends(get_organization_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    async def load_permissions(progress=None):
+        roles_lookups = [
+            user_manager_service.get_user_roles(auth_token=auth_token, user_id=user_id, use_cache=True)
+        ]
+        if organization_id:
+            roles_lookups.append(organization_manager_service.get_user_roles_in_organization(
+                auth_token=auth_token,
+                organization_id=organization_id,
+                user_id=user_id,
+                use_cache=True
+            ))
+        roles_lists = await asyncio.gather(*roles_lookups)
+        return await role_manager_service.get_effective_permissions(
+            auth_token=auth_token,
+            role_ids=[role.id for roles in roles_lists for role in roles],
+            progress=progress
+        )
+
+    try:
+        auth_token = await token_handler.token
+        if background:
+            job = job_manager_service.submit(
+                operation_name="get_user_permissions",
+                operation=load_permissions,
+                owner=caller_subject
+            )
+            return job_accepted_response(job)
+        permissions_data = await load_permissions()
+        json_compatible_data = jsonable_encoder(permissions_data)
         return JSONResponse(content=json_compatible_data)
     except (NotFoundException, BadRequestException) as e:
         raise HTTPException(
@@ -143,18 +279,23 @@ async def get_user_roles(
         )
 
 
-@router.delete("/{user_id}/roles")
+@router.delete("/{user_id}/roles", dependencies=[Depends(require_permissions("update:users"))])
 async def delete_users_rolesr(
         user_id: str,
         organization_user_fields: UserRolesFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
-        organization_manager_service: UserManager = Depends(get_user_manager_service)
+        organization_manager_service: UserManager = Depends(get_user_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
 ):
     try:
+        auth_token = await token_handler.token
         await organization_manager_service.delete_user_roles(
-            auth_token=await token_handler.token,
+            auth_token=auth_token,
             user_id=user_id,
-            members_roles_fields=organization_user_fields
+            members_roles_fields=await role_manager_service.resolve_role_ids(
+                auth_token=auth_token,
+                members_roles_fields=organization_user_fields
+            )
         )
         return Response(status_code=204)
     except (NotFoundException, BadRequestException) as e:
@@ -169,18 +310,23 @@ async def delete_users_rolesr(
         )
 
 
-@router.post("/{user_id}/roles")
+@router.post("/{user_id}/roles", dependencies=[Depends(require_permissions("update:users"))])
 async def assign_user_roles(
         user_id: str,
         organization_user_fields: UserRolesFields,
         token_handler: AuthTokenManager = Depends(get_auth_manager_service),
-        organization_manager_service: UserManager = Depends(get_user_manager_service)
+        organization_manager_service: UserManager = Depends(get_user_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service)
 ):
     try:
+        auth_token = await token_handler.token
         await organization_manager_service.assign_user_roles(
-            auth_token=await token_handler.token,
+            auth_token=auth_token,
             user_id=user_id,
-            members_roles_fields=organization_user_fields
+            members_roles_fields=await role_manager_service.resolve_role_ids(
+                auth_token=auth_token,
+                members_roles_fields=organization_user_fields
+            )
         )
         return Response(status_code=204)
     except (NotFoundException, BadRequestException) as e:
@@ -193,3 +339,51 @@ async def assign_user_roles(
             status_code=500,
             detail="Service unavailable"
         )
+
+
+@router.put("/{user_id}/roles", dependencies=[Depends(require_permissions("update:users"))])
+async def reconcile_user_roles(
+        user_id: str,
+        desired_roles: DesiredRolesFields,
+        background: bool = False,
+        caller_subject: Optional[str] = Depends(get_caller_subject),
+        token_handler: AuthTokenManager = Depends(get_auth_manager_service),
+        user_manager_service: UserManager = Depends(get_user_manager_service),
+        role_manager_service: RoleManager = Depends(get_role_manager_service),
+        job_manager_service: JobManager = Depends(get_job_manager_service)
+):
+    try:
+        auth_token = await token_handler.token
+        resolved_roles = await role_manager_service.resolve_role_ids(
+            auth_token=auth_token,
+            members_roles_fields=desired_roles
+        )
+        if background:
+            job = job_manager_service.submit(
+                operation_name="reconcile_user_roles",
+                operation=lambda progress: user_manager_service.reconcile_user_roles(
+                    auth_token=auth_token,
+                    user_id=user_id,
+                    desired_roles=resolved_roles,
+                    progress=progress
+                ),
+                owner=caller_subject
+            )
+            return job_accepted_response(job)
+        reconciliation_data = await user_manager_service.reconcile_user_roles(
+            auth_token=auth_token,
+            user_id=user_id,
+            desired_roles=resolved_roles
+        )
+        json_compatible_data = jsonable_encoder(reconciliation_data)
+        return JSONResponse(content=json_compatible_data)
+    except (NotFoundException, BadRequestException) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except (ServiceUnavailableException, BaseApiException):
+        raise HTTPException(
+            status_code=500,
+            detail="Service unavailable"
+        )
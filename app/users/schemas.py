@@ -1,8 +1,11 @@
+import re
 from collections import OrderedDict
 
 from pydantic import BaseModel, Field, EmailStr, HttpUrl
 from fastapi import Query
-from typing import Optional, Dict, List, Literal
+from typing import ClassVar, Optional, Dict, List, Literal
+
+from app.utils.lucene_query_compiler import LuceneQueryCompiler
 
 
 class CreateUserFields(BaseModel):
@@ -35,18 +38,52 @@ class SearchableUserFields(BaseModel):
     given_name: Optional[str] = Query(default=None, description="User's given name")
     family_name: Optional[str] = Query(default=None, description="User's family name")
 
+    non_searchable_fields: ClassVar[tuple[str, ...]] = ('organization_id',)
+    locally_matched_fields: ClassVar[tuple[str, ...]] = ('created_at', 'name', 'given_name', 'family_name')
+
+    def to_query_clauses(self) -> List[str]:
+        base_dict = self.dict(exclude_none=True, exclude=set(self.non_searchable_fields))
+        return [
+            LuceneQueryCompiler.term(parameter, value) for parameter, value in base_dict.items()
+        ]
+
+    @staticmethod
+    def _matches_created_at(actual: str, expected: str) -> bool:
+        range_match = re.match(r'^([\[{])(\S+) TO (\S+)([\]}])$', expected)
+        if not range_match:
+            return actual.startswith(expected)
+        lower_bracket, lower, upper, upper_bracket = range_match.groups()
+        if lower != '*' and (actual < lower or (lower_bracket == '{' and actual == lower)):
+            return False
+        if upper != '*' and (actual[:len(upper)] > upper or (upper_bracket == '}' and actual[:len(upper)] == upper)):
+            return False
+        return True
+
+    def matches(self, user_data: Dict) -> bool:
+        for field in self.locally_matched_fields:
+            expected = getattr(self, field)
+            if expected is None:
+                continue
+            actual = str(user_data.get(field) or '')
+            if field == 'created_at':
+                if not self._matches_created_at(actual, expected):
+                    return False
+            elif actual.casefold() != expected.casefold():
+                return False
+        return True
+
     def to_query_params(self) -> Dict:
         ordered_dict = OrderedDict()
-        base_dict = self.dict(exclude_none=True)
         ordered_dict['include_fields'] = 'true'
-        query_string = '&'.join(
-            f"{parameter}:{value}" for parameter, value in base_dict.items()
-        )
-        ordered_dict['q'] = query_string
+        ordered_dict['q'] = LuceneQueryCompiler.all_of(self.to_query_clauses())
         ordered_dict['search_engine'] = 'v3'
         return ordered_dict
 
 
+class UserIdsFields(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000, description="List of user IDs")
+
+
 class Identity(BaseModel):
     connection: str = Field(..., description="The connection type for the identity")
     user_id: str = Field(..., description="The user ID for the identity")
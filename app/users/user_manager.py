@@ -1,33 +1,171 @@
-from typing import Optional
+import asyncio
+from typing import Awaitable, Callable, Optional
 
 from fastapi import Request
 
-from app.roles.schemas import RoleFields, UserRolesFields
+from app.audit.audit_log import AuditRecorder
+from app.organizations.organization_manager import OrganizationManager
+from app.roles.schemas import RoleFields, UserRolesFields, DesiredRolesFields, RolesReconciliationFields
+from app.tenants.tenant_context import get_tenant_services
 from app.users.schemas import SearchableUserFields, CreateUserFields, UpdateUserFields, UserFields
 from app.users.users_manager_api_layer import UserManagerApiLayer
 from app.config import Settings
+from app.utils.admission_control import AdmissionController
+from app.utils.lucene_query_compiler import LuceneQueryCompiler
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.negative_cache import NegativeCache
+from app.utils.passthrough import PassthroughResponse
+from app.utils.ttl_cache import TTLCache
 
 
 class UserManager:
-    def __init__(self, settings: Settings):
+    def __init__(
+            self,
+            settings: Settings,
+            organization_manager: OrganizationManager,
+            admission_controller: Optional[AdmissionController] = None,
+            audit_recorder: Optional[AuditRecorder] = None
+    ):
         self._settings = settings
+        self._organization_manager = organization_manager
+        self._audit = audit_recorder or AuditRecorder()
         self._api_layer = UserManagerApiLayer(
-            auth_url=self._settings.auth0_url
+            auth_url=self._settings.auth0_url,
+            settings=self._settings,
+            admission_controller=admission_controller
+        )
+        self._role_assignment_batcher = MicroBatcher(
+            flush=self._assign_user_roles_upstream,
+            window_seconds=self._settings.mutation_batch_window_ms / 1000,
+            max_items=self._settings.mutation_batch_max_items
+        )
+        self._missing_users = NegativeCache(
+            resource_name="user",
+            ttl_seconds=self._settings.negative_cache_ttl_seconds,
+            max_entries=self._settings.negative_cache_max_entries
+        )
+        self._user_roles_cache: TTLCache[list[RoleFields]] = TTLCache(
+            ttl_seconds=self._settings.user_roles_cache_ttl_seconds,
+            max_entries=self._settings.user_roles_cache_max_entries
         )
 
+    async def close(self) -> None:
+        await self._api_layer.close()
+
+    def invalidate_user(self, user_id: str, deleted: bool = False) -> None:
+        if deleted:
+            self._missing_users.mark_missing(user_id)
+        else:
+            self._missing_users.discard(user_id)
+        self._user_roles_cache.invalidate(user_id)
+        self._api_layer.invalidate_cached_reads(f'/users/{user_id}')
+        self._api_layer.invalidate_cached_reads('/users', include_subpaths=False)
+
+    def invalidate_user_roles(self, user_id: str) -> None:
+        self._user_roles_cache.invalidate(user_id)
+        self._api_layer.invalidate_cached_reads(f'/users/{user_id}/roles')
+
     async def get_users(
             self,
             auth_token: str,
             query_parameters: Optional[SearchableUserFields] = None
     ) -> list[UserFields] | list:
+        if query_parameters is None:
+            query_parameters = SearchableUserFields()
+        if query_parameters.email:
+            users_data = await self._api_layer.make_request(
+                method="GET",
+                endpoint='/users-by-email',
+                auth_token=auth_token,
+                params={'email': query_parameters.email}
+            )
+            users_data = [user_data for user_data in users_data if query_parameters.matches(user_data)]
+            if users_data and query_parameters.organization_id:
+                member_ids = set(await self._organization_manager.get_organization_member_ids(
+                    auth_token=auth_token,
+                    organization_id=query_parameters.organization_id
+                ))
+                users_data = [user_data for user_data in users_data if user_data['user_id'] in member_ids]
+            return [UserFields(**user_data) for user_data in users_data]
+        if query_parameters.organization_id:
+            return await self.get_users_by_ids(
+                auth_token=auth_token,
+                user_ids=await self._organization_manager.get_organization_member_ids(
+                    auth_token=auth_token,
+                    organization_id=query_parameters.organization_id
+                ),
+                query_parameters=query_parameters.model_copy(update={'organization_id': None})
+            )
         users_data = await self._api_layer.make_request(
             method="GET",
             endpoint='/users',
             auth_token=auth_token,
-            params=query_parameters.to_query_params() if query_parameters else {}
+            params=query_parameters.to_query_params(),
+            endpoint_class="search"
         )
         return [UserFields(**user_data) for user_data in users_data]
 
+    async def get_users_by_ids(
+            self,
+            auth_token: str,
+            user_ids: list[str],
+            query_parameters: Optional[SearchableUserFields] = None,
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> list[UserFields] | list:
+        requested_ids = [
+            user_id for user_id in dict.fromkeys(user_ids) if not self._missing_users.is_missing(user_id)
+        ]
+        if query_parameters and query_parameters.organization_id:
+            member_ids = set(await self._organization_manager.get_organization_member_ids(
+                auth_token=auth_token,
+                organization_id=query_parameters.organization_id
+            ))
+            requested_ids = [user_id for user_id in requested_ids if user_id in member_ids]
+        filter_clauses = query_parameters.to_query_clauses() if query_parameters else []
+        chunk_size = self._settings.user_batch_get_chunk_size
+        semaphore = asyncio.Semaphore(self._settings.user_batch_get_concurrency)
+
+        ids_clauses = list(LuceneQueryCompiler.chunked_any_of('user_id', requested_ids, chunk_size))
+        fetched_chunks = 0
+
+        async def fetch_chunk(ids_clause: str) -> list[dict]:
+            nonlocal fetched_chunks
+            async with semaphore:
+                chunk_data = await self._api_layer.make_request(
+                    method="GET",
+                    endpoint='/users',
+                    auth_token=auth_token,
+                    params={
+                        'q': LuceneQueryCompiler.all_of([ids_clause, *filter_clauses]),
+                        'search_engine': 'v3',
+                        'per_page': chunk_size
+                    },
+                    endpoint_class="search"
+                )
+            fetched_chunks += 1
+            if progress is not None:
+                progress("chunks", fetched_chunks, len(ids_clauses))
+            return chunk_data
+
+        chunks_data = await asyncio.gather(*(fetch_chunk(ids_clause) for ids_clause in ids_clauses))
+        users_by_id = {user_data['user_id']: user_data for chunk_data in chunks_data for user_data in chunk_data}
+        return [UserFields(**users_by_id[user_id]) for user_id in requested_ids if user_id in users_by_id]
+
+    async def get_user(
+            self,
+            auth_token: str,
+            user_id: str
+    ) -> UserFields:
+        user_data = await self._missing_users.guard(
+            user_id,
+            lambda: self._api_layer.make_request(
+                method="GET",
+                endpoint=f'/users/{user_id}',
+                auth_token=auth_token,
+            )
+        )
+        return UserFields(**user_data)
+
     async def delete_user(
             self,
             auth_token: str,
@@ -38,6 +176,8 @@ class UserManager:
             endpoint=f'/users/{user_id}',
             auth_token=auth_token,
         )
+        self.invalidate_user(user_id, deleted=True)
+        await self._audit.record("user.delete", "user", user_id)
 
     async def update_user(
             self,
@@ -45,11 +185,18 @@ class UserManager:
             user_id: str,
             updating_fields: UpdateUserFields
     ) -> UserFields:
-        updated_user_data = await self._api_layer.make_request(
-            method="PATCH",
-            endpoint=f'/users/{user_id}',
-            auth_token=auth_token,
-            content=updating_fields.model_dump_json(exclude_none=True)
+        updated_user_data = await self._missing_users.guard(
+            user_id,
+            lambda: self._api_layer.make_request(
+                method="PATCH",
+                endpoint=f'/users/{user_id}',
+                auth_token=auth_token,
+                content=updating_fields.model_dump_json(exclude_none=True)
+            )
+        )
+        await self._audit.record(
+            "user.update", "user", user_id,
+            fields=sorted(updating_fields.model_dump(exclude_none=True))
         )
         return UserFields(**updated_user_data)
 
@@ -64,19 +211,39 @@ class UserManager:
             auth_token=auth_token,
             content=user_fields.model_dump_json(exclude_none=True)
         )
-        return UserFields(**created_user_data)
+        created_user = UserFields(**created_user_data)
+        self._missing_users.discard(created_user.user_id)
+        await self._audit.record("user.create", "user", created_user.user_id)
+        return created_user
 
     async def assign_user_roles(
             self,
             auth_token: str,
             user_id: str,
             members_roles_fields: UserRolesFields
+    ) -> None:
+        self._missing_users.raise_if_missing(user_id)
+        try:
+            await self._role_assignment_batcher.submit(
+                key=user_id,
+                items=members_roles_fields.roles,
+                auth_token=auth_token
+            )
+        finally:
+            self._user_roles_cache.invalidate(user_id)
+        await self._audit.record("user.roles.assign", "user", user_id, roles=members_roles_fields.roles)
+
+    async def _assign_user_roles_upstream(
+            self,
+            user_id: str,
+            roles: list[str],
+            auth_token: str
     ) -> None:
         await self._api_layer.make_request(
             method="POST",
             endpoint=f'/users/{user_id}/roles',
             auth_token=auth_token,
-            content=members_roles_fields.model_dump_json(exclude_none=True)
+            content=UserRolesFields(roles=roles).model_dump_json(exclude_none=True)
         )
 
     async def delete_user_roles(
@@ -85,25 +252,96 @@ class UserManager:
             user_id: str,
             members_roles_fields: UserRolesFields
     ) -> None:
-        await self._api_layer.make_request(
-            method="DELETE",
-            endpoint=f'/users/{user_id}/roles',
-            auth_token=auth_token,
-            content=members_roles_fields.model_dump_json(exclude_none=True)
-        )
+        self._missing_users.raise_if_missing(user_id)
+        try:
+            await self._api_layer.make_request(
+                method="DELETE",
+                endpoint=f'/users/{user_id}/roles',
+                auth_token=auth_token,
+                content=members_roles_fields.model_dump_json(exclude_none=True)
+            )
+        finally:
+            self._user_roles_cache.invalidate(user_id)
+        await self._audit.record("user.roles.delete", "user", user_id, roles=members_roles_fields.roles)
 
     async def get_user_roles(
             self,
             auth_token: str,
-            user_id: str
+            user_id: str,
+            use_cache: bool = False
     ) -> list[RoleFields] | list:
-        user_roles = await self._api_layer.make_request(
-            method="GET",
-            endpoint=f'/users/{user_id}/roles',
-            auth_token=auth_token,
+        if use_cache:
+            cached_user_roles = self._user_roles_cache.get(user_id)
+            if cached_user_roles is not None:
+                return cached_user_roles
+        user_roles = await self._missing_users.guard(
+            user_id,
+            lambda: self._api_layer.make_paginated_request(
+                endpoint=f'/users/{user_id}/roles',
+                auth_token=auth_token,
+                items_key='roles'
+            )
+        )
+        user_roles = [RoleFields(**user_role) for user_role in user_roles]
+        self._user_roles_cache.put(user_id, user_roles)
+        return user_roles
+
+    async def stream_user_roles(
+            self,
+            auth_token: str,
+            user_id: str,
+            accept_encoding: Optional[str] = None
+    ) -> PassthroughResponse:
+        return await self._missing_users.guard(
+            user_id,
+            lambda: self._api_layer.make_passthrough_request(
+                endpoint=f'/users/{user_id}/roles',
+                auth_token=auth_token,
+                accept_encoding=accept_encoding,
+                validate=lambda user_roles: [RoleFields(**user_role) for user_role in user_roles]
+            )
+        )
+
+    async def reconcile_user_roles(
+            self,
+            auth_token: str,
+            user_id: str,
+            desired_roles: DesiredRolesFields,
+            progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> RolesReconciliationFields:
+        current_role_ids = {role.id for role in await self.get_user_roles(auth_token=auth_token, user_id=user_id)}
+        desired_role_ids = list(dict.fromkeys(desired_roles.roles))
+        roles_to_assign = [role_id for role_id in desired_role_ids if role_id not in current_role_ids]
+        roles_to_remove = sorted(current_role_ids.difference(desired_role_ids))
+        role_changes = []
+        if roles_to_assign:
+            role_changes.append(self.assign_user_roles(
+                auth_token=auth_token,
+                user_id=user_id,
+                members_roles_fields=UserRolesFields(roles=roles_to_assign)
+            ))
+        if roles_to_remove:
+            role_changes.append(self.delete_user_roles(
+                auth_token=auth_token,
+                user_id=user_id,
+                members_roles_fields=UserRolesFields(roles=roles_to_remove)
+            ))
+        applied_changes = 0
+
+        async def apply_change(role_change: Awaitable[None]) -> None:
+            nonlocal applied_changes
+            await role_change
+            applied_changes += 1
+            if progress is not None:
+                progress("changes", applied_changes, len(role_changes))
+
+        await asyncio.gather(*(apply_change(role_change) for role_change in role_changes))
+        return RolesReconciliationFields(
+            assigned=roles_to_assign,
+            removed=roles_to_remove,
+            unchanged=len(current_role_ids.intersection(desired_role_ids))
         )
-        return [RoleFields(**user_role) for user_role in user_roles]
 
 
 def get_user_manager_service(request: Request) -> UserManager:
-    return request.app.state.user_manager
+    return get_tenant_services(request).user_manager
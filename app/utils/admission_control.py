@@ -0,0 +1,138 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.config import Settings
+from app.utils.request_context import get_remaining_time
+
+
+class RateLimitedException(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def resize(self, rate: float, burst: float, now: float) -> None:
+        self._refill(now)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, burst)
+
+
+class _CallerState:
+    def __init__(self, weight: float, bucket: _TokenBucket, now: float):
+        self.weight = weight
+        self.bucket = bucket
+        self.last_seen = now
+        self.waiting = 0
+
+
+class AdmissionController:
+    anonymous_caller = "anonymous"
+
+    def __init__(
+            self,
+            rate_per_second: float,
+            burst: float,
+            default_weight: float = 1.0,
+            caller_weights: Optional[Dict[str, float]] = None,
+            max_queue_per_caller: int = 20,
+            max_wait_seconds: float = 2.0,
+            active_caller_seconds: float = 10.0
+    ):
+        self._rate = rate_per_second
+        self._burst = burst
+        self._default_weight = default_weight
+        self._caller_weights = caller_weights or {}
+        self._max_queue_per_caller = max_queue_per_caller
+        self._max_wait_seconds = max_wait_seconds
+        self._active_caller_seconds = active_caller_seconds
+        self._budget = _TokenBucket(rate_per_second, burst, time.monotonic())
+        self._callers: Dict[str, _CallerState] = {}
+        self._pruned_at = time.monotonic()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["AdmissionController"]:
+        if not settings.admission_rate_per_second:
+            return None
+        return cls(
+            rate_per_second=settings.admission_rate_per_second,
+            burst=settings.admission_burst,
+            default_weight=settings.admission_default_weight,
+            caller_weights=settings.admission_caller_weights,
+            max_queue_per_caller=settings.admission_max_queue_per_caller,
+            max_wait_seconds=settings.admission_max_wait_seconds,
+            active_caller_seconds=settings.admission_active_caller_seconds
+        )
+
+    def _rebalance(self, now: float) -> None:
+        total_weight = sum(caller.weight for caller in self._callers.values())
+        for caller in self._callers.values():
+            share = caller.weight / total_weight
+            caller.bucket.resize(self._rate * share, max(1.0, self._burst * share), now)
+
+    def _get_caller(self, caller_id: str, now: float) -> _CallerState:
+        rebalance = False
+        if now - self._pruned_at >= 1.0:
+            self._pruned_at = now
+            expired_callers = [
+                expired_id for expired_id, caller in self._callers.items()
+                if caller.waiting == 0 and now - caller.last_seen > self._active_caller_seconds
+            ]
+            for expired_id in expired_callers:
+                del self._callers[expired_id]
+            rebalance = bool(expired_callers)
+        caller = self._callers.get(caller_id)
+        if caller is None:
+            caller = _CallerState(
+                weight=self._caller_weights.get(caller_id, self._default_weight),
+                bucket=_TokenBucket(self._rate, self._burst, now),
+                now=now
+            )
+            self._callers[caller_id] = caller
+            rebalance = True
+        if rebalance:
+            self._rebalance(now)
+        caller.last_seen = now
+        return caller
+
+    async def admit(self, caller_id: Optional[str]) -> None:
+        now = time.monotonic()
+        caller = self._get_caller(caller_id or self.anonymous_caller, now)
+        wait = max(caller.bucket.wait_time(now), self._budget.wait_time(now))
+        if caller.waiting >= self._max_queue_per_caller:
+            raise RateLimitedException("Too many queued upstream requests for caller", retry_after=max(wait, 1.0))
+        max_wait = self._max_wait_seconds
+        remaining_time = get_remaining_time()
+        if remaining_time is not None:
+            max_wait = min(max_wait, remaining_time)
+        if wait > max_wait:
+            raise RateLimitedException("Caller exceeded its share of the upstream rate budget", retry_after=wait)
+        caller.bucket.reserve(now)
+        self._budget.reserve(now)
+        if wait <= 0:
+            return
+        caller.waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            caller.waiting -= 1
@@ -1,19 +1,32 @@
-from typing import Optional, Dict, Any
+import asyncio
+import json
+import time
+from typing import Optional, Dict, Any, Hashable, Callable
 
 import httpx
 
+from app.config import Settings
 from app.utils.api_layer_exceptions import (
     BaseApiException,
     NotFoundException,
     ConflictException,
     ServiceUnavailableException,
-    BadRequestException
+    BadRequestException,
+    CircuitOpenException
 )
+from app.utils.admission_control import AdmissionController
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.passthrough import PassthroughResponse
+from app.utils.request_context import mark_response_stale, get_caller_id, new_background_context
+from app.utils.stale_cache import StaleResponseCache
+from app.utils.timeouts import build_timeout
 
 
 class BaseApiLayer:
-    def __init__(self, auth_url: str):
+    def __init__(self, auth_url: str, settings: Settings, admission_controller: Optional[AdmissionController] = None):
         self._api_url = f"{auth_url}/api/v2"
+        self._settings = settings
+        self._admission_controller = admission_controller
         self._base_headers = {
             'Accept': 'application/json',
             'Content-Type': 'application/json'
@@ -25,12 +38,144 @@ class BaseApiLayer:
             503: ServiceUnavailableException,
             'default': BaseApiException
         }
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._stale_cache = StaleResponseCache(max_entries=settings.stale_cache_max_entries)
+        self._probe_tasks: set[asyncio.Task] = set()
+        self._client: httpx.AsyncClient | None = None
+        self._closed = False
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._closed:
+            raise ServiceUnavailableException("Upstream client is closed")
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self._settings.upstream_max_connections,
+                    max_keepalive_connections=self._settings.upstream_max_keepalive_connections
+                )
+            )
+        return self._client
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def _get_headers(self, auth_token: str) -> dict:
         headers = self._base_headers.copy()
         headers['Authorization'] = f'Bearer {auth_token}'
         return headers
 
+    @staticmethod
+    def _get_endpoint_family(endpoint: str) -> str:
+        return endpoint.lstrip('/').split('/', 1)[0]
+
+    def _get_circuit_breaker(self, endpoint_family: str) -> CircuitBreaker:
+        circuit_breaker = self._circuit_breakers.get(endpoint_family)
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(
+                failure_ratio_threshold=self._settings.circuit_breaker_failure_ratio,
+                slow_call_seconds=self._settings.circuit_breaker_slow_call_seconds,
+                minimum_calls=self._settings.circuit_breaker_minimum_calls,
+                window_size=self._settings.circuit_breaker_window_size,
+                open_seconds=self._settings.circuit_breaker_open_seconds
+            )
+            self._circuit_breakers[endpoint_family] = circuit_breaker
+        return circuit_breaker
+
+    @staticmethod
+    def _get_cache_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Hashable | None:
+        if method != "GET":
+            return None
+        return endpoint, json.dumps(params or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def _is_upstream_failure(error: httpx.HTTPError) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500 or error.response.status_code == 429
+        return True
+
+    def _map_exception(self, error: httpx.HTTPError) -> BaseApiException:
+        if isinstance(error, httpx.HTTPStatusError):
+            exception_to_rise = self._exceptions_dict.get(error.response.status_code)
+            if exception_to_rise:
+                return exception_to_rise(error)
+        return self._exceptions_dict['default'](error)
+
+    def invalidate_cached_reads(self, endpoint: str, include_subpaths: bool = True) -> None:
+        self._stale_cache.invalidate_where(
+            lambda key: key[0] == endpoint or (include_subpaths and key[0].startswith(f'{endpoint}/'))
+        )
+
+    async def _admit(self) -> None:
+        if self._admission_controller is not None:
+            await self._admission_controller.admit(get_caller_id())
+
+    def _serve_stale(self, cache_key: Hashable | None, error: BaseApiException) -> Dict:
+        cache_entry = self._stale_cache.get(cache_key) if cache_key is not None else None
+        if cache_entry is None:
+            raise error
+        mark_response_stale(age=cache_entry.age)
+        return cache_entry.data
+
+    def _schedule_probe(self, endpoint_family: str, auth_token: str) -> None:
+        circuit_breaker = self._get_circuit_breaker(endpoint_family)
+        if not circuit_breaker.try_acquire_probe():
+            return
+        task = asyncio.create_task(
+            self._probe(circuit_breaker, endpoint_family, auth_token),
+            context=new_background_context(caller_id=get_caller_id())
+        )
+        self._probe_tasks.add(task)
+        task.add_done_callback(self._probe_tasks.discard)
+
+    async def _probe(self, circuit_breaker: CircuitBreaker, endpoint_family: str, auth_token: str) -> None:
+        try:
+            await self._send(
+                method="GET",
+                url=f"{self._api_url}/{endpoint_family}",
+                headers=self._get_headers(auth_token),
+                params={'per_page': 1},
+                content=None,
+                endpoint_class="crud"
+            )
+        except httpx.HTTPError as e:
+            circuit_breaker.record_probe_result(succeeded=not self._is_upstream_failure(e))
+        except BaseApiException:
+            circuit_breaker.record_probe_result(succeeded=False)
+        else:
+            circuit_breaker.record_probe_result(succeeded=True)
+
+    async def _send(
+            self,
+            method: str,
+            url: str,
+            headers: dict,
+            params: Optional[Dict[str, Any]],
+            content: Optional[str],
+            endpoint_class: str,
+            stream: bool = False,
+    ) -> httpx.Response:
+        upstream_timeouts = self._settings.upstream_timeouts.get(
+            endpoint_class,
+            self._settings.upstream_timeouts["crud"]
+        )
+        client = self._get_client()
+        request = client.build_request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            content=content,
+            timeout=build_timeout(upstream_timeouts),
+        )
+        response = await client.send(request, stream=stream)
+        if stream and response.is_error:
+            await response.aread()
+        response.raise_for_status()
+        return response
+
     async def make_request(
             self,
             method: str,
@@ -38,24 +183,157 @@ class BaseApiLayer:
             auth_token: str,
             params: Optional[Dict[str, Any]] = None,
             content: Optional[str] = None,
+            endpoint_class: str = "crud",
     ) -> Dict | None:
         url = f"{self._api_url}{endpoint}"
         headers = self._get_headers(auth_token)
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    content=content,
-                )
-                response.raise_for_status()
-                return response.json() if response.status_code != 204 else None
-            except httpx.RequestError as e:
-                raise self._exceptions_dict['default'](e)
-            except httpx.HTTPStatusError as e:
-                exception_to_rise = self._exceptions_dict.get(e.response.status_code)
-                if exception_to_rise:
-                    raise exception_to_rise(e)
-                raise self._exceptions_dict['default'](e)
+        endpoint_family = self._get_endpoint_family(endpoint)
+        circuit_breaker = self._get_circuit_breaker(endpoint_family)
+        cache_key = self._get_cache_key(method, endpoint, params)
+
+        if not circuit_breaker.allow_request():
+            self._schedule_probe(endpoint_family, auth_token)
+            return self._serve_stale(
+                cache_key,
+                CircuitOpenException(f"Upstream '{endpoint_family}' endpoints are unavailable")
+            )
+
+        await self._admit()
+        started_at = time.monotonic()
+        try:
+            response = await self._send(method, url, headers, params, content, endpoint_class)
+        except httpx.HTTPError as e:
+            if not self._is_upstream_failure(e):
+                circuit_breaker.record_success(time.monotonic() - started_at)
+                raise self._map_exception(e)
+            circuit_breaker.record_failure()
+            return self._serve_stale(cache_key, self._map_exception(e))
+        circuit_breaker.record_success(time.monotonic() - started_at)
+
+        response_data = response.json() if response.status_code != 204 else None
+        if cache_key is not None:
+            self._stale_cache.put(cache_key, response_data)
+        return response_data
+
+    async def make_paginated_request(
+            self,
+            endpoint: str,
+            auth_token: str,
+            items_key: str,
+            params: Optional[Dict[str, Any]] = None,
+            per_page: int = 100,
+            endpoint_class: str = "crud",
+    ) -> list[Dict]:
+        items = []
+        page = 0
+        while True:
+            page_data = await self.make_request(
+                method="GET",
+                endpoint=endpoint,
+                auth_token=auth_token,
+                params={**(params or {}), 'page': page, 'per_page': per_page, 'include_totals': 'true'},
+                endpoint_class=endpoint_class,
+            )
+            page_items = page_data.get(items_key, [])
+            items.extend(page_items)
+            if len(page_items) < per_page or len(items) >= page_data.get('total', 0):
+                return items
+            page += 1
+
+    async def make_checkpoint_paginated_request(
+            self,
+            endpoint: str,
+            auth_token: str,
+            items_key: str,
+            params: Optional[Dict[str, Any]] = None,
+            take: int = 100,
+            endpoint_class: str = "crud",
+    ) -> list[Dict]:
+        items = []
+        checkpoint = None
+        while True:
+            page_params = {**(params or {}), 'take': take}
+            if checkpoint:
+                page_params['from'] = checkpoint
+            page_data = await self.make_request(
+                method="GET",
+                endpoint=endpoint,
+                auth_token=auth_token,
+                params=page_params,
+                endpoint_class=endpoint_class,
+            )
+            items.extend(page_data.get(items_key, []))
+            checkpoint = page_data.get('next')
+            if not checkpoint:
+                return items
+
+    async def make_passthrough_request(
+            self,
+            endpoint: str,
+            auth_token: str,
+            params: Optional[Dict[str, Any]] = None,
+            endpoint_class: str = "crud",
+            accept_encoding: Optional[str] = None,
+            validate: Optional[Callable[[Any], Any]] = None,
+    ) -> PassthroughResponse:
+        url = f"{self._api_url}{endpoint}"
+        headers = self._get_headers(auth_token)
+        headers['Accept-Encoding'] = accept_encoding or 'identity'
+        endpoint_family = self._get_endpoint_family(endpoint)
+        circuit_breaker = self._get_circuit_breaker(endpoint_family)
+        cache_key = self._get_cache_key("GET", endpoint, params)
+
+        if not circuit_breaker.allow_request():
+            self._schedule_probe(endpoint_family, auth_token)
+            return PassthroughResponse.from_data(self._serve_stale(
+                cache_key,
+                CircuitOpenException(f"Upstream '{endpoint_family}' endpoints are unavailable")
+            ))
+
+        await self._admit()
+        started_at = time.monotonic()
+        try:
+            response = await self._send("GET", url, headers, params, None, endpoint_class, stream=True)
+        except httpx.HTTPError as e:
+            if not self._is_upstream_failure(e):
+                circuit_breaker.record_success(time.monotonic() - started_at)
+                raise self._map_exception(e)
+            circuit_breaker.record_failure()
+            return PassthroughResponse.from_data(self._serve_stale(cache_key, self._map_exception(e)))
+        circuit_breaker.record_success(time.monotonic() - started_at)
+
+        if validate is None or not self._settings.passthrough_validation:
+            return await self._buffer_passthrough(response, cache_key)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        response_data = response.json()
+        validate(response_data)
+        self._stale_cache.put(cache_key, response_data)
+        return PassthroughResponse.from_body(response.content, status_code=response.status_code)
+
+    async def _buffer_passthrough(self, response: httpx.Response, cache_key: Hashable) -> PassthroughResponse:
+        max_bytes = self._settings.passthrough_cache_max_bytes
+        content_length = response.headers.get('content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            return PassthroughResponse.from_upstream(response)
+        raw_chunks = response.aiter_raw()
+        buffered_chunks = []
+        buffered_bytes = 0
+        async for chunk in raw_chunks:
+            buffered_chunks.append(chunk)
+            buffered_bytes += len(chunk)
+            if buffered_bytes > max_bytes:
+                return PassthroughResponse.from_buffered_upstream(response, buffered_chunks, raw_chunks)
+        await response.aclose()
+        try:
+            response_data = PassthroughResponse.decode_json(
+                b''.join(buffered_chunks),
+                response.headers.get('content-encoding')
+            )
+        except ValueError:
+            pass
+        else:
+            self._stale_cache.put(cache_key, response_data)
+        return PassthroughResponse.from_buffered_upstream(response, buffered_chunks)
@@ -16,3 +16,11 @@ class ServiceUnavailableException(BaseApiException):
 
 class BadRequestException(BaseApiException):
     pass
+
+
+class CircuitOpenException(ServiceUnavailableException):
+    pass
+
+
+class DeadlineExceededException(ServiceUnavailableException):
+    pass
@@ -0,0 +1,76 @@
+import time
+from collections import deque
+from enum import Enum
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+            self,
+            failure_ratio_threshold: float,
+            slow_call_seconds: float,
+            minimum_calls: int,
+            window_size: int,
+            open_seconds: float
+    ):
+        self._failure_ratio_threshold = failure_ratio_threshold
+        self._slow_call_seconds = slow_call_seconds
+        self._minimum_calls = minimum_calls
+        self._open_seconds = open_seconds
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and self._open_period_elapsed():
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def _open_period_elapsed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self._open_seconds
+
+    def allow_request(self) -> bool:
+        return self._state is CircuitState.CLOSED
+
+    def try_acquire_probe(self) -> bool:
+        if self.state is not CircuitState.HALF_OPEN or self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_probe_result(self, succeeded: bool) -> None:
+        self._probe_in_flight = False
+        if succeeded:
+            self._close()
+        else:
+            self._open()
+
+    def record_success(self, elapsed_seconds: float) -> None:
+        self._record(failed=elapsed_seconds >= self._slow_call_seconds)
+
+    def record_failure(self) -> None:
+        self._record(failed=True)
+
+    def _record(self, failed: bool) -> None:
+        if self._state is not CircuitState.CLOSED:
+            return
+        self._outcomes.append(failed)
+        if len(self._outcomes) < self._minimum_calls:
+            return
+        if sum(self._outcomes) / len(self._outcomes) >= self._failure_ratio_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+
+    def _close(self) -> None:
+        self._state = CircuitState.CLOSED
+        self._outcomes.clear()
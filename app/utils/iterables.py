@@ -0,0 +1,8 @@
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(values: Sequence[T], chunk_size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(values), chunk_size):
+        yield values[start:start + chunk_size]
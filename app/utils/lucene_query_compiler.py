@@ -0,0 +1,32 @@
+import re
+from typing import Iterable
+
+from app.utils.iterables import chunked
+
+
+class LuceneQueryCompiler:
+    _range_pattern = re.compile(r'^[\[{]\S+ TO \S+[\]}]$')
+
+    @staticmethod
+    def quote(value: str) -> str:
+        escaped_value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped_value}"'
+
+    @classmethod
+    def term(cls, field: str, value: str) -> str:
+        value = str(value)
+        if cls._range_pattern.match(value):
+            return f'{field}:{value}'
+        return f'{field}:{cls.quote(value)}'
+
+    @classmethod
+    def any_of(cls, field: str, values: Iterable[str]) -> str:
+        return f'{field}:({" OR ".join(cls.quote(value) for value in values)})'
+
+    @staticmethod
+    def all_of(clauses: Iterable[str]) -> str:
+        return ' AND '.join(clause for clause in clauses if clause)
+
+    @classmethod
+    def chunked_any_of(cls, field: str, values: list[str], chunk_size: int) -> list[str]:
+        return [cls.any_of(field, values_chunk) for values_chunk in chunked(values, chunk_size)]
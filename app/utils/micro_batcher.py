@@ -0,0 +1,102 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from app.tenants.tenant_context import hold_current_tenant
+from app.utils.api_layer_exceptions import (
+    BadRequestException,
+    ConflictException,
+    NotFoundException
+)
+from app.utils.request_context import get_caller_id, new_background_context
+
+FlushCallable = Callable[[Hashable, list[str], str], Awaitable[None]]
+
+
+class _PendingBatch:
+    def __init__(self, auth_token: str, caller_id: Optional[str]):
+        self.auth_token = auth_token
+        self.caller_id = caller_id
+        self.release_tenant = hold_current_tenant()
+        self.requests: list[tuple[list[str], asyncio.Future]] = []
+        self.item_count = 0
+
+    def add(self, items: list[str]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.requests.append((items, future))
+        self.item_count += len(items)
+        return future
+
+    @property
+    def merged_items(self) -> list[str]:
+        return list(dict.fromkeys(item for items, _ in self.requests for item in items))
+
+
+class MicroBatcher:
+    def __init__(self, flush: FlushCallable, window_seconds: float, max_items: int):
+        self._flush = flush
+        self._window_seconds = window_seconds
+        self._max_items = max_items
+        self._pending: Dict[tuple[Hashable, Optional[str]], _PendingBatch] = {}
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self._window_seconds > 0
+
+    async def submit(self, key: Hashable, items: list[str], auth_token: str) -> None:
+        if not self.enabled or len(items) >= self._max_items:
+            await self._flush(key, items, auth_token)
+            return
+        caller_id = get_caller_id()
+        batch = self._pending.get((key, caller_id))
+        if batch is None or batch.item_count + len(items) > self._max_items:
+            batch = _PendingBatch(auth_token=auth_token, caller_id=caller_id)
+            self._pending[(key, caller_id)] = batch
+            task = asyncio.create_task(
+                self._flush_after_window(key, batch),
+                context=new_background_context(caller_id=caller_id)
+            )
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        await batch.add(items)
+
+    async def _flush_after_window(self, key: Hashable, batch: _PendingBatch) -> None:
+        try:
+            await self._flush_batch(key, batch)
+        finally:
+            batch.release_tenant()
+
+    async def _flush_batch(self, key: Hashable, batch: _PendingBatch) -> None:
+        await asyncio.sleep(self._window_seconds)
+        if self._pending.get((key, batch.caller_id)) is batch:
+            del self._pending[(key, batch.caller_id)]
+        try:
+            await self._flush(key, batch.merged_items, batch.auth_token)
+        except (BadRequestException, NotFoundException, ConflictException) as e:
+            if len(batch.requests) == 1:
+                self._resolve(batch.requests[0][1], e)
+                return
+            await self._flush_individually(key, batch)
+        except Exception as e:
+            for _, future in batch.requests:
+                self._resolve(future, e)
+        else:
+            for _, future in batch.requests:
+                self._resolve(future, None)
+
+    async def _flush_individually(self, key: Hashable, batch: _PendingBatch) -> None:
+        outcomes = await asyncio.gather(
+            *(self._flush(key, items, batch.auth_token) for items, _ in batch.requests),
+            return_exceptions=True
+        )
+        for (_, future), outcome in zip(batch.requests, outcomes):
+            self._resolve(future, outcome)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, outcome: BaseException | None) -> None:
+        if future.done():
+            return
+        if outcome is None:
+            future.set_result(None)
+        else:
+            future.set_exception(outcome)
@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, TypeVar
+
+from app.utils.api_layer_exceptions import NotFoundException
+
+T = TypeVar("T")
+
+
+class NegativeCache:
+    def __init__(self, resource_name: str, ttl_seconds: float, max_entries: int):
+        self._resource_name = resource_name
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._missing: OrderedDict[str, float] = OrderedDict()
+
+    def is_missing(self, resource_id: str) -> bool:
+        expires_at = self._missing.get(resource_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._missing[resource_id]
+            return False
+        return True
+
+    def mark_missing(self, resource_id: str) -> None:
+        if self._ttl_seconds <= 0 or self._max_entries <= 0:
+            return
+        self._missing[resource_id] = time.monotonic() + self._ttl_seconds
+        self._missing.move_to_end(resource_id)
+        while len(self._missing) > self._max_entries:
+            self._missing.popitem(last=False)
+
+    def discard(self, resource_id: str) -> None:
+        self._missing.pop(resource_id, None)
+
+    def raise_if_missing(self, resource_id: str) -> None:
+        if self.is_missing(resource_id):
+            raise NotFoundException(f"The {self._resource_name} {resource_id} does not exist")
+
+    async def guard(self, resource_id: str, request: Callable[[], Awaitable[T]]) -> T:
+        self.raise_if_missing(resource_id)
+        try:
+            return await request()
+        except NotFoundException:
+            self.mark_missing(resource_id)
+            raise
@@ -0,0 +1,95 @@
+import gzip
+import json
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+
+async def _single_chunk(body: bytes) -> AsyncIterator[bytes]:
+    yield body
+
+
+async def _chain(buffered_chunks: list[bytes], remaining_chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in buffered_chunks:
+        yield chunk
+    async for chunk in remaining_chunks:
+        yield chunk
+
+
+class PassthroughResponse:
+    forwarded_headers = ('content-type', 'content-encoding', 'content-length')
+
+    def __init__(
+            self,
+            status_code: int,
+            headers: Dict[str, str],
+            body: AsyncIterator[bytes],
+            close: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self._close = close
+
+    @classmethod
+    def from_upstream(cls, response: httpx.Response) -> "PassthroughResponse":
+        return cls(
+            status_code=response.status_code,
+            headers={name: response.headers[name] for name in cls.forwarded_headers if name in response.headers},
+            body=response.aiter_raw(),
+            close=response.aclose
+        )
+
+    @classmethod
+    def from_buffered_upstream(
+            cls,
+            response: httpx.Response,
+            buffered_chunks: list[bytes],
+            remaining_chunks: Optional[AsyncIterator[bytes]] = None
+    ) -> "PassthroughResponse":
+        headers = {name: response.headers[name] for name in cls.forwarded_headers if name in response.headers}
+        if remaining_chunks is None:
+            return cls(status_code=response.status_code, headers=headers, body=_single_chunk(b''.join(buffered_chunks)))
+        return cls(
+            status_code=response.status_code,
+            headers=headers,
+            body=_chain(buffered_chunks, remaining_chunks),
+            close=response.aclose
+        )
+
+    @staticmethod
+    def decode_json(body: bytes, content_encoding: Optional[str]) -> Any:
+        try:
+            match (content_encoding or 'identity').lower():
+                case 'identity':
+                    return json.loads(body)
+                case 'gzip':
+                    return json.loads(gzip.decompress(body))
+                case 'deflate':
+                    return json.loads(zlib.decompress(body))
+        except (OSError, zlib.error) as e:
+            raise ValueError(f"Invalid {content_encoding} body: {e}")
+        raise ValueError(f"Unsupported content encoding {content_encoding}")
+
+    @classmethod
+    def from_body(cls, body: bytes, status_code: int = 200) -> "PassthroughResponse":
+        return cls(
+            status_code=status_code,
+            headers={'content-type': 'application/json', 'content-length': str(len(body))},
+            body=_single_chunk(body)
+        )
+
+    @classmethod
+    def from_data(cls, data: Any) -> "PassthroughResponse":
+        return cls.from_body(json.dumps(data, separators=(',', ':')).encode())
+
+    def to_response(self) -> StreamingResponse:
+        return StreamingResponse(
+            self.body,
+            status_code=self.status_code,
+            headers=self.headers,
+            background=BackgroundTask(self._close) if self._close is not None else None
+        )
@@ -0,0 +1,137 @@
+import asyncio
+from contextvars import Context, ContextVar
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import Settings
+
+BACKGROUND_CALLER_ID = "background"
+
+
+class RequestContext:
+    def __init__(self, deadline: Optional[float] = None, caller_id: Optional[str] = None):
+        self.deadline = deadline
+        self.caller_id = caller_id
+        self.stale_age: Optional[float] = None
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    return _request_context.get()
+
+
+def get_remaining_time() -> Optional[float]:
+    context = _request_context.get()
+    if context is None or context.deadline is None:
+        return None
+    return context.deadline - asyncio.get_running_loop().time()
+
+
+def get_caller_id() -> Optional[str]:
+    context = _request_context.get()
+    return context.caller_id if context is not None else None
+
+
+def set_caller_id(caller_id: Optional[str]) -> None:
+    context = _request_context.get()
+    if context is not None:
+        context.caller_id = caller_id
+
+
+def new_background_context(caller_id: Optional[str] = None) -> Context:
+    context = Context()
+    context.run(_request_context.set, RequestContext(caller_id=caller_id))
+    return context
+
+
+def mark_response_stale(age: float) -> None:
+    context = _request_context.get()
+    if context is not None:
+        context.stale_age = max(age, context.stale_age or 0.0)
+
+
+class RequestContextMiddleware:
+    timeout_header = "x-request-timeout"
+
+    def __init__(self, app: ASGIApp, settings: Settings):
+        self.app = app
+        self._default_timeout = settings.request_timeout_seconds
+        self._max_timeout = settings.request_timeout_max_seconds
+        self._route_timeouts: Dict[str, Optional[float]] = dict(
+            sorted(settings.route_request_timeouts.items(), key=lambda item: len(item[0]), reverse=True)
+        )
+
+    def _get_timeout(self, scope: Scope) -> Optional[float]:
+        timeout = self._default_timeout
+        for path_prefix, route_timeout in self._route_timeouts.items():
+            if scope["path"].startswith(path_prefix):
+                timeout = route_timeout
+                break
+        requested_timeout = Headers(scope=scope).get(self.timeout_header)
+        if requested_timeout is not None:
+            try:
+                requested_seconds = float(requested_timeout)
+            except ValueError:
+                requested_seconds = None
+            if requested_seconds is not None and requested_seconds > 0:
+                timeout = min(requested_seconds, self._max_timeout, timeout or self._max_timeout)
+        return timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        timeout = self._get_timeout(scope)
+        context = RequestContext(deadline=loop.time() + timeout if timeout is not None else None)
+        context_token = _request_context.set(context)
+        request_task = asyncio.current_task()
+        received_messages: asyncio.Queue[Message] = asyncio.Queue()
+        state = {"response_started": False, "response_complete": False, "disconnected": False}
+
+        async def watch_for_disconnect() -> None:
+            while True:
+                message = await receive()
+                received_messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not state["response_complete"]:
+                        state["disconnected"] = True
+                        request_task.cancel()
+                    return
+
+        async def receive_from_watcher() -> Message:
+            return await received_messages.get()
+
+        async def send_with_context_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                state["response_started"] = True
+                deadline_scope.reschedule(None)
+                if context.stale_age is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Warning", '110 - "Response is Stale"')
+                    headers["Age"] = str(int(context.stale_age))
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["response_complete"] = True
+            await send(message)
+
+        watcher = asyncio.create_task(watch_for_disconnect())
+        try:
+            async with asyncio.timeout_at(context.deadline) as deadline_scope:
+                await self.app(scope, receive_from_watcher, send_with_context_headers)
+        except asyncio.TimeoutError:
+            if not state["response_started"]:
+                response = JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+                await response(scope, receive_from_watcher, send)
+        except asyncio.CancelledError:
+            if not state["disconnected"]:
+                raise
+            request_task.uncancel()
+        finally:
+            watcher.cancel()
+            _request_context.reset(context_token)
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Generic, Optional, Protocol, TypeVar
+
+from app.utils.request_context import BACKGROUND_CALLER_ID, new_background_context
+
+logger = logging.getLogger(__name__)
+
+
+class NamedResource(Protocol):
+    id: str
+    name: str
+
+
+T = TypeVar("T", bound=NamedResource)
+
+
+class ResourceCatalogue(Generic[T]):
+    def __init__(self, refresh_seconds: float):
+        self._refresh_seconds = refresh_seconds
+        self._resources_by_id: Dict[str, T] = {}
+        self._ids_by_name: Dict[str, str] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def get(self, resource_id: str) -> Optional[T]:
+        return self._resources_by_id.get(resource_id)
+
+    def get_by_name(self, name: str) -> Optional[T]:
+        resource_id = self._ids_by_name.get(name)
+        return self._resources_by_id.get(resource_id) if resource_id else None
+
+    def get_all(self) -> list[T]:
+        return list(self._resources_by_id.values())
+
+    def upsert(self, resource: T) -> None:
+        previous = self._resources_by_id.get(resource.id)
+        if previous is not None and self._ids_by_name.get(previous.name) == previous.id:
+            del self._ids_by_name[previous.name]
+        self._resources_by_id[resource.id] = resource
+        self._ids_by_name[resource.name] = resource.id
+
+    def remove(self, resource_id: str) -> None:
+        previous = self._resources_by_id.pop(resource_id, None)
+        if previous is not None and self._ids_by_name.get(previous.name) == resource_id:
+            del self._ids_by_name[previous.name]
+
+    def replace(self, resources: list[T]) -> None:
+        current_ids = {resource.id for resource in resources}
+        for resource_id in self._resources_by_id.keys() - current_ids:
+            self.remove(resource_id)
+        for resource in resources:
+            if self._resources_by_id.get(resource.id) != resource:
+                self.upsert(resource)
+        self.refreshed_at = time.monotonic()
+
+    async def refresh(self, loader: Callable[[], Awaitable[list[T]]]) -> None:
+        async with self._refresh_lock:
+            self.replace(await loader())
+
+    async def refresh_if_older_than(self, max_age_seconds: float, loader: Callable[[], Awaitable[list[T]]]) -> None:
+        async with self._refresh_lock:
+            if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < max_age_seconds:
+                return
+            self.replace(await loader())
+
+    async def _refresh_periodically(self, loader: Callable[[], Awaitable[list[T]]]) -> None:
+        while True:
+            try:
+                await self.refresh(loader)
+            except Exception:
+                logger.exception("Catalogue refresh failed")
+            await asyncio.sleep(self._refresh_seconds)
+
+    def start_background_refresh(self, loader: Callable[[], Awaitable[list[T]]]) -> None:
+        if self._refresh_task is None and self._refresh_seconds > 0:
+            self._refresh_task = asyncio.create_task(
+                self._refresh_periodically(loader),
+                context=new_background_context(caller_id=BACKGROUND_CALLER_ID)
+            )
+
+    async def stop_background_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
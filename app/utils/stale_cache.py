@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class StaleCacheEntry:
+    def __init__(self, data: Any):
+        self.data = data
+        self.stored_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class StaleResponseCache:
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, StaleCacheEntry] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[StaleCacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def put(self, key: Hashable, data: Any) -> None:
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = StaleCacheEntry(data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,17 @@
+import httpx
+
+from app.config import UpstreamTimeouts
+from app.utils.api_layer_exceptions import DeadlineExceededException
+from app.utils.request_context import get_remaining_time
+
+
+def build_timeout(upstream_timeouts: UpstreamTimeouts) -> httpx.Timeout:
+    remaining_time = get_remaining_time()
+    if remaining_time is None:
+        return httpx.Timeout(**upstream_timeouts.model_dump())
+    if remaining_time <= 0:
+        raise DeadlineExceededException("Request deadline exceeded before the upstream call")
+    return httpx.Timeout(**{
+        phase: min(phase_timeout, remaining_time)
+        for phase, phase_timeout in upstream_timeouts.model_dump().items()
+    })
@@ -0,0 +1,563 @@
+import argparse
+import asyncio
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import uvicorn
+from authlib.jose import JsonWebKey, jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmarks.fixtures import make_users, make_roles, make_organizations, make_permissions
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+_clause_pattern = re.compile(r'([\w.]+):(\((?:[^()"]|"(?:\\.|[^"\\])*")*\)|"(?:\\.|[^"\\])*"|\S+)')
+_quoted_pattern = re.compile(r'"((?:\\.|[^"\\])*)"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value)
+
+
+def _clause_matches(item: Dict, field: str, expression: str) -> bool:
+    if expression.startswith(('[', '{')):
+        return True
+    values = [_unescape(value) for value in _quoted_pattern.findall(expression)] or [expression.strip('()')]
+    actual = str(item.get(field, ''))
+    return any(
+        actual.startswith(value[:-1]) if value.endswith('*') else actual == value
+        for value in values
+    )
+
+
+def _error(status_code: int, error: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        {"statusCode": status_code, "error": error, "message": message},
+        status_code=status_code,
+        headers=headers
+    )
+
+
+class _RateLimit:
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self.limit = max(1, int(per_second))
+        self.tokens = float(self.limit)
+        self.updated_at = time.monotonic()
+
+    def take(self) -> tuple[bool, Dict[str, str]]:
+        now = time.monotonic()
+        self.tokens = min(self.limit, self.tokens + (now - self.updated_at) * self.per_second)
+        self.updated_at = now
+        allowed = self.tokens >= 1
+        if allowed:
+            self.tokens -= 1
+        reset_in = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.per_second
+        return allowed, {
+            "x-ratelimit-limit": str(self.limit),
+            "x-ratelimit-remaining": str(int(self.tokens)),
+            "x-ratelimit-reset": str(int(time.time() + reset_in) + 1),
+        }
+
+
+class Auth0StandIn:
+    caller_permissions = tuple(
+        f"{action}:{resource}"
+        for resource in ("users", "roles", "organizations")
+        for action in ("create", "read", "update", "delete")
+    ) + ("read:authz", "read:changes")
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = None,
+            list_size: int = 10,
+            latency_ms: float = 0.0,
+            latency_jitter_ms: float = 0.0,
+            error_rate: float = 0.0,
+            rate_limit_per_second: Optional[float] = None,
+            seed: Optional[int] = None
+    ):
+        self._host = host
+        self._port = port or self._find_free_port(host)
+        self._key = JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": uuid.uuid4().hex})
+        self._latency_seconds = latency_ms / 1000
+        self._latency_jitter_seconds = latency_jitter_ms / 1000
+        self._error_rate = error_rate
+        self._rate_limit = _RateLimit(rate_limit_per_second) if rate_limit_per_second else None
+        self._random = random.Random(seed)
+        self._users: Dict[str, Dict] = {user["user_id"]: user for user in make_users(list_size)}
+        self._roles: Dict[str, Dict] = {role["id"]: role for role in make_roles(list_size)}
+        self._organizations: Dict[str, Dict] = {
+            organization["id"]: organization for organization in make_organizations(list_size)
+        }
+        self._permissions = make_permissions(list_size)
+        user_ids = list(self._users)
+        role_ids = list(self._roles)
+        organization_ids = list(self._organizations)
+        self._role_permissions: Dict[str, List[Dict]] = {
+            role_id: self._permissions[index % len(self._permissions):][:2] for index, role_id in enumerate(role_ids)
+        }
+        self._user_roles: Dict[str, List[str]] = {
+            user_id: [role_ids[index % len(role_ids)]] if role_ids else [] for index, user_id in enumerate(user_ids)
+        }
+        self._members: Dict[str, List[str]] = {organization_id: [] for organization_id in organization_ids}
+        self._member_roles: Dict[tuple[str, str], List[str]] = {}
+        for index, user_id in enumerate(user_ids):
+            if organization_ids:
+                organization_id = organization_ids[index % len(organization_ids)]
+                self._members[organization_id].append(user_id)
+                self._member_roles[(organization_id, user_id)] = [role_ids[index % len(role_ids)]]
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self._port}"
+
+    @staticmethod
+    def _find_free_port(host: str) -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((host, 0))
+            return sock.getsockname()[1]
+
+    def issue_token(
+            self,
+            expires_in: int = 86400,
+            audience: Optional[str] = None,
+            subject: str = "benchmark@clients",
+            extra_claims: Optional[Dict] = None
+    ) -> str:
+        now = int(time.time())
+        header = {"alg": "RS256", "typ": "JWT", "kid": self._key.kid}
+        payload = {
+            "iss": f"{self.url}/",
+            "sub": subject,
+            "aud": audience or f"{self.url}/api/v2/",
+            "iat": now,
+            "exp": now + expires_in,
+            "gty": "client-credentials",
+            **(extra_claims or {})
+        }
+        return jwt.encode(header, payload, self._key).decode()
+
+    def _api(self, handler: Handler) -> Handler:
+        async def handle(request: Request) -> Response:
+            rate_limit_headers = {}
+            if self._rate_limit is not None:
+                allowed, rate_limit_headers = self._rate_limit.take()
+                if not allowed:
+                    return _error(429, "Too Many Requests", "Global limit has been reached", rate_limit_headers)
+            latency = self._latency_seconds + self._random.uniform(0, self._latency_jitter_seconds)
+            if latency > 0:
+                await asyncio.sleep(latency)
+            if self._error_rate and self._random.random() < self._error_rate:
+                return _error(500, "Internal Server Error", "Injected failure", rate_limit_headers)
+            response = await handler(request)
+            response.headers.update(rate_limit_headers)
+            return response
+        return handle
+
+    @staticmethod
+    async def _json_body(request: Request) -> Dict:
+        body = await request.body()
+        return await request.json() if body else {}
+
+    @staticmethod
+    def _paginate(request: Request, items: List[Dict], items_key: str) -> Response:
+        params = request.query_params
+        if 'fields' in params:
+            fields = params['fields'].split(',')
+            if params.get('include_fields', 'true') == 'true':
+                items = [{field: item[field] for field in fields if field in item} for item in items]
+            else:
+                items = [{key: value for key, value in item.items() if key not in fields} for item in items]
+        if 'take' in params or 'from' in params:
+            start = int(params.get('from') or 0)
+            end = start + int(params.get('take', 50))
+            body = {items_key: items[start:end]}
+            if end < len(items):
+                body['next'] = str(end)
+            return JSONResponse(body)
+        if 'page' in params or 'per_page' in params:
+            page = int(params.get('page', 0))
+            per_page = int(params.get('per_page', 50))
+            page_items = items[page * per_page:(page + 1) * per_page]
+            if params.get('include_totals') == 'true':
+                return JSONResponse({
+                    items_key: page_items,
+                    'start': page * per_page,
+                    'limit': per_page,
+                    'total': len(items)
+                })
+            return JSONResponse(page_items)
+        return JSONResponse(items)
+
+    async def _token(self, request: Request) -> JSONResponse:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await self._json_body(request)
+        else:
+            body = dict(await request.form())
+        client_id = body.get("client_id") or "benchmark"
+        audience = body.get("audience")
+        extra_claims = None
+        if audience and audience != f"{self.url}/api/v2/":
+            extra_claims = {"scope": body.get("scope") or " ".join(self.caller_permissions)}
+        return JSONResponse({
+            "access_token": self.issue_token(
+                audience=audience,
+                subject=f"{client_id}@clients",
+                extra_claims=extra_claims
+            ),
+            "token_type": "Bearer",
+            "expires_in": 86400
+        })
+
+    async def _jwks(self, request: Request) -> JSONResponse:
+        return JSONResponse({"keys": [self._key.as_dict(is_private=False)]})
+
+    async def _list_users(self, request: Request) -> Response:
+        users = list(self._users.values())
+        query = request.query_params.get('q')
+        if query:
+            clauses = _clause_pattern.findall(query)
+            users = [user for user in users if all(_clause_matches(user, field, value) for field, value in clauses)]
+        return self._paginate(request, users, 'users')
+
+    async def _users_by_email(self, request: Request) -> Response:
+        email = request.query_params.get('email', '').lower()
+        return JSONResponse([user for user in self._users.values() if user['email'].lower() == email])
+
+    async def _list_logs(self, request: Request) -> Response:
+        return JSONResponse([])
+
+    async def _create_user(self, request: Request) -> Response:
+        body = await self._json_body(request)
+        if any(user['email'] == body.get('email') for user in self._users.values()):
+            return _error(409, "Conflict", "The user already exists.")
+        identity_id = uuid.uuid4().hex[:24]
+        now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        email = body.get('email', f"{identity_id}@factory-hub.example.com")
+        user = {
+            "created_at": now,
+            "email": email,
+            "email_verified": body.get('email_verified', False),
+            "identities": [{
+                "connection": body.get('connection', "Username-Password-Authentication"),
+                "user_id": identity_id,
+                "provider": "auth0",
+                "isSocial": False
+            }],
+            "name": body.get('name', email),
+            "nickname": body.get('nickname', email.split('@')[0]),
+            "picture": body.get('picture', f"https://s.gravatar.com/avatar/{identity_id}?s=480"),
+            "updated_at": now,
+            "user_id": f"auth0|{identity_id}"
+        }
+        self._users[user['user_id']] = user
+        self._user_roles[user['user_id']] = []
+        return JSONResponse(user, status_code=201)
+
+    async def _get_user(self, request: Request) -> Response:
+        user = self._users.get(request.path_params['user_id'])
+        if user is None:
+            return _error(404, "Not Found", "The user does not exist.")
+        return JSONResponse(user)
+
+    async def _update_user(self, request: Request) -> Response:
+        user = self._users.get(request.path_params['user_id'])
+        if user is None:
+            return _error(404, "Not Found", "The user does not exist.")
+        user.update(await self._json_body(request))
+        user['updated_at'] = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        return JSONResponse(user)
+
+    async def _delete_user(self, request: Request) -> Response:
+        user_id = request.path_params['user_id']
+        self._users.pop(user_id, None)
+        self._user_roles.pop(user_id, None)
+        for organization_id, members in self._members.items():
+            if user_id in members:
+                members.remove(user_id)
+                self._member_roles.pop((organization_id, user_id), None)
+        return Response(status_code=204)
+
+    async def _get_user_roles(self, request: Request) -> Response:
+        user_id = request.path_params['user_id']
+        if user_id not in self._users:
+            return _error(404, "Not Found", "The user does not exist.")
+        roles = [self._roles[role_id] for role_id in self._user_roles.get(user_id, []) if role_id in self._roles]
+        return self._paginate(request, roles, 'roles')
+
+    async def _change_user_roles(self, request: Request) -> Response:
+        user_id = request.path_params['user_id']
+        if user_id not in self._users:
+            return _error(404, "Not Found", "The user does not exist.")
+        role_ids = (await self._json_body(request)).get('roles', [])
+        if any(role_id not in self._roles for role_id in role_ids):
+            return _error(404, "Not Found", "The role does not exist.")
+        assigned = self._user_roles.setdefault(user_id, [])
+        if request.method == "POST":
+            assigned.extend(role_id for role_id in role_ids if role_id not in assigned)
+        else:
+            self._user_roles[user_id] = [role_id for role_id in assigned if role_id not in role_ids]
+        return Response(status_code=204)
+
+    async def _list_roles(self, request: Request) -> Response:
+        roles = list(self._roles.values())
+        name_filter = request.query_params.get('name_filter')
+        if name_filter:
+            roles = [role for role in roles if name_filter.lower() in role['name'].lower()]
+        return self._paginate(request, roles, 'roles')
+
+    async def _create_role(self, request: Request) -> Response:
+        body = await self._json_body(request)
+        if any(role['name'] == body.get('name') for role in self._roles.values()):
+            return _error(409, "Conflict", "Role name already exists")
+        role = {"id": f"rol_{uuid.uuid4().hex[:16]}", "name": body.get('name'), "description": body.get('description')}
+        self._roles[role['id']] = role
+        self._role_permissions[role['id']] = []
+        return JSONResponse(role)
+
+    async def _get_role(self, request: Request) -> Response:
+        role = self._roles.get(request.path_params['role_id'])
+        if role is None:
+            return _error(404, "Not Found", "The role does not exist.")
+        return JSONResponse(role)
+
+    async def _update_role(self, request: Request) -> Response:
+        role = self._roles.get(request.path_params['role_id'])
+        if role is None:
+            return _error(404, "Not Found", "The role does not exist.")
+        role.update(await self._json_body(request))
+        return JSONResponse(role)
+
+    async def _delete_role(self, request: Request) -> Response:
+        role_id = request.path_params['role_id']
+        self._roles.pop(role_id, None)
+        self._role_permissions.pop(role_id, None)
+        return Response(status_code=204)
+
+    async def _get_role_permissions(self, request: Request) -> Response:
+        role_id = request.path_params['role_id']
+        if role_id not in self._roles:
+            return _error(404, "Not Found", "The role does not exist.")
+        return self._paginate(request, self._role_permissions.get(role_id, []), 'permissions')
+
+    async def _list_organizations(self, request: Request) -> Response:
+        return self._paginate(request, list(self._organizations.values()), 'organizations')
+
+    async def _create_organization(self, request: Request) -> Response:
+        body = await self._json_body(request)
+        if any(organization['name'] == body.get('name') for organization in self._organizations.values()):
+            return _error(409, "Conflict", "An organization with this name already exists.")
+        organization = {"id": f"org_{uuid.uuid4().hex[:16]}", **body}
+        self._organizations[organization['id']] = organization
+        self._members[organization['id']] = []
+        return JSONResponse(organization, status_code=201)
+
+    async def _get_organization(self, request: Request) -> Response:
+        organization = self._organizations.get(request.path_params['organization_id'])
+        if organization is None:
+            return _error(404, "Not Found", "No organization found by that id")
+        return JSONResponse(organization)
+
+    async def _get_organization_by_name(self, request: Request) -> Response:
+        name = request.path_params['name']
+        for organization in self._organizations.values():
+            if organization['name'] == name:
+                return JSONResponse(organization)
+        return _error(404, "Not Found", "No organization found by that name")
+
+    async def _update_organization(self, request: Request) -> Response:
+        organization = self._organizations.get(request.path_params['organization_id'])
+        if organization is None:
+            return _error(404, "Not Found", "No organization found by that id")
+        organization.update(await self._json_body(request))
+        return JSONResponse(organization)
+
+    async def _delete_organization(self, request: Request) -> Response:
+        organization_id = request.path_params['organization_id']
+        self._organizations.pop(organization_id, None)
+        for user_id in self._members.pop(organization_id, []):
+            self._member_roles.pop((organization_id, user_id), None)
+        return Response(status_code=204)
+
+    async def _get_members(self, request: Request) -> Response:
+        organization_id = request.path_params['organization_id']
+        if organization_id not in self._organizations:
+            return _error(404, "Not Found", "No organization found by that id")
+        members = [
+            {
+                "user_id": user_id,
+                "email": self._users[user_id]['email'],
+                "picture": self._users[user_id]['picture'],
+                "name": self._users[user_id]['name']
+            }
+            for user_id in self._members[organization_id] if user_id in self._users
+        ]
+        return self._paginate(request, members, 'members')
+
+    async def _change_members(self, request: Request) -> Response:
+        organization_id = request.path_params['organization_id']
+        if organization_id not in self._organizations:
+            return _error(404, "Not Found", "No organization found by that id")
+        user_ids = (await self._json_body(request)).get('members', [])
+        members = self._members[organization_id]
+        if request.method == "POST":
+            if any(user_id not in self._users for user_id in user_ids):
+                return _error(400, "Bad Request", "One or more users do not exist.")
+            members.extend(user_id for user_id in user_ids if user_id not in members)
+        else:
+            self._members[organization_id] = [user_id for user_id in members if user_id not in user_ids]
+            for user_id in user_ids:
+                self._member_roles.pop((organization_id, user_id), None)
+        return Response(status_code=204)
+
+    async def _get_member_roles(self, request: Request) -> Response:
+        organization_id = request.path_params['organization_id']
+        user_id = request.path_params['user_id']
+        if user_id not in self._members.get(organization_id, []):
+            return _error(404, "Not Found", "The user is not a member of the organization.")
+        roles = [
+            self._roles[role_id]
+            for role_id in self._member_roles.get((organization_id, user_id), []) if role_id in self._roles
+        ]
+        return self._paginate(request, roles, 'roles')
+
+    async def _change_member_roles(self, request: Request) -> Response:
+        organization_id = request.path_params['organization_id']
+        user_id = request.path_params['user_id']
+        if user_id not in self._members.get(organization_id, []):
+            return _error(404, "Not Found", "The user is not a member of the organization.")
+        role_ids = (await self._json_body(request)).get('roles', [])
+        if any(role_id not in self._roles for role_id in role_ids):
+            return _error(404, "Not Found", "The role does not exist.")
+        assigned = self._member_roles.setdefault((organization_id, user_id), [])
+        if request.method == "POST":
+            assigned.extend(role_id for role_id in role_ids if role_id not in assigned)
+        else:
+            self._member_roles[(organization_id, user_id)] = [
+                role_id for role_id in assigned if role_id not in role_ids
+            ]
+        return Response(status_code=204)
+
+    def _build_app(self) -> Starlette:
+        api = self._api
+        return Starlette(routes=[
+            Route("/oauth/token", self._token, methods=["POST"]),
+            Route("/.well-known/jwks.json", self._jwks, methods=["GET"]),
+            Route("/api/v2/logs", api(self._list_logs), methods=["GET"]),
+            Route("/api/v2/users", api(self._list_users), methods=["GET"]),
+            Route("/api/v2/users", api(self._create_user), methods=["POST"]),
+            Route("/api/v2/users-by-email", api(self._users_by_email), methods=["GET"]),
+            Route("/api/v2/users/{user_id}", api(self._get_user), methods=["GET"]),
+            Route("/api/v2/users/{user_id}", api(self._update_user), methods=["PATCH"]),
+            Route("/api/v2/users/{user_id}", api(self._delete_user), methods=["DELETE"]),
+            Route("/api/v2/users/{user_id}/roles", api(self._get_user_roles), methods=["GET"]),
+            Route("/api/v2/users/{user_id}/roles", api(self._change_user_roles), methods=["POST", "DELETE"]),
+            Route("/api/v2/roles", api(self._list_roles), methods=["GET"]),
+            Route("/api/v2/roles", api(self._create_role), methods=["POST"]),
+            Route("/api/v2/roles/{role_id}", api(self._get_role), methods=["GET"]),
+            Route("/api/v2/roles/{role_id}", api(self._update_role), methods=["PATCH"]),
+            Route("/api/v2/roles/{role_id}", api(self._delete_role), methods=["DELETE"]),
+            Route("/api/v2/roles/{role_id}/permissions", api(self._get_role_permissions), methods=["GET"]),
+            Route("/api/v2/organizations", api(self._list_organizations), methods=["GET"]),
+            Route("/api/v2/organizations", api(self._create_organization), methods=["POST"]),
+            Route("/api/v2/organizations/name/{name}", api(self._get_organization_by_name), methods=["GET"]),
+            Route("/api/v2/organizations/{organization_id}", api(self._get_organization), methods=["GET"]),
+            Route("/api/v2/organizations/{organization_id}", api(self._update_organization), methods=["PATCH"]),
+            Route("/api/v2/organizations/{organization_id}", api(self._delete_organization), methods=["DELETE"]),
+            Route("/api/v2/organizations/{organization_id}/members", api(self._get_members), methods=["GET"]),
+            Route(
+                "/api/v2/organizations/{organization_id}/members",
+                api(self._change_members),
+                methods=["POST", "DELETE"]
+            ),
+            Route(
+                "/api/v2/organizations/{organization_id}/members/{user_id}/roles",
+                api(self._get_member_roles),
+                methods=["GET"]
+            ),
+            Route(
+                "/api/v2/organizations/{organization_id}/members/{user_id}/roles",
+                api(self._change_member_roles),
+                methods=["POST", "DELETE"]
+            ),
+        ])
+
+    def start(self) -> None:
+        config = uvicorn.Config(
+            self._build_app(),
+            host=self._host,
+            port=self._port,
+            log_level="warning",
+            lifespan="off"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+
+    def __enter__(self) -> "Auth0StandIn":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local Auth0 OAuth and Management API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--list-size", type=int, default=1_000, help="Number of users, roles and organizations")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency of every API call")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Uniform random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="API calls per second before 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--print-token", metavar="AUDIENCE", help="Print a caller token for the audience and keep serving")
+    arguments = parser.parse_args()
+
+    stand_in = Auth0StandIn(
+        host=arguments.host,
+        port=arguments.port,
+        list_size=arguments.list_size,
+        latency_ms=arguments.latency_ms,
+        latency_jitter_ms=arguments.latency_jitter_ms,
+        error_rate=arguments.error_rate,
+        rate_limit_per_second=arguments.rate_limit,
+        seed=arguments.seed
+    )
+    with stand_in:
+        print(f"Auth0 stand-in listening on {stand_in.url}", flush=True)
+        if arguments.print_token:
+            print(stand_in.issue_token(
+                audience=arguments.print_token,
+                subject="load-generator@clients",
+                extra_claims={"scope": " ".join(Auth0StandIn.caller_permissions)}
+            ), flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import json
+from typing import Dict, Tuple
+
+
+def _load(path: str) -> Dict[Tuple[str, str], Dict]:
+    with open(path) as report_file:
+        report = json.load(report_file)
+    return {
+        (result["name"], json.dumps(result["params"], sort_keys=True)): result
+        for result in report["results"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="median_ns", help="Metric to compare, e.g. median_ns or p95_ns")
+    arguments = parser.parse_args()
+
+    baseline = _load(arguments.baseline)
+    candidate = _load(arguments.candidate)
+    print(f"{'benchmark':<50} {'params':<24} {'baseline':>14} {'candidate':>14} {'change':>9}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        name, params = key
+        before = baseline[key][arguments.metric]
+        after = candidate[key][arguments.metric]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<50} {params:<24} {before:>14.0f} {after:>14.0f} {change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
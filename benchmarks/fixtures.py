@@ -0,0 +1,64 @@
+from typing import Dict, List
+
+
+def make_user(index: int) -> Dict:
+    return {
+        "created_at": "2024-01-01T00:00:00.000Z",
+        "email": f"user{index}@factory-hub.example.com",
+        "email_verified": True,
+        "identities": [
+            {
+                "connection": "Username-Password-Authentication",
+                "user_id": f"{index:024x}",
+                "provider": "auth0",
+                "isSocial": False
+            }
+        ],
+        "name": f"User {index}",
+        "nickname": f"user{index}",
+        "picture": f"https://s.gravatar.com/avatar/{index:032x}?s=480",
+        "updated_at": "2024-01-02T00:00:00.000Z",
+        "user_id": f"auth0|{index:024x}"
+    }
+
+
+def make_role(index: int) -> Dict:
+    return {
+        "id": f"rol_{index:016x}",
+        "name": f"role-{index}",
+        "description": f"Benchmark role {index}"
+    }
+
+
+def make_organization(index: int) -> Dict:
+    return {
+        "id": f"org_{index:016x}",
+        "name": f"plant-{index}",
+        "display_name": f"Plant {index}",
+        "branding": {"logo_url": f"https://cdn.factory-hub.example.com/logos/{index}.png"}
+    }
+
+
+def make_users(count: int) -> List[Dict]:
+    return [make_user(index) for index in range(count)]
+
+
+def make_roles(count: int) -> List[Dict]:
+    return [make_role(index) for index in range(count)]
+
+
+def make_organizations(count: int) -> List[Dict]:
+    return [make_organization(index) for index in range(count)]
+
+
+def make_permission(index: int) -> Dict:
+    return {
+        "permission_name": f"read:resource-{index}",
+        "resource_server_identifier": "https://factory-hub.example.com/api",
+        "resource_server_name": "Factory Hub API",
+        "description": f"Benchmark permission {index}"
+    }
+
+
+def make_permissions(count: int) -> List[Dict]:
+    return [make_permission(index) for index in range(count)]
@@ -0,0 +1,83 @@
+import gc
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class BenchmarkResult:
+    def __init__(self, name: str, params: Dict, samples_ns: List[int]):
+        self.name = name
+        self.params = params
+        self.samples_ns = samples_ns
+
+    def _percentile(self, percentile: float) -> float:
+        ordered = sorted(self.samples_ns)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> Dict:
+        mean_ns = statistics.fmean(self.samples_ns)
+        return {
+            "name": self.name,
+            "params": self.params,
+            "iterations": len(self.samples_ns),
+            "min_ns": min(self.samples_ns),
+            "max_ns": max(self.samples_ns),
+            "mean_ns": mean_ns,
+            "median_ns": statistics.median(self.samples_ns),
+            "p95_ns": self._percentile(95),
+            "p99_ns": self._percentile(99),
+            "stdev_ns": statistics.stdev(self.samples_ns) if len(self.samples_ns) > 1 else 0.0,
+            "ops_per_sec": 1e9 / mean_ns if mean_ns else 0.0,
+        }
+
+
+async def run_async_benchmark(
+        name: str,
+        func: Callable[[], Awaitable],
+        iterations: int,
+        warmup: int = 5,
+        params: Optional[Dict] = None,
+        setup: Optional[Callable[[], Awaitable]] = None,
+) -> BenchmarkResult:
+    for _ in range(warmup):
+        if setup:
+            await setup()
+        await func()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            if setup:
+                await setup()
+            started = time.perf_counter_ns()
+            await func()
+            samples.append(time.perf_counter_ns() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return BenchmarkResult(name=name, params=params or {}, samples_ns=samples)
+
+
+def run_sync_benchmark(
+        name: str,
+        func: Callable[[], object],
+        iterations: int,
+        warmup: int = 5,
+        params: Optional[Dict] = None,
+) -> BenchmarkResult:
+    for _ in range(warmup):
+        func()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return BenchmarkResult(name=name, params=params or {}, samples_ns=samples)
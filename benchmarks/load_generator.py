@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fixtures import make_user, make_role, make_organization
+from benchmarks.harness import BenchmarkResult
+
+
+class MixEntry:
+    def __init__(
+            self,
+            method: str,
+            path: str,
+            body: Optional[Dict] = None,
+            weight: float = 1.0,
+            route: Optional[str] = None
+    ):
+        self.method = method.upper()
+        self.path = path
+        self.body = body
+        self.weight = weight
+        self.route = route or f"{self.method} {path}"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MixEntry":
+        return cls(
+            method=data.get("method", "GET"),
+            path=data["path"],
+            body=data.get("body"),
+            weight=data.get("weight", 1.0),
+            route=data.get("route")
+        )
+
+
+def load_mix(path: str) -> List[MixEntry]:
+    with open(path) as mix_file:
+        if path.endswith(".jsonl"):
+            return [MixEntry.from_dict(json.loads(line)) for line in mix_file if line.strip()]
+        return [MixEntry.from_dict(entry) for entry in json.load(mix_file)["requests"]]
+
+
+class FixtureValues:
+    def __init__(self, fixture_size: int, rng: random.Random):
+        self._fixture_size = fixture_size
+        self._rng = rng
+
+    def _index(self) -> int:
+        return self._rng.randrange(self._fixture_size)
+
+    def substitute(self, value):
+        if isinstance(value, str):
+            if "{" not in value:
+                return value
+            return value.format_map({
+                "user": make_user(self._index())["user_id"],
+                "role": make_role(self._index())["id"],
+                "role_name": make_role(self._index())["name"],
+                "organization": make_organization(self._index())["id"],
+                "organization_name": make_organization(self._index())["name"],
+            })
+        if isinstance(value, list):
+            return [self.substitute(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.substitute(item) for key, item in value.items()}
+        return value
+
+
+class RouteStats:
+    def __init__(self):
+        self.samples_ns: List[int] = []
+        self.statuses: Counter[str] = Counter()
+
+    def record(self, elapsed_ns: int, status: str) -> None:
+        self.samples_ns.append(elapsed_ns)
+        self.statuses[status] += 1
+
+
+class LoadGenerator:
+    def __init__(
+            self,
+            base_url: str,
+            entries: List[MixEntry],
+            token: Optional[str] = None,
+            concurrency: int = 10,
+            rate_per_second: Optional[float] = None,
+            fixture_size: int = 1_000,
+            sequential: bool = False,
+            seed: Optional[int] = None,
+            timeout_seconds: float = 30.0
+    ):
+        self._base_url = base_url
+        self._entries = entries
+        self._headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._concurrency = concurrency
+        self._interval_seconds = concurrency / rate_per_second if rate_per_second else 0.0
+        self._rng = random.Random(seed)
+        self._fixtures = FixtureValues(fixture_size, self._rng)
+        self._sequential = sequential
+        self._timeout_seconds = timeout_seconds
+        self._next_entry = 0
+        self._stats: Dict[str, RouteStats] = defaultdict(RouteStats)
+
+    def _pick_entry(self) -> MixEntry:
+        if self._sequential:
+            entry = self._entries[self._next_entry % len(self._entries)]
+            self._next_entry += 1
+            return entry
+        return self._rng.choices(self._entries, weights=[entry.weight for entry in self._entries])[0]
+
+    async def _send(self, client: httpx.AsyncClient, entry: MixEntry) -> None:
+        started = time.perf_counter_ns()
+        try:
+            response = await client.request(
+                method=entry.method,
+                url=self._fixtures.substitute(entry.path),
+                json=self._fixtures.substitute(entry.body) if entry.body is not None else None
+            )
+            await response.aread()
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self._stats[entry.route].record(time.perf_counter_ns() - started, status)
+
+    async def _worker(self, client: httpx.AsyncClient, deadline: float, remaining: Optional[List[int]]) -> None:
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = loop.time()
+            await self._send(client, self._pick_entry())
+            if self._interval_seconds:
+                await asyncio.sleep(max(0.0, self._interval_seconds - (loop.time() - started)))
+
+    async def run(self, duration_seconds: float, total_requests: Optional[int] = None) -> Dict:
+        limits = httpx.Limits(max_connections=self._concurrency, max_keepalive_connections=self._concurrency)
+        async with httpx.AsyncClient(
+                base_url=self._base_url,
+                headers=self._headers,
+                limits=limits,
+                timeout=self._timeout_seconds
+        ) as client:
+            started = time.perf_counter()
+            deadline = asyncio.get_running_loop().time() + duration_seconds
+            remaining = [total_requests] if total_requests else None
+            await asyncio.gather(*(self._worker(client, deadline, remaining) for _ in range(self._concurrency)))
+            elapsed = time.perf_counter() - started
+        return self._report(elapsed)
+
+    def _report(self, elapsed_seconds: float) -> Dict:
+        routes = []
+        for route, stats in sorted(self._stats.items()):
+            route_report = BenchmarkResult(name=route, params={}, samples_ns=stats.samples_ns).to_dict()
+            route_report.pop("params")
+            route_report.pop("ops_per_sec")
+            route_report["throughput_per_sec"] = len(stats.samples_ns) / elapsed_seconds
+            route_report["statuses"] = dict(stats.statuses)
+            route_report["errors"] = sum(
+                count for status, count in stats.statuses.items() if not status.isdigit() or int(status) >= 500
+            )
+            routes.append(route_report)
+        total_requests = sum(len(stats.samples_ns) for stats in self._stats.values())
+        return {
+            "meta": {
+                "base_url": self._base_url,
+                "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "concurrency": self._concurrency,
+                "duration_seconds": elapsed_seconds,
+            },
+            "total": {
+                "requests": total_requests,
+                "throughput_per_sec": total_requests / elapsed_seconds if elapsed_seconds else 0.0,
+                "errors": sum(route["errors"] for route in routes),
+            },
+            "routes": routes,
+        }
+
+
+def _fetch_token(auth0_url: str, audience: str) -> str:
+    response = httpx.post(
+        f"{auth0_url}/oauth/token",
+        json={"client_id": "load-generator", "audience": audience, "grant_type": "client_credentials"}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a request mix against a running user management service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the service under test")
+    parser.add_argument("--mix", required=True, help="Request mix (.json with weights or recorded .jsonl)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run for")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--concurrency", "-c", type=int, default=10, help="Concurrent connections")
+    parser.add_argument("--rate", type=float, default=None, help="Target requests per second across all workers")
+    parser.add_argument("--sequential", action="store_true", help="Replay entries in recorded order")
+    parser.add_argument("--fixture-size", type=int, default=1_000, help="List size the Auth0 stand-in was started with")
+    parser.add_argument("--token", default=None, help="Bearer token sent to the service")
+    parser.add_argument("--auth0-url", default=None, help="Fetch a caller token from this Auth0 stand-in")
+    parser.add_argument("--audience", default=None, help="Audience of the fetched caller token")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", "-o", default="-", help="Path of the JSON report, '-' for stdout")
+    arguments = parser.parse_args()
+
+    token = arguments.token
+    if token is None and arguments.auth0_url:
+        token = _fetch_token(arguments.auth0_url, arguments.audience or f"{arguments.auth0_url}/api/v2/")
+    generator = LoadGenerator(
+        base_url=arguments.url,
+        entries=load_mix(arguments.mix),
+        token=token,
+        concurrency=arguments.concurrency,
+        rate_per_second=arguments.rate,
+        fixture_size=arguments.fixture_size,
+        sequential=arguments.sequential,
+        seed=arguments.seed
+    )
+    report = asyncio.run(generator.run(duration_seconds=arguments.duration, total_requests=arguments.requests))
+    serialized = json.dumps(report, indent=2)
+    if arguments.output == "-":
+        print(serialized)
+    else:
+        with open(arguments.output, "w") as report_file:
+            report_file.write(serialized)
+
+
+if __name__ == "__main__":
+    main()
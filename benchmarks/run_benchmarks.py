@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import subprocess
+import sys
+from typing import Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.auth.auth_token_fetcher import AuthTokenFetcher
+from app.auth.auth_token_manager import AuthTokenManager
+from app.auth.auth_token_verifier import AuthTokenVerifier
+from app.auth.jwks_fetcher import JWKSClient
+from app.config import Settings
+from app.organizations.schemas import OrganizationFields
+from app.roles.schemas import RoleFields
+from app.users.schemas import SearchableUserFields, UserFields
+from app.utils.api_handler import BaseApiLayer
+from benchmarks.auth0_standin import Auth0StandIn
+from benchmarks.fixtures import make_users, make_roles, make_organizations
+from benchmarks.harness import BenchmarkResult, run_async_benchmark, run_sync_benchmark
+
+LIST_SIZES = (10, 1_000, 50_000)
+LIST_ITERATIONS = {10: 500, 1_000: 20, 50_000: 3}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _settings_for(stub: Auth0StandIn) -> Settings:
+    return Settings(
+        secret_key="benchmark",
+        auth0_url=stub.url,
+        auth0_client_id="benchmark-client",
+        auth0_client_secret="benchmark-secret",
+        caller_auth_audience="factory-hub"
+    )
+
+
+async def _token_benchmarks(stub: Auth0StandIn, iterations: int) -> List[BenchmarkResult]:
+    settings = _settings_for(stub)
+    verifier = AuthTokenVerifier(JWKSClient(auth_url=settings.auth0_url, timeouts=settings.token_timeouts))
+    token_manager = await AuthTokenManager.create(
+        fetcher_service=AuthTokenFetcher(settings=settings),
+        verifier_service=verifier
+    )
+    token = stub.issue_token()
+
+    async def get_token():
+        await token_manager.token
+
+    async def verify():
+        await verifier.verify_token(token_cookie=token)
+
+    return [
+        await run_async_benchmark("auth_token_manager.token", get_token, iterations),
+        await run_async_benchmark("auth_token_verifier.verify_token", verify, iterations),
+    ]
+
+
+async def _make_request_benchmarks(stub: Auth0StandIn, iterations: int) -> List[BenchmarkResult]:
+    token = stub.issue_token()
+    settings = _settings_for(stub)
+    warm_layer = BaseApiLayer(auth_url=stub.url, settings=settings)
+    cold_layers = []
+
+    async def new_layer():
+        cold_layers.append(BaseApiLayer(auth_url=stub.url, settings=settings))
+
+    async def cold_request():
+        layer = cold_layers.pop()
+        await layer.make_request(method="GET", endpoint="/roles", auth_token=token)
+        await layer.close()
+
+    async def warm_request():
+        await warm_layer.make_request(method="GET", endpoint="/roles", auth_token=token)
+
+    results = [
+        await run_async_benchmark(
+            "base_api_layer.make_request",
+            cold_request,
+            iterations,
+            params={"connection": "cold"},
+            setup=new_layer
+        ),
+        await run_async_benchmark(
+            "base_api_layer.make_request",
+            warm_request,
+            iterations,
+            params={"connection": "warm"}
+        ),
+    ]
+    await warm_layer.close()
+    return results
+
+
+def _query_params_benchmarks(iterations: int) -> List[BenchmarkResult]:
+    empty_fields = SearchableUserFields()
+    full_fields = SearchableUserFields(
+        email="user1@factory-hub.example.com",
+        created_at="2024-01-01",
+        organization_id="org_0000000000000001",
+        name="User 1",
+        given_name="User",
+        family_name="One"
+    )
+    return [
+        run_sync_benchmark(
+            "searchable_user_fields.to_query_params",
+            empty_fields.to_query_params,
+            iterations * 10,
+            params={"filters": 0}
+        ),
+        run_sync_benchmark(
+            "searchable_user_fields.to_query_params",
+            full_fields.to_query_params,
+            iterations * 10,
+            params={"filters": 6}
+        ),
+    ]
+
+
+def _serialization_benchmarks(sizes: tuple) -> List[BenchmarkResult]:
+    models = (
+        ("user_fields", UserFields, make_users),
+        ("role_fields", RoleFields, make_roles),
+        ("organization_fields", OrganizationFields, make_organizations),
+    )
+    results = []
+    for model_name, model, factory in models:
+        for size in sizes:
+            raw_items = factory(size)
+            validated_items = [model(**item) for item in raw_items]
+            params = {"items": size}
+            results.append(run_sync_benchmark(
+                f"{model_name}.validate_list",
+                lambda: [model(**item) for item in raw_items],
+                LIST_ITERATIONS[size],
+                warmup=1,
+                params=params
+            ))
+            results.append(run_sync_benchmark(
+                f"{model_name}.encode_list",
+                lambda: jsonable_encoder(validated_items),
+                LIST_ITERATIONS[size],
+                warmup=1,
+                params=params
+            ))
+    return results
+
+
+async def run(iterations: int, sizes: tuple) -> Dict:
+    with Auth0StandIn() as stub:
+        results = await _token_benchmarks(stub, iterations)
+        results += await _make_request_benchmarks(stub, iterations)
+    results += _query_params_benchmarks(iterations)
+    results += _serialization_benchmarks(sizes)
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "iterations": iterations,
+        },
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the user management microbenchmarks")
+    parser.add_argument("--output", "-o", default="-", help="Path of the JSON report, '-' for stdout")
+    parser.add_argument("--iterations", "-n", type=int, default=200, help="Iterations for per-call benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Skip the 50k item list benchmarks")
+    arguments = parser.parse_args()
+
+    sizes = LIST_SIZES[:-1] if arguments.quick else LIST_SIZES
+    report = asyncio.run(run(iterations=arguments.iterations, sizes=sizes))
+    serialized = json.dumps(report, indent=2)
+    if arguments.output == "-":
+        print(serialized)
+    else:
+        with open(arguments.output, "w") as report_file:
+            report_file.write(serialized)
+
+
+if __name__ == "__main__":
+    main()